@@ -0,0 +1,92 @@
+import hashlib
+import json
+import logging
+import os
+
+from pyan3_fs.import_graph import ImportGraph
+
+
+class AnalysisCache:
+    """ファイル内容のハッシュをキーにした解析結果のディスクキャッシュ。"""
+
+    VERSION = 1
+
+    def __init__(self, cache_dir: str, namespace: str, config: dict | None = None) -> None:
+        self.cache_file = os.path.join(cache_dir, f"{namespace}.json")
+        self.config = config or {}
+        self.entries: dict[str, dict] = {}
+
+    @classmethod
+    def file_hash(cls, path: str) -> str:
+        with open(path, "rb") as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+    def load(self) -> None:
+        self.entries = {}
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"キャッシュ {self.cache_file} を読み込めませんでした: {e}")
+            return
+
+        # 設定が変わった場合はキャッシュ全体を捨てる
+        if payload.get("version") != self.VERSION or payload.get("config") != self.config:
+            return
+        self.entries = payload.get("files", {})
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        payload = {"version": self.VERSION, "config": self.config, "files": self.entries}
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
+
+    def get(self, file_path: str, digest: str | None = None) -> dict | None:
+        entry = self.entries.get(file_path)
+        if entry is None or (digest is not None and entry["hash"] != digest):
+            return None
+        return entry["data"]
+
+    def get_imports(self, file_path: str, digest: str) -> set[str] | None:
+        entry = self.entries.get(file_path)
+        if entry is None or entry["hash"] != digest or entry.get("imports") is None:
+            return None
+        return set(entry["imports"])
+
+    def put(
+        self, file_path: str, digest: str, data: dict, imports: set[str] | None = None
+    ) -> None:
+        self.entries[file_path] = {
+            "hash": digest,
+            "imports": sorted(imports) if imports is not None else None,
+            "data": data,
+        }
+
+    def stale_files(
+        self, file_hashes: dict[str, str], import_graph: ImportGraph | None = None
+    ) -> set[str]:
+        """再解析が必要なファイルを返します。
+
+        import_graph を渡した場合は、変更・削除されたファイルに推移的に依存する
+        ファイルも再解析の対象に含めます。
+        """
+        stale = {
+            file_path
+            for file_path, digest in file_hashes.items()
+            if self.entries.get(file_path, {}).get("hash") != digest
+        }
+        removed = set(self.entries) - set(file_hashes)
+        if import_graph is not None and (stale or removed):
+            changed_modules = {
+                ImportGraph.module_name_of(file_path) for file_path in stale | removed
+            }
+            stale |= import_graph.dependents(changed_modules) & set(file_hashes)
+        return stale
+
+    def prune(self, file_paths: set[str]) -> None:
+        for file_path in set(self.entries) - set(file_paths):
+            del self.entries[file_path]
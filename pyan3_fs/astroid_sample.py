@@ -7,6 +7,8 @@ from astroid.exceptions import AstroidError, InferenceError
 from pathlib import Path
 from astroid.builder import AstroidBuilder
 
+from pyan3_fs.import_graph import ImportGraph
+
 
 class FileParser:
     def __init__(
@@ -16,6 +18,7 @@ class FileParser:
         scan_module: str = None,
         max_workers: int = 4,
         output_file: str = "references_output.txt",
+        import_prefilter: bool = True,
     ):
         self.project_path = os.path.abspath(project_path)
         self.handler_module = handler_module
@@ -23,6 +26,7 @@ class FileParser:
         self.scan_module = scan_module
         self.max_workers = max_workers
         self.output_file = output_file
+        self.import_prefilter = import_prefilter
         self.total_files = 0
         self.files_with_stop_iteration = 0
 
@@ -65,6 +69,35 @@ class FileParser:
         self.write(f"Derived module name for '{file_path}': {module_name}\n")
         return module_name
 
+    def filter_by_imports(self, py_files: list) -> list:
+        # Drop files that never import the handler module, directly or via re-exports,
+        # before any astroid tree is built.
+        handler_rel_path = os.path.relpath(self.handler_module_path, self.project_path)
+        package_root = os.path.join(
+            self.project_path, Path(handler_rel_path).parts[0]
+        )
+        graph_files = {
+            os.path.relpath(os.path.join(root, file), self.project_path)
+            for root, dirs, files in os.walk(package_root)
+            for file in files
+            if file.endswith(".py")
+        }
+        rel_paths = {
+            file_path: os.path.relpath(file_path, self.project_path)
+            for file_path in py_files
+        }
+        graph_files.update(rel_paths.values())
+        graph_files.add(handler_rel_path)
+
+        import_graph = ImportGraph()
+        import_graph.scan_files(self.project_path, sorted(graph_files))
+        referencing = import_graph.files_referencing({handler_rel_path})
+        kept_files = [f for f in py_files if rel_paths[f] in referencing]
+        self.write(
+            f"Import prefilter skipped {len(py_files) - len(kept_files)} of {len(py_files)} files.\n"
+        )
+        return kept_files
+
     def find_references_in_file(self, file_path: str, def_qnames: set):
         self.total_files += 1
         references = []
@@ -227,6 +260,9 @@ class FileParser:
                 != os.path.abspath(self.handler_module_path)
             ]
 
+        if self.import_prefilter:
+            py_files = self.filter_by_imports(py_files)
+
         self.write(f"Scanning {len(py_files)} Python files for references...\n")
 
         references = []
@@ -0,0 +1,295 @@
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from queue import Empty
+
+from pyan3_fs.call_graph_creator import CallGraphCreator
+from pyan3_fs.call_graph_parser import CallGraphAnalyzer
+from pyan3_fs.clubjt_error_analyzer import ClubjtErrorAnalyzer
+from pyan3_fs.operator_parser import OperatorParser
+from pyan3_fs.run_profiler import RunProfiler
+from pyan3_fs.synthetic_project import SyntheticProjectGenerator
+
+
+class BenchmarkRunner:
+    """Times each analysis stage on synthetic projects of increasing size.
+
+    Every stage runs in its own process so that peak RSS and the astroid
+    caches are measured per stage. Stages run in pipeline order because
+    CallGraphCreator consumes the CSV files written by the earlier stages.
+    """
+
+    STAGES = [
+        "clubjt_error_analyzer",
+        "operator_parser",
+        "call_graph_parser",
+        "call_graph_creator",
+    ]
+    TARGET_MODULE = "clubjt_impl"
+    # A stage killed by a signal (e.g. the OOM killer) never puts a result on
+    # the queue, so the parent polls and checks that the child is still alive.
+    RESULT_POLL_SECONDS = 1.0
+
+    def __init__(
+        self,
+        sizes: list[int],
+        work_dir: str,
+        call_fanout: int = 3,
+        inheritance_depth: int = 3,
+        raise_density: float = 0.2,
+        workers: int = 1,
+        stage_timeout: float | None = None,
+    ) -> None:
+        self.sizes = sizes
+        self.work_dir = os.path.abspath(work_dir)
+        self.call_fanout = call_fanout
+        self.inheritance_depth = inheritance_depth
+        self.raise_density = raise_density
+        self.workers = workers
+        self.stage_timeout = stage_timeout
+
+    def run(self) -> dict:
+        results = []
+        for size in self.sizes:
+            project_path = os.path.join(self.work_dir, f"project_{size}")
+            output_path = os.path.join(self.work_dir, f"output_{size}")
+            os.makedirs(output_path, exist_ok=True)
+            generator = SyntheticProjectGenerator(
+                project_path,
+                target_module=self.TARGET_MODULE,
+                module_count=size,
+                call_fanout=self.call_fanout,
+                inheritance_depth=self.inheritance_depth,
+                handler_count=max(2, size // 2),
+                raise_density=self.raise_density,
+            )
+            generator.generate()
+            for stage in self.STAGES:
+                result = self._run_stage_process(stage, project_path, output_path)
+                result.update({"size": size, "stage": stage})
+                results.append(result)
+                logging.info(
+                    f"size={size} stage={stage} seconds={result['seconds']:.3f} "
+                    f"files/s={result['files_per_second']:.1f} edges/s={result['edges_per_second']:.1f}"
+                )
+        return {
+            "python": sys.version.split()[0],
+            "settings": {
+                "sizes": self.sizes,
+                "call_fanout": self.call_fanout,
+                "inheritance_depth": self.inheritance_depth,
+                "raise_density": self.raise_density,
+                "workers": self.workers,
+            },
+            "results": results,
+        }
+
+    def _run_stage_process(self, stage: str, project_path: str, output_path: str) -> dict:
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=_run_stage,
+            args=(stage, project_path, output_path, self.workers, queue),
+        )
+        process.start()
+        try:
+            result = self._wait_for_result(stage, process, queue)
+        finally:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        if "error" in result:
+            raise RuntimeError(f"Stage {stage} failed: {result['error']}")
+        return result
+
+    def _wait_for_result(
+        self, stage: str, process: multiprocessing.Process, queue: multiprocessing.Queue
+    ) -> dict:
+        deadline = time.monotonic() + self.stage_timeout if self.stage_timeout else None
+        while True:
+            try:
+                return queue.get(timeout=self.RESULT_POLL_SECONDS)
+            except Empty:
+                pass
+            if not process.is_alive():
+                # The result may still be in flight if the child exited just now.
+                try:
+                    return queue.get(timeout=self.RESULT_POLL_SECONDS)
+                except Empty:
+                    raise RuntimeError(
+                        f"Stage {stage} exited with code {process.exitcode} without a result"
+                    ) from None
+            if deadline is not None and time.monotonic() > deadline:
+                raise RuntimeError(f"Stage {stage} did not finish within {self.stage_timeout}s")
+
+    @classmethod
+    def compare(cls, current: dict, baseline: dict, threshold: float) -> list[dict]:
+        """Returns the (size, stage) pairs that are slower than baseline * threshold."""
+        baseline_seconds = {
+            (result["size"], result["stage"]): result["seconds"]
+            for result in baseline.get("results", [])
+        }
+        regressions = []
+        for result in current["results"]:
+            key = (result["size"], result["stage"])
+            if key not in baseline_seconds or baseline_seconds[key] <= 0:
+                continue
+            ratio = result["seconds"] / baseline_seconds[key]
+            result["baseline_ratio"] = round(ratio, 3)
+            if ratio > threshold:
+                regressions.append(
+                    {
+                        "size": result["size"],
+                        "stage": result["stage"],
+                        "seconds": result["seconds"],
+                        "baseline_seconds": baseline_seconds[key],
+                        "ratio": round(ratio, 3),
+                    }
+                )
+        return regressions
+
+
+def _count_csv_rows(csv_file: str) -> int:
+    with open(csv_file, "r", encoding="utf-8") as f:
+        return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+
+def _run_stage(
+    stage: str,
+    project_path: str,
+    output_path: str,
+    workers: int,
+    queue: multiprocessing.Queue,
+) -> None:
+    try:
+        os.chdir(output_path)
+        logging.disable(logging.CRITICAL)
+        target_path = os.path.join(project_path, BenchmarkRunner.TARGET_MODULE)
+        files = sum(
+            1
+            for _, _, names in os.walk(target_path)
+            for name in names
+            if name.endswith(".py")
+        )
+        started = time.perf_counter()
+
+        if stage == "clubjt_error_analyzer":
+            ClubjtErrorAnalyzer(
+                project_path, BenchmarkRunner.TARGET_MODULE, workers=workers
+            ).execute()
+            seconds = time.perf_counter() - started
+            edges = _count_csv_rows(ClubjtErrorAnalyzer.OUTPUT_FILE)
+        elif stage == "operator_parser":
+            handler_files = SyntheticProjectGenerator(project_path).handler_files
+            OperatorParser(project_path, handler_files).execute()
+            seconds = time.perf_counter() - started
+            files = len(handler_files)
+            edges = _count_csv_rows("fastapi_endpoints.csv")
+        elif stage == "call_graph_parser":
+            CallGraphAnalyzer(
+                project_path, BenchmarkRunner.TARGET_MODULE, workers=workers
+            ).execute()
+            seconds = time.perf_counter() - started
+            edges = _count_csv_rows(CallGraphAnalyzer.CSV_FILE)
+        else:
+            CallGraphCreator(
+                CallGraphAnalyzer.CSV_FILE,
+                ClubjtErrorAnalyzer.OUTPUT_FILE,
+                "call_graphs.txt",
+                "handler_error_mapping.csv",
+                "fastapi_endpoints.csv",
+            ).execute()
+            seconds = time.perf_counter() - started
+            edges = _count_csv_rows(CallGraphAnalyzer.CSV_FILE)
+
+        queue.put(
+            {
+                "seconds": round(seconds, 6),
+                "files": files,
+                "edges": edges,
+                "files_per_second": files / seconds if seconds else 0.0,
+                "edges_per_second": edges / seconds if seconds else 0.0,
+                "peak_rss_bytes": RunProfiler.peak_rss_bytes().get("self"),
+            }
+        )
+    except Exception as e:
+        queue.put({"error": str(e)})
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the analysis stages on synthetic projects."
+    )
+    parser.add_argument(
+        "--sizes", default="20,80,320", help="Comma separated module counts"
+    )
+    parser.add_argument("--work-dir", default=None, help="Defaults to a temporary directory")
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--inheritance-depth", type=int, default=3)
+    parser.add_argument("--raise-density", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--stage-timeout",
+        type=float,
+        default=None,
+        help="Fail a stage that runs longer than this many seconds",
+    )
+    parser.add_argument("--output", default="benchmark_result.json")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to compare against")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store this run as the baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Fail when a stage is slower than baseline by this factor",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="pyan3_fs_bench_")
+    runner = BenchmarkRunner(
+        [int(size) for size in args.sizes.split(",")],
+        work_dir,
+        call_fanout=args.fanout,
+        inheritance_depth=args.inheritance_depth,
+        raise_density=args.raise_density,
+        workers=args.workers,
+        stage_timeout=args.stage_timeout,
+    )
+    current = runner.run()
+
+    exit_code = 0
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = BenchmarkRunner.compare(current, baseline, args.threshold)
+        current["regressions"] = regressions
+        for regression in regressions:
+            logging.error(
+                f"Regression: size={regression['size']} stage={regression['stage']} "
+                f"{regression['seconds']:.3f}s vs {regression['baseline_seconds']:.3f}s "
+                f"(x{regression['ratio']})"
+            )
+        exit_code = 1 if regressions else 0
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    if args.save_baseline and args.baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        logging.info(f"Baseline written to {args.baseline}")
+    logging.info(f"Benchmark results written to {args.output}")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
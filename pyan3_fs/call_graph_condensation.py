@@ -0,0 +1,159 @@
+import numpy as np
+
+from pyan3_fs.compact_call_graph import CompactCallGraph
+
+
+class CondensedCallGraph:
+    """Strongly-connected-component condensation of a CompactCallGraph.
+
+    Handler nodes are treated as terminal: the traversal stops at a handler
+    just like the path enumeration in CallGraphCreator does, so their callers
+    are never followed. Components are discovered lazily from the queried
+    nodes and the set of handlers reachable from each component is memoized,
+    which makes answering every start point linear in the size of the graph
+    instead of in the number of simple paths.
+
+    With memoize_handlers=False only the condensation itself is kept, which is
+    what propagate_start_bits needs. With stop_at_handlers=False the callers
+    of handlers are followed too, for plain reachability over the whole graph.
+    """
+
+    def __init__(
+        self,
+        graph: CompactCallGraph,
+        memoize_handlers: bool = True,
+        stop_at_handlers: bool = True,
+    ) -> None:
+        self.graph = graph
+        self.memoize_handlers = memoize_handlers
+        self.stop_at_handlers = stop_at_handlers
+        self.handler_flags = graph.is_handler.tolist()
+        self.component_of: dict[int, int] = {}
+        self.components: list[list[int]] = []
+        self.successors: list[list[int]] = []
+        # Components closed while a component's root was on the DFS stack form
+        # the id range [tree_low[c], c]; all of them are reachable from c.
+        self.tree_low: list[int] = []
+        self.reachable: list[frozenset] = []
+
+    def callers(self, node: int) -> list[int]:
+        if self.stop_at_handlers and self.handler_flags[node]:
+            return []
+        return self.graph.caller_list(node)
+
+    def is_handler(self, node: int) -> bool:
+        return self.handler_flags[node]
+
+    def handlers_reachable_from(self, node: int) -> frozenset:
+        """Returns the handler node ids reachable from node, including node itself."""
+        return self.reachable[self.condense(node)]
+
+    def condense(self, node: int) -> int:
+        """Condenses everything reachable from node and returns its component id."""
+        if node not in self.component_of:
+            self._condense(node)
+        return self.component_of[node]
+
+    def propagate_start_bits(self, start_ids: list[int]) -> dict[int, np.ndarray]:
+        """Returns, per reached handler id, the packed bits of the start points reaching it.
+
+        Bit i (np.packbits order) stands for start_ids[i]. Components are
+        numbered callers-first, so visiting them by descending id is a
+        topological order from the start points towards the handlers; each
+        component's bits are pushed to its callers once and then released.
+        """
+        start_components = [self.condense(start_id) for start_id in start_ids]
+        width = (len(start_ids) + 7) // 8
+        pending: dict[int, np.ndarray] = {}
+        for bit, component_id in enumerate(start_components):
+            bits = pending.setdefault(component_id, np.zeros(width, dtype=np.uint8))
+            bits[bit >> 3] |= 0x80 >> (bit & 7)
+
+        handler_bits = {}
+        for component_id in range(len(self.components) - 1, -1, -1):
+            bits = pending.pop(component_id, None)
+            if bits is None:
+                continue
+            members = self.components[component_id]
+            if self.handler_flags[members[0]]:
+                # Handlers are terminal, so they always form singleton components.
+                handler_bits[members[0]] = bits
+                continue
+            for successor in self.successors[component_id]:
+                target = pending.get(successor)
+                if target is None:
+                    pending[successor] = bits.copy()
+                else:
+                    np.bitwise_or(target, bits, out=target)
+        return handler_bits
+
+    def _condense(self, root: int) -> None:
+        # Iterative Tarjan. Components come out callers-first, so the reachable
+        # sets of every successor component are known when a component closes.
+        index = {root: 0}
+        lowlink = {root: 0}
+        closed_before = {root: len(self.components)}
+        stack = [root]
+        on_stack = {root}
+        work = [(root, iter(self.callers(root)))]
+        while work:
+            node, successors = work[-1]
+            descended = False
+            for successor in successors:
+                if successor in self.component_of:
+                    continue
+                if successor not in index:
+                    index[successor] = lowlink[successor] = len(index)
+                    closed_before[successor] = len(self.components)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(self.callers(successor))))
+                    descended = True
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            if descended:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                members = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    members.append(member)
+                    if member == node:
+                        break
+                self._close_component(members, closed_before[node])
+
+    def condense_all(self) -> None:
+        for node in range(len(self.graph)):
+            if node not in self.component_of:
+                self._condense(node)
+
+    def _close_component(self, members: list[int], tree_low: int) -> None:
+        component_id = len(self.components)
+        for member in members:
+            self.component_of[member] = component_id
+        self.components.append(members)
+        self.tree_low.append(tree_low)
+        successors = {
+            self.component_of[caller]
+            for member in members
+            for caller in self.callers(member)
+        }
+        successors.discard(component_id)
+        self.successors.append(sorted(successors))
+        if not self.memoize_handlers:
+            return
+
+        handlers = {member for member in members if self.is_handler(member)}
+        successor_sets = {self.reachable[successor] for successor in successors}
+        if not handlers and len(successor_sets) == 1:
+            # Share the successor's set instead of copying it along chains.
+            self.reachable.append(next(iter(successor_sets)))
+        else:
+            self.reachable.append(frozenset(handlers).union(*successor_sets))
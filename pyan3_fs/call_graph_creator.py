@@ -1,14 +1,46 @@
 import os
+import argparse
+import gzip
+import io
 import logging
+import multiprocessing
+import time
 import duckdb
 import csv
-from collections import defaultdict
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from itertools import groupby
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from pyan3_fs.call_graph_condensation import CondensedCallGraph
+from pyan3_fs.compact_call_graph import CompactCallGraph
+from pyan3_fs.edge_store import EdgeStore
+from pyan3_fs.endpoint_error_matrix import EndpointErrorMatrix
 from pyan3_fs.fastapi_endpoint_datasouce import FastApiEndpointDatasource
+from pyan3_fs.run_profiler import RunProfiler
 
 
 class CallGraphCreator:
+    WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+    MAPPING_FIELDNAMES = [
+        "module",
+        "http_method",
+        "path",
+        "operation_id",
+        "file_path",
+        "class_name",
+        "function_name",
+        "error_class_name",
+        "status_code",
+        "reason",
+        "message",
+    ]
+
     def __init__(
         self,
         reference_csv,
@@ -16,6 +48,14 @@ class CallGraphCreator:
         output_file,
         new_output_csv,
         fastapi_endpoints_csv,
+        profile_report=None,
+        traversal="condensed",
+        matrix_file=None,
+        workers=1,
+        max_paths_per_start=None,
+        max_paths_per_handler=None,
+        compression=None,
+        write_buffer_size=None,
     ):
         self.reference_csv = reference_csv
         self.start_points_csv = start_points_csv
@@ -24,41 +64,116 @@ class CallGraphCreator:
         self.fastapi_endpoints_csv = fastapi_endpoints_csv
         self.conn = duckdb.connect(":memory:")
         self.logger = self._setup_logger()
-        self.call_graph = defaultdict(set)
+        self.call_graph = None
+        self.edge_tables = None
         self.handler_error_mappings = []
         self.error_details = {}
         self.fastapi_endpoints = []
+        self.endpoint_index = {}
+        self.traversal = traversal
+        self.matrix_file = matrix_file
+        self.matrix = None
+        self.workers = workers
+        self.max_paths_per_start = max_paths_per_start
+        self.max_paths_per_handler = max_paths_per_handler
+        self.written_paths = 0
+        self.path_counts = {}
+        self.omitted_path_counts = {}
+        self.compression = compression
+        self.write_buffer_size = write_buffer_size or self.WRITE_BUFFER_SIZE
+        self.profile_report = profile_report
+        self.profiler = RunProfiler("call_graph_creator")
 
     @classmethod
     def _setup_logger(cls):
         logger = logging.getLogger(__name__)
         logger.setLevel(logging.DEBUG)
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        if not logger.handlers:
+            # Long-lived processes create several creators; attach the handler once.
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter(
+                "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+            )
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
         return logger
 
     def execute(self):
         try:
-            self._load_csv_to_duckdb()
-            self._load_fastapi_endpoints()
-            start_points = self._load_start_points()
-            self._build_call_graph()
-            self._write_call_graphs(start_points)
-            self._write_handler_error_mapping()
+            with self.profiler.phase("load_references"):
+                self._load_csv_to_duckdb()
+            with self.profiler.phase("load_fastapi_endpoints"):
+                self._load_fastapi_endpoints()
+            with self.profiler.phase("load_start_points"):
+                start_points = self.load_start_points()
+            if self.traversal == "sql":
+                with self.profiler.phase("create_graph_tables"):
+                    self._create_graph_tables()
+                with self.profiler.phase("create_handler_error_mapping"):
+                    self._create_handler_error_mapping()
+                with self.profiler.phase("write_handler_error_mapping"):
+                    self._copy_handler_error_mapping()
+            else:
+                with self.profiler.phase("build_call_graph"):
+                    self._build_call_graph()
+                if self.traversal == "bitset":
+                    with self.profiler.phase("build_endpoint_error_matrix"):
+                        self._build_endpoint_error_matrix(start_points)
+                else:
+                    with self.profiler.phase("write_call_graphs"):
+                        self._write_call_graphs(start_points)
+                with self.profiler.phase("write_handler_error_mapping"):
+                    self._write_handler_error_mapping()
         except Exception as e:
             self.logger.error(f"An error occurred: {str(e)}")
         finally:
             self.conn.close()
+            if self.profile_report:
+                self.profiler.write_report(self.profile_report)
+
+    def load_call_graph(self):
+        """Loads the inputs and builds the call graph without writing any output."""
+        with self.profiler.phase("load_references"):
+            self._load_csv_to_duckdb()
+        with self.profiler.phase("load_fastapi_endpoints"):
+            self._load_fastapi_endpoints()
+        with self.profiler.phase("load_start_points"):
+            start_points = self.load_start_points()
+        with self.profiler.phase("build_call_graph"):
+            self._build_call_graph()
+        return start_points
 
     def _load_csv_to_duckdb(self):
+        if EdgeStore.detect_format(self.reference_csv) != "csv":
+            if self.traversal != "sql":
+                # The call graph is built from the stored ids; no string ref_table needed.
+                self.edge_tables = EdgeStore.attach_tables(self.conn, self.reference_csv)
+                if self.edge_tables is not None:
+                    self.logger.info("Using the node and edge tables of the reference edge store")
+                    return
+                EdgeStore.detach_tables(self.conn, self.reference_csv)
+            self.logger.info("Loading reference edge store to DuckDB")
+            EdgeStore.create_ref_table(self.conn, self.reference_csv)
+            result = self.conn.execute("SELECT COUNT(*) FROM ref_table").fetchone()
+            self.logger.debug(f"Loaded {result[0]} rows into ref_table")
+            return
+
         self.logger.info("Loading reference CSV to DuckDB")
+        self.create_reference_table(self.conn)
         self.conn.execute(
-            """
-            CREATE TABLE ref_table (
+            f"""
+            COPY ref_table FROM '{self.reference_csv}' (HEADER, DELIMITER ',')
+        """
+        )
+
+        result = self.conn.execute("SELECT COUNT(*) FROM ref_table").fetchone()
+        self.logger.debug(f"Loaded {result[0]} rows into ref_table")
+
+    @classmethod
+    def create_reference_table(cls, conn, table_name="ref_table"):
+        conn.execute(
+            f"""
+            CREATE TABLE {table_name} (
                 called_file_path VARCHAR,
                 called_class_name VARCHAR,
                 called_function_name VARCHAR,
@@ -68,149 +183,682 @@ class CallGraphCreator:
             )
         """
         )
-        self.conn.execute(
-            f"""
-            COPY ref_table FROM '{self.reference_csv}' (HEADER, DELIMITER ',')
-        """
-        )
-
-        result = self.conn.execute("SELECT COUNT(*) FROM ref_table").fetchone()
-        self.logger.debug(f"Loaded {result[0]} rows into ref_table")
 
     def _load_fastapi_endpoints(self):
         self.logger.info("Loading FastAPI endpoints")
         with FastApiEndpointDatasource(self.fastapi_endpoints_csv) as datasource:
             self.fastapi_endpoints = datasource.get_endpoints()
+        for ep in self.fastapi_endpoints:
+            self.endpoint_index.setdefault((ep.module_name, ep.operation_id), ep)
         self.logger.debug(f"Loaded {len(self.fastapi_endpoints)} FastAPI endpoints")
 
-    def _load_start_points(self):
+    def load_start_points(self):
+        # Read column-wise through DuckDB; empty fields become '' as with csv.DictReader.
         self.logger.info("Loading start points and error details from CSV")
-        start_points = []
-        with open(self.start_points_csv, "r") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                key = (row["file_path"], row["class_name"], row["function_name"])
-                start_points.append(key)
-                self.error_details[key] = {
-                    "error_class_name": row.get("error_class_name", ""),
-                    "status_code": row.get("status_code", ""),
-                    "reason": row.get("reason", ""),
-                    "message": row.get("message", ""),
-                }
+        self.conn.execute(
+            f"""
+            CREATE OR REPLACE TABLE start_point_rows AS
+            SELECT * FROM read_csv(
+                '{self.start_points_csv}',
+                header = true, all_varchar = true, delim = ',', quote = '"', escape = '"'
+            )
+        """
+        )
+        columns = self.conn.execute("SELECT * FROM start_point_rows").fetchnumpy()
+        row_count = len(columns["file_path"])
+
+        def column_values(name):
+            if name not in columns:
+                return [""] * row_count
+            return [value or "" for value in columns[name].tolist()]
+
+        start_points = list(
+            zip(
+                column_values("file_path"),
+                column_values("class_name"),
+                column_values("function_name"),
+            )
+        )
+        fields = ["error_class_name", "status_code", "reason", "message"]
+        # Later rows win for duplicate start points, so only the last one becomes a dict.
+        details = dict(zip(start_points, zip(*(column_values(field) for field in fields))))
+        for key, values in details.items():
+            self.error_details[key] = dict(zip(fields, values))
         self.logger.debug(f"Loaded {len(start_points)} start points")
         return start_points
 
     def _build_call_graph(self):
         self.logger.info("Building complete call graph")
-        query = """
+        if self.edge_tables is not None:
+            self._build_call_graph_from_edge_store()
+            return
+        self._create_graph_node_tables()
+        # Node ids come from graph_nodes, already in CompactCallGraph.sort_key order,
+        # so the edge id columns are used as they are.
+        node_columns = self.conn.execute(
+            "SELECT file_path, class_name, function_name FROM graph_nodes ORDER BY node_id"
+        ).fetchnumpy()
+        nodes = [
+            CompactCallGraph.intern_node(file_path, class_name, function_name)
+            for file_path, class_name, function_name in zip(
+                node_columns["file_path"].tolist(),
+                node_columns["class_name"].tolist(),
+                node_columns["function_name"].tolist(),
+            )
+        ]
+        edge_columns = self.conn.execute(
+            "SELECT called_id, caller_id FROM graph_edges"
+        ).fetchnumpy()
+        self.call_graph = CompactCallGraph.from_sorted_id_arrays(
+            nodes, edge_columns["called_id"], edge_columns["caller_id"]
+        )
+        self.logger.debug(
+            f"Built call graph with {len(self.call_graph)} nodes "
+            f"and {self.call_graph.edge_count} edges"
+        )
+
+    def _build_call_graph_from_edge_store(self):
+        # Same edge filter and node table as _create_graph_node_tables, but the
+        # stored node ids are only renumbered into sort_key order, never joined
+        # back to strings edge by edge.
+        nodes, edges = self.edge_tables
+        self.conn.execute(
+            f"""
+            CREATE TABLE store_edges AS
+            SELECT e.called_id, e.caller_id
+            FROM {edges} AS e
+            JOIN {nodes} AS caller ON caller.node_id = e.caller_id
+            WHERE caller.file_path NOT LIKE '%test_%'
+        """
+        )
+        self.conn.execute(
+            f"""
+            CREATE TABLE graph_nodes AS
+            SELECT
+                row_number() OVER (
+                    ORDER BY file_path, class_name,
+                        function_name IS NOT NULL, coalesce(function_name, '')
+                ) - 1 AS node_id,
+                file_path, class_name, function_name,
+                list(store_id) FILTER (WHERE store_id IS NOT NULL) AS store_ids
+            FROM (
+                SELECT
+                    node_id AS store_id, file_path, coalesce(class_name, '') AS class_name,
+                    function_name
+                FROM {nodes}
+                WHERE node_id IN (
+                    SELECT called_id FROM store_edges UNION SELECT caller_id FROM store_edges
+                )
+                UNION ALL
+                SELECT
+                    NULL, coalesce(file_path, ''), coalesce(class_name, ''),
+                    coalesce(function_name, '')
+                FROM start_point_rows
+            )
+            GROUP BY file_path, class_name, function_name
+        """
+        )
+        EdgeStore.detach_tables(self.conn, self.reference_csv)
+        node_columns = self.conn.execute(
+            "SELECT file_path, class_name, function_name FROM graph_nodes ORDER BY node_id"
+        ).fetchnumpy()
+        nodes = [
+            CompactCallGraph.intern_node(file_path, class_name, function_name)
+            for file_path, class_name, function_name in zip(
+                node_columns["file_path"].tolist(),
+                node_columns["class_name"].tolist(),
+                node_columns["function_name"].tolist(),
+            )
+        ]
+        store_ids = self.conn.execute(
+            "SELECT node_id, unnest(store_ids) AS store_id FROM graph_nodes"
+        ).fetchnumpy()
+        edge_columns = self.conn.execute(
+            "SELECT called_id, caller_id FROM store_edges"
+        ).fetchnumpy()
+        self.conn.execute("DROP TABLE store_edges")
+        remap = np.zeros(int(store_ids["store_id"].max(initial=-1)) + 1, dtype=np.int64)
+        remap[store_ids["store_id"].astype(np.int64)] = store_ids["node_id"]
+        self.call_graph = CompactCallGraph.from_sorted_id_arrays(
+            nodes,
+            remap[edge_columns["called_id"].astype(np.int64)],
+            remap[edge_columns["caller_id"].astype(np.int64)],
+        )
+        self.logger.debug(
+            f"Built call graph with {len(self.call_graph)} nodes "
+            f"and {self.call_graph.edge_count} edges from the edge store"
+        )
+
+    def _create_graph_node_tables(self):
+        # Class names are coalesced to '' and function names stay NULL for class
+        # references. Start points are part of the node table even when nothing
+        # calls them.
+        self.conn.execute(
+            """
+            CREATE TABLE graph_edge_keys AS
             SELECT DISTINCT
-                called_file_path, called_class_name, called_function_name,
-                caller_file_path, caller_class_name, caller_function_name
+                called_file_path, coalesce(called_class_name, '') AS called_class_name,
+                called_function_name,
+                caller_file_path, coalesce(caller_class_name, '') AS caller_class_name,
+                caller_function_name
             FROM ref_table
             WHERE caller_file_path NOT LIKE '%test_%'
         """
-        result = self.conn.execute(query).fetchall()
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE graph_nodes AS
+            SELECT
+                row_number() OVER (
+                    ORDER BY file_path, class_name,
+                        function_name IS NOT NULL, coalesce(function_name, '')
+                ) - 1 AS node_id,
+                file_path, class_name, function_name,
+                ends_with(file_path, '_handler.py') AS is_handler
+            FROM (
+                SELECT called_file_path AS file_path, called_class_name AS class_name,
+                    called_function_name AS function_name
+                FROM graph_edge_keys
+                UNION
+                SELECT caller_file_path, caller_class_name, caller_function_name
+                FROM graph_edge_keys
+                UNION
+                SELECT
+                    coalesce(file_path, ''), coalesce(class_name, ''),
+                    coalesce(function_name, '')
+                FROM start_point_rows
+            )
+        """
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE graph_edges AS
+            SELECT called.node_id AS called_id, caller.node_id AS caller_id
+            FROM graph_edge_keys AS e
+            JOIN graph_nodes AS called
+                ON called.file_path = e.called_file_path
+                AND called.class_name = e.called_class_name
+                AND called.function_name IS NOT DISTINCT FROM e.called_function_name
+            JOIN graph_nodes AS caller
+                ON caller.file_path = e.caller_file_path
+                AND caller.class_name = e.caller_class_name
+                AND caller.function_name IS NOT DISTINCT FROM e.caller_function_name
+        """
+        )
+        self.conn.execute("DROP TABLE graph_edge_keys")
 
-        for row in result:
-            called = (row[0], row[1] or "", row[2])
-            caller = (row[3], row[4] or "", row[5])
-            self.call_graph[called].add(caller)
+    def _create_graph_tables(self):
+        self.logger.info("Creating call graph tables in DuckDB")
+        self._create_graph_node_tables()
+        # Built from start_point_rows in one statement: duplicate start points keep
+        # their first position and the last error details, as in the Python
+        # traversals, and missing or empty fields become '' as in load_start_points.
+        columns = {
+            column[0]
+            for column in self.conn.execute("SELECT * FROM start_point_rows LIMIT 0").description
+        }
+        values = ",\n".join(
+            f"coalesce({field}, '') AS {field}" if field in columns else f"'' AS {field}"
+            for field in (
+                "file_path",
+                "class_name",
+                "function_name",
+                "error_class_name",
+                "status_code",
+                "reason",
+                "message",
+            )
+        )
+        self.conn.execute(
+            f"""
+            CREATE TABLE start_points AS
+            SELECT
+                min(row_index) AS start_index,
+                file_path, class_name, function_name,
+                arg_max(error_class_name, row_index) AS error_class_name,
+                arg_max(status_code, row_index) AS status_code,
+                arg_max(reason, row_index) AS reason,
+                arg_max(message, row_index) AS message
+            FROM (SELECT rowid AS row_index, {values} FROM start_point_rows)
+            GROUP BY file_path, class_name, function_name
+        """
+        )
+        self.conn.execute(
+            "CREATE TABLE endpoints (endpoint_index INTEGER, module_name VARCHAR, "
+            "http_method VARCHAR, path VARCHAR, operation_id VARCHAR)"
+        )
+        if self.fastapi_endpoints:
+            self.conn.executemany(
+                "INSERT INTO endpoints VALUES (?, ?, ?, ?, ?)",
+                [
+                    (i, ep.module_name, ep.http_method, ep.path, ep.operation_id)
+                    for i, ep in enumerate(self.fastapi_endpoints)
+                ],
+            )
+        # Handlers are terminal, so edges leaving a handler are never followed.
+        self.conn.execute(
+            """
+            CREATE TABLE traversable_edges AS
+            SELECT e.called_id, e.caller_id
+            FROM graph_edges AS e
+            JOIN graph_nodes AS called ON called.node_id = e.called_id
+            WHERE NOT called.is_handler
+        """
+        )
+        result = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM graph_nodes), (SELECT COUNT(*) FROM graph_edges)"
+        ).fetchone()
+        self.logger.debug(f"Created graph tables with {result[0]} nodes and {result[1]} edges")
+
+    def _create_handler_endpoints(self):
+        # A handler resolves to the first endpoint with its module and operation
+        # id, while the output is ordered by the last one, as in
+        # _write_handler_error_mapping.
+        self.conn.execute(
+            """
+            CREATE TABLE handler_endpoints AS
+            WITH endpoint_keys AS (
+                SELECT
+                    module_name, operation_id,
+                    min(endpoint_index) AS first_index,
+                    max(endpoint_index) AS sort_index
+                FROM endpoints
+                GROUP BY module_name, operation_id
+            )
+            SELECT h.node_id AS handler_id, k.first_index, k.sort_index
+            FROM graph_nodes AS h
+            JOIN endpoint_keys AS k
+                ON k.module_name = regexp_extract(h.file_path, '([^/]*)\\.py$', 1)
+                AND k.operation_id = h.function_name
+            WHERE h.is_handler AND k.module_name IN ('user_handler', 'operator_handler')
+        """
+        )
+
+    def _create_reachable_handlers(self):
+        # The walk starts at the handlers that resolve to an endpoint and follows
+        # edges towards the called functions; there are far fewer of those
+        # handlers than start points, so far fewer (handler, node) pairs are
+        # generated than when walking up from every start point. An edge into a
+        # handler is never followed, which makes handlers terminal as in the
+        # Python traversals. UNION (not UNION ALL) drops pairs that were already
+        # reached, which terminates the recursion on cycles.
+        self.conn.execute(
+            """
+            CREATE TABLE reachable_handlers AS
+            WITH RECURSIVE reach(handler_id, node_id) AS (
+                SELECT handler_id, handler_id
+                FROM handler_endpoints
+                UNION
+                SELECT r.handler_id, e.called_id
+                FROM reach AS r
+                JOIN traversable_edges AS e ON e.caller_id = r.node_id
+            )
+            SELECT s.start_index, r.handler_id
+            FROM reach AS r
+            JOIN graph_nodes AS n ON n.node_id = r.node_id
+            JOIN start_points AS s
+                ON n.file_path = s.file_path
+                AND n.class_name = s.class_name
+                AND n.function_name IS NOT DISTINCT FROM s.function_name
+        """
+        )
+
+    def _create_handler_error_mapping(self):
+        self.logger.info("Computing handler-error mapping in DuckDB")
+        self._create_handler_endpoints()
+        self._create_reachable_handlers()
+        # Deduplication runs on integer keys: start points with the same error
+        # details share an error_key, and per endpoint and error_key the
+        # earliest start point is kept. Strings are only joined in for the
+        # rows that remain.
+        self.conn.execute(
+            """
+            CREATE TABLE handler_error_mapping AS
+            WITH error_keys AS (
+                SELECT
+                    start_index,
+                    dense_rank() OVER (
+                        ORDER BY error_class_name, status_code, reason, message
+                    ) AS error_key
+                FROM start_points
+            ),
+            pairs AS (
+                SELECT e.first_index, e.sort_index, k.error_key, min(r.start_index) AS start_index
+                FROM reachable_handlers AS r
+                JOIN handler_endpoints AS e ON e.handler_id = r.handler_id
+                JOIN error_keys AS k ON k.start_index = r.start_index
+                GROUP BY e.first_index, e.sort_index, k.error_key
+            )
+            SELECT
+                p.sort_index, p.start_index,
+                ep.module_name AS module, ep.http_method, ep.path, ep.operation_id,
+                s.file_path, s.class_name, s.function_name,
+                s.error_class_name, s.status_code, s.reason, s.message
+            FROM pairs AS p
+            JOIN endpoints AS ep ON ep.endpoint_index = p.first_index
+            JOIN start_points AS s ON s.start_index = p.start_index
+        """
+        )
+        count = self.conn.execute("SELECT COUNT(*) FROM handler_error_mapping").fetchone()[0]
+        self.logger.debug(f"Found {count} handler-error mappings")
+
+    def _copy_handler_error_mapping(self):
+        # Same bytes as the csv.writer in _write_handler_error_mapping: every
+        # field quoted, CRLF line ends and a blank line after each run of rows
+        # of one module. Lines are rendered in SQL and written unquoted.
+        self.logger.info("Writing handler-error mapping to CSV from DuckDB")
+        header = ",".join(f'"{field}"' for field in self.MAPPING_FIELDNAMES)
+        line = " || ',' || ".join(
+            f"""'"' || replace(coalesce({field}, ''), '"', '""') || '"'"""
+            for field in self.MAPPING_FIELDNAMES
+        )
+        self.conn.execute(
+            f"""
+            COPY (
+                SELECT line FROM (
+                    SELECT -1 AS sort_index, -1 AS start_index, 0 AS separator,
+                        '{header}' || chr(13) AS line
+                    UNION ALL
+                    SELECT sort_index, start_index, 0, {line} || chr(13)
+                    FROM handler_error_mapping
+                    UNION ALL
+                    SELECT sort_index, start_index, 1, chr(13)
+                    FROM (
+                        SELECT sort_index, start_index, module,
+                            lead(module) OVER (ORDER BY sort_index, start_index) AS next_module
+                        FROM handler_error_mapping
+                    )
+                    WHERE next_module IS DISTINCT FROM module
+                )
+                ORDER BY sort_index, start_index, separator
+            ) TO '{self.new_output_csv}' (FORMAT csv, HEADER false, QUOTE '', ESCAPE '')
+        """
+        )
+
+    @classmethod
+    def _is_handler(cls, node):
+        return node[0].endswith("_handler.py")
 
     def _write_call_graphs(self, start_points):
-        with open(self.output_file, "w") as out_file:
+        if self.traversal == "condensed":
+            self.condensed_graph = CondensedCallGraph(self.call_graph)
+        with self._open_output() as out_file:
+            if self.workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+                self._write_call_graphs_parallel(start_points, out_file)
+                return
             for i, start_point in enumerate(start_points):
-                self.logger.debug(
-                    f"Processing start point {i + 1}/{len(start_points)}: {start_point}"
-                )
-                out_file.write(
-                    f"Start Point: {start_point[0]}, {start_point[1]}, {start_point[2]}\n"
-                )
-                self._traverse_and_write_call_tree(start_point, out_file)
-                out_file.write(
-                    "\n" + "=" * 50 + "\n\n"
-                )  # Separator between call graphs
+                self._write_start_point(i, start_points, out_file)
+
+    def _count_path(self, terminal):
+        if self.max_paths_per_start is None and self.max_paths_per_handler is None:
+            return True
+        written = self.path_counts.get(terminal, 0)
+        if (
+            self.max_paths_per_start is not None
+            and self.written_paths >= self.max_paths_per_start
+        ) or (self.max_paths_per_handler is not None and written >= self.max_paths_per_handler):
+            self.omitted_path_counts[terminal] = self.omitted_path_counts.get(terminal, 0) + 1
+            return False
+        self.path_counts[terminal] = written + 1
+        self.written_paths += 1
+        return True
+
+    def _write_omitted_paths(self, out_file):
+        if not self.omitted_path_counts:
+            return
+        out_file.write(
+            f"Omitted Paths: {sum(self.omitted_path_counts.values())} "
+            f"(max {self.max_paths_per_start} per start point, "
+            f"max {self.max_paths_per_handler} per handler)\n"
+        )
+        for node in sorted(self.omitted_path_counts, key=CompactCallGraph.sort_key):
+            count = self.omitted_path_counts[node]
+            class_name = f", {node[1]}" if node[1] else ""
+            out_file.write(f"  {node[0]}{class_name}, {node[2]}: {count}\n")
+
+    def _open_output(self):
+        compression = self.compression
+        if compression is None:
+            compression = {".gz": "gzip", ".zst": "zstd"}.get(
+                os.path.splitext(self.output_file)[1], "none"
+            )
+        if compression == "none":
+            return open(self.output_file, "w", buffering=self.write_buffer_size)
+        if compression == "gzip":
+            raw = gzip.open(self.output_file, "wb", compresslevel=6)
+        elif compression == "zstd":
+            if zstandard is None:
+                raise ImportError("zstd compression requires the zstandard package")
+            raw = zstandard.ZstdCompressor().stream_writer(open(self.output_file, "wb"))
+        else:
+            raise ValueError(f"Unknown compression: {compression}")
+        return io.TextIOWrapper(
+            io.BufferedWriter(raw, buffer_size=self.write_buffer_size)
+        )
+
+    def _write_start_point(self, i, start_points, out_file):
+        start_point = start_points[i]
+        self.written_paths = 0
+        self.path_counts = {}
+        self.omitted_path_counts = {}
+        self.logger.debug(
+            f"Processing start point {i + 1}/{len(start_points)}: {start_point}"
+        )
+        out_file.write(
+            f"Start Point: {start_point[0]}, {start_point[1]}, {start_point[2]}\n"
+        )
+        started = time.perf_counter()
+        start_id = self.call_graph.node_id(start_point)
+        if self.traversal == "condensed":
+            self._write_condensed_call_tree(start_id, out_file)
+        else:
+            self._traverse_and_write_call_tree(start_id, out_file)
+        self._write_omitted_paths(out_file)
+        # Start points are the unit of work here, so they are reported as nodes.
+        self.profiler.record_node(
+            time.perf_counter() - started,
+            start_point[0],
+            None,
+            f"{start_point[1]}.{start_point[2]}" if start_point[1] else start_point[2],
+        )
+        out_file.write("\n" + "=" * 50 + "\n\n")  # Separator between call graphs
+
+    def _write_call_graphs_parallel(self, start_points, out_file):
+        # Forked workers share the read-only graph copy-on-write. Each block is
+        # rendered into a buffer and stitched back in start point order, so the
+        # output is byte-for-byte the same as the serial run.
+        global _worker_creator, _worker_start_points
+        self.logger.info(f"Writing call graphs with {self.workers} processes")
+        if self.traversal == "condensed":
+            # Condense before forking so that workers share the components and
+            # memoized handler sets instead of each rebuilding them privately.
+            self.condensed_graph.condense_all()
+        # Everything the workers need is in call_graph by now. DuckDB runs its
+        # own threads, and forking a multi-threaded process is unsafe.
+        self.conn.close()
+        _worker_creator = self
+        _worker_start_points = start_points
+        chunk = max(1, len(start_points) // (self.workers * 16))
+        ranges = [
+            (begin, min(begin + chunk, len(start_points)))
+            for begin in range(0, len(start_points), chunk)
+        ]
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                for text, mappings, partial in executor.map(_render_start_points, ranges):
+                    out_file.write(text)
+                    self.handler_error_mappings.extend(mappings)
+                    self.profiler.merge_partial(partial)
+        finally:
+            _worker_creator = None
+            _worker_start_points = None
+
+    def _write_condensed_call_tree(self, start_id, out_file):
+        # One shortest call stack per reachable terminal node instead of every path.
+        nodes = self.call_graph.nodes
+        for call_stack in self._shortest_call_stacks(start_id):
+            self._write_call_stack(
+                [nodes[node_id] for node_id in call_stack], out_file, add_mapping=False
+            )
+
+        handlers = self.condensed_graph.handlers_reachable_from(start_id)
+        for handler_id in sorted(handlers):
+            self._add_handler_error_mapping(nodes[handler_id], nodes[start_id])
+
+    def _shortest_call_stacks(self, start_id):
+        parents = {start_id: None}
+        terminals = []
+        queue = deque([start_id])
+        while queue:
+            node_id = queue.popleft()
+            callers = self.condensed_graph.callers(node_id)
+            if not callers:
+                terminals.append(node_id)
+                continue
+            for caller_id in callers:
+                if caller_id not in parents:
+                    parents[caller_id] = node_id
+                    queue.append(caller_id)
+
+        call_stacks = []
+        for terminal_id in sorted(terminals):
+            call_stack = []
+            node_id = terminal_id
+            while node_id is not None:
+                call_stack.append(node_id)
+                node_id = parents[node_id]
+            call_stacks.append(call_stack)
+        return call_stacks
+
+    def _build_endpoint_error_matrix(self, start_points):
+        # All start points in one pass; call_graphs.txt is not written in this mode.
+        self.matrix = self.compute_endpoint_error_matrix(start_points)
+        for endpoint, error_site in self.matrix.entries():
+            self._append_handler_error_mapping(endpoint, error_site)
+        if self.matrix_file:
+            self.matrix.save(self.matrix_file)
+            self.logger.info(f"Endpoint x error-site matrix written to {self.matrix_file}")
+
+    def write_mapping_from_matrix(self, matrix):
+        """Writes handler_error_mapping.csv from an already computed matrix."""
+        self.matrix = matrix
+        self.handler_error_mappings = []
+        for endpoint, error_site in matrix.entries():
+            self._append_handler_error_mapping(endpoint, error_site)
+        self._write_handler_error_mapping()
+
+    def compute_endpoint_error_matrix(self, start_points):
+        """Propagates all start points through the condensed graph at once."""
+        self.logger.info("Propagating start point bitsets through the condensed graph")
+        error_sites = list(dict.fromkeys(start_points))
+        condensed_graph = CondensedCallGraph(self.call_graph, memoize_handlers=False)
+        handler_bits = condensed_graph.propagate_start_bits(
+            [self.call_graph.node_id(site) for site in error_sites]
+        )
+
+        endpoint_rows = {}
+        for row, ep in enumerate(self.fastapi_endpoints):
+            endpoint_rows.setdefault((ep.module_name, ep.operation_id), row)
+        rows = []
+        cols = []
+        for handler_id, bits in handler_bits.items():
+            endpoint = self.endpoint_for_handler(self.call_graph.nodes[handler_id])
+            if endpoint is None:
+                continue
+            reached = np.flatnonzero(np.unpackbits(bits, count=len(error_sites)))
+            row = endpoint_rows[(endpoint.module_name, endpoint.operation_id)]
+            rows.append(np.full(len(reached), row))
+            cols.append(reached)
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+        # Several handler nodes may resolve to the same endpoint.
+        keys = np.unique(rows.astype(np.int64) * max(len(error_sites), 1) + cols)
+        matrix = EndpointErrorMatrix(
+            self.fastapi_endpoints,
+            error_sites,
+            keys // max(len(error_sites), 1),
+            keys % max(len(error_sites), 1),
+        )
+        self.logger.debug(f"Endpoint x error-site matrix has {len(matrix)} entries")
+        return matrix
 
     def _traverse_and_write_call_tree(
-        self, node, out_file, visited=None, current_path=None
+        self, node_id, out_file, visited=None, current_path=None
     ):
         if visited is None:
             visited = set()
         if current_path is None:
             current_path = []
 
-        if node in visited:
+        if node_id in visited:
             return
-        visited.add(node)
+        visited.add(node_id)
 
-        current_path.append(node)
+        current_path.append(node_id)
 
-        if node[0].endswith("_handler.py") or not self.call_graph[node]:
-            self._write_call_stack(list(reversed(current_path)), out_file)
+        if self.call_graph.is_handler[node_id] or not self.call_graph.has_callers[node_id]:
+            self._write_call_stack(
+                [self.call_graph.nodes[i] for i in reversed(current_path)], out_file
+            )
         else:
-            for caller in sorted(self.call_graph[node]):
+            # Callers are stored in sorted order, so no per-visit sort is needed.
+            for caller_id in self.call_graph.caller_list(node_id):
                 self._traverse_and_write_call_tree(
-                    caller, out_file, visited.copy(), current_path.copy()
+                    caller_id, out_file, visited.copy(), current_path.copy()
                 )
 
         current_path.pop()
 
-    def _write_call_stack(self, call_stack, out_file):
+    def _write_call_stack(self, call_stack, out_file, add_mapping=True):
+        # Capped paths are still visited so that the mapping stays complete.
+        write = self._count_path(call_stack[0])
         handler = None
         for i, node in enumerate(call_stack):
-            indent = "  " * i
-            class_name = f", {node[1]}" if node[1] else ""
-            out_file.write(f"{indent}{node[0]}{class_name}, {node[2]}\n")
+            if write:
+                indent = "  " * i
+                class_name = f", {node[1]}" if node[1] else ""
+                out_file.write(f"{indent}{node[0]}{class_name}, {node[2]}\n")
 
-            if node[0].endswith("_handler.py"):
+            if self._is_handler(node):
                 handler = node
 
-            if handler and i == len(call_stack) - 1:
-                error_info = self.error_details.get(node, {})
-                handler_module = os.path.basename(handler[0])[:-3]  # Remove '.py'
-                if handler_module in ["user_handler", "operator_handler"]:
-                    endpoint = next(
-                        (
-                            ep
-                            for ep in self.fastapi_endpoints
-                            if ep.module_name == handler_module
-                            and ep.operation_id == handler[2]
-                        ),
-                        None,
-                    )
-                    if endpoint:
-                        self.handler_error_mappings.append(
-                            {
-                                "module": endpoint.module_name,
-                                "http_method": endpoint.http_method,
-                                "path": endpoint.path,
-                                "operation_id": endpoint.operation_id,
-                                "file_path": node[0],
-                                "class_name": node[1],
-                                "function_name": node[2],
-                                "error_class_name": error_info.get(
-                                    "error_class_name", ""
-                                ),
-                                "status_code": error_info.get("status_code", ""),
-                                "reason": error_info.get("reason", ""),
-                                "message": error_info.get("message", ""),
-                            }
-                        )
+            if add_mapping and handler and i == len(call_stack) - 1:
+                self._add_handler_error_mapping(handler, node)
+
+    def _add_handler_error_mapping(self, handler, node):
+        endpoint = self.endpoint_for_handler(handler)
+        if endpoint:
+            self._append_handler_error_mapping(endpoint, node)
+
+    def endpoint_for_handler(self, handler):
+        handler_module = os.path.basename(handler[0])[:-3]  # Remove '.py'
+        if handler_module in ["user_handler", "operator_handler"]:
+            return self.endpoint_index.get((handler_module, handler[2]))
+        return None
+
+    def _append_handler_error_mapping(self, endpoint, node):
+        error_info = self.error_details.get(node, {})
+        self.handler_error_mappings.append(
+            {
+                "module": endpoint.module_name,
+                "http_method": endpoint.http_method,
+                "path": endpoint.path,
+                "operation_id": endpoint.operation_id,
+                "file_path": node[0],
+                "class_name": node[1],
+                "function_name": node[2],
+                "error_class_name": error_info.get("error_class_name", ""),
+                "status_code": error_info.get("status_code", ""),
+                "reason": error_info.get("reason", ""),
+                "message": error_info.get("message", ""),
+            }
+        )
 
     def _write_handler_error_mapping(self):
         self.logger.info("Writing handler-error mapping to CSV")
-        fieldnames = [
-            "module",
-            "http_method",
-            "path",
-            "operation_id",
-            "file_path",
-            "class_name",
-            "function_name",
-            "error_class_name",
-            "status_code",
-            "reason",
-            "message",
-        ]
+        fieldnames = self.MAPPING_FIELDNAMES
 
         # Sort the mappings based on the order in fastapi_endpoints
         endpoint_order = {
@@ -251,19 +899,86 @@ class CallGraphCreator:
                 writer.writerow([])  # Add a blank line between modules
 
 
+# Set in the parent right before forking the worker pool.
+_worker_creator = None
+_worker_start_points = None
+
+
+def _render_start_points(start_range):
+    creator = _worker_creator
+    creator.handler_error_mappings = []
+    creator.profiler.reset_files()
+    buffer = io.StringIO()
+    for i in range(*start_range):
+        creator._write_start_point(i, _worker_start_points, buffer)
+    return buffer.getvalue(), creator.handler_error_mappings, creator.profiler.export_partial()
+
+
 def main():
-    reference_csv = "clubjt_reference_result.csv"
-    start_points_csv = "clubjt_error_result.csv"
-    output_file = "call_graphs.txt"
-    new_output_csv = "handler_error_mapping.csv"
-    fastapi_endpoints_csv = "fastapi_endpoints.csv"
+    parser = argparse.ArgumentParser(
+        description="Build call trees from error sites up to FastAPI handlers."
+    )
+    parser.add_argument("--reference-csv", default="clubjt_reference_result.csv")
+    parser.add_argument("--start-points-csv", default="clubjt_error_result.csv")
+    parser.add_argument("--output-file", default="call_graphs.txt")
+    parser.add_argument("--mapping-csv", default="handler_error_mapping.csv")
+    parser.add_argument("--fastapi-endpoints-csv", default="fastapi_endpoints.csv")
+    parser.add_argument(
+        "--profile-report", default=None, help="Write a JSON timing report to this file"
+    )
+    parser.add_argument(
+        "--traversal",
+        choices=["condensed", "paths", "bitset", "sql"],
+        default="condensed",
+        help="condensed writes one shortest call stack per reachable handler; "
+        "paths enumerates every simple call path; "
+        "bitset builds only the mapping, from an endpoint x error-site matrix; "
+        "sql builds and writes only the mapping, entirely inside DuckDB",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for writing call graphs (condensed and paths traversals)",
+    )
+    parser.add_argument(
+        "--max-paths-per-start",
+        type=int,
+        default=None,
+        help="Write at most this many call stacks per start point",
+    )
+    parser.add_argument(
+        "--max-paths-per-handler",
+        type=int,
+        default=None,
+        help="Write at most this many call stacks per start point and handler",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=["none", "gzip", "zstd"],
+        default=None,
+        help="Compress call_graphs.txt (default: from the .gz/.zst extension)",
+    )
+    parser.add_argument(
+        "--matrix-file",
+        default=None,
+        help="Save the endpoint x error-site matrix (.npz) when --traversal bitset",
+    )
+    args = parser.parse_args()
 
     creator = CallGraphCreator(
-        reference_csv,
-        start_points_csv,
-        output_file,
-        new_output_csv,
-        fastapi_endpoints_csv,
+        args.reference_csv,
+        args.start_points_csv,
+        args.output_file,
+        args.mapping_csv,
+        args.fastapi_endpoints_csv,
+        profile_report=args.profile_report,
+        traversal=args.traversal,
+        matrix_file=args.matrix_file,
+        workers=args.workers,
+        max_paths_per_start=args.max_paths_per_start,
+        max_paths_per_handler=args.max_paths_per_handler,
+        compression=args.compression,
     )
     creator.execute()
 
@@ -1,29 +1,83 @@
 import os
 import sys
+import argparse
 import astroid
-import csv
 import traceback
 import logging
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from astroid.exceptions import AstroidError, InferenceError
 
+from pyan3_fs.analysis_cache import AnalysisCache
+from pyan3_fs.definition_registry import Definition, DefinitionRegistry
+from pyan3_fs.edge_store import EdgeStoreWriter
+from pyan3_fs.import_graph import ImportGraph
+from pyan3_fs.module_cache import ModuleCache
+from pyan3_fs.run_profiler import RunProfiler
+from pyan3_fs.reference_sink import (
+    CsvReferenceWriter,
+    DuckDBReferenceWriter,
+    ReferenceSink,
+)
+
 
 class CallGraphAnalyzer:
     PROJECT_PATH = "/Users/sugiyama/clubjt-server/clubjt-impl"
     TARGET_MODULE = "clubjt_impl"
     CSV_FILE = "clubjt_reference_result.csv"
-
-    def __init__(self):
-        self.project_path = os.path.abspath(self.PROJECT_PATH)
-        self.target_module = self.TARGET_MODULE
+    REFERENCE_NODE_CLASSES = (astroid.Name, astroid.Attribute, astroid.Call)
+
+    def __init__(
+        self,
+        project_path=PROJECT_PATH,
+        target_module=TARGET_MODULE,
+        csv_file=CSV_FILE,
+        workers=1,
+        cache_dir=None,
+        import_prefilter=True,
+        output_format="csv",
+        profile_report=None,
+        max_cached_modules=None,
+        max_cache_bytes=None,
+        astroid_batch_size=None,
+    ):
+        self.project_path = os.path.abspath(project_path)
+        self.target_module = target_module
+        self.csv_file = csv_file
+        self.workers = max(1, workers)
+        self.import_prefilter = import_prefilter
+        self.import_graph = None
+        self.reference_files = None
         self.target_path = os.path.join(self.project_path, self.target_module)
-        self.module_cache = {}
-        self.definitions = []
-        self.references = []
-        self.definition_qnames = set()
+        # メモリ上限を指定した場合は LRU で古いモジュールから解放する
+        self.module_cache = ModuleCache(max_cached_modules, max_cache_bytes)
+        self.astroid_batch_size = astroid_batch_size
+        self.memory_bounded = self.module_cache.bounded or bool(astroid_batch_size)
+        self.processed_files = 0
+        self.definitions = DefinitionRegistry()
+        self.output_format = output_format
+        self.sink = None
+        self.inference_stats = Counter()
+        self.profile_report = profile_report
+        self.profiler = RunProfiler("call_graph_parser")
         self.builder = astroid.builder.AstroidBuilder()
         self.python_files = []
 
+        # キャッシュ (cache_dir を指定した場合のみ有効)
+        self.cache = None
+        self.stale_files = None
+        self.file_hashes = {}
+        self.file_imports = {}
+        self.file_results = {}
+        if cache_dir:
+            self.cache = AnalysisCache(
+                cache_dir,
+                "call_graph",
+                {"project_path": self.project_path, "target_module": self.target_module},
+            )
+
         # ログの設定
         logging.basicConfig(
             level=logging.INFO,
@@ -40,33 +94,258 @@ class CallGraphAnalyzer:
             # 解析対象のPythonファイルを取得（TARGET_MODULE 配下）
             self.python_files = self.get_python_files(self.target_path)
             self.logger.info(f"{len(self.python_files)} 個のPythonファイルから定義を抽出します。")
+            if self.cache:
+                with self.profiler.phase("load_cache"):
+                    self.load_cache(self.python_files)
+            if self.import_prefilter:
+                with self.profiler.phase("scan_imports"):
+                    self.scan_imports(self.python_files)
 
             # 定義を抽出
-            for file_path in self.python_files:
-                self.extract_definitions(file_path)
+            with self.profiler.phase("extract_definitions"):
+                self.extract_all_definitions(self.python_files)
 
             if not self.definitions:
                 self.logger.error("定義が見つかりませんでした。")
                 return
 
-            self.definition_qnames = set(defn["qname"] for defn in self.definitions)
-            self.logger.info(f"定義を {len(self.definition_qnames)} 件収集しました。")
+            # 抽出が終わったので astroid ノードへの参照を解放する
+            self.definitions.release_nodes()
+            self.logger.info(f"定義を {len(self.definitions)} 件収集しました。")
 
             # 参照の探索範囲を TARGET_MODULE 配下の Python ファイルとする
             all_python_files = self.get_python_files(self.target_path)
             self.logger.info(f"{len(all_python_files)} 個のPythonファイルを解析します。")
 
-            # 各ファイルで参照を探索
-            for file_path in all_python_files:
-                self.find_references_in_file(file_path)
+            # 各ファイルで参照を探索し、見つかった参照は逐次出力する
+            with self.profiler.phase("find_references"):
+                self.open_sink()
+                self.find_all_references(all_python_files)
+                self.close_sink()
+            self.log_inference_stats()
 
-            # 結果をCSVに書き込み
-            self.write_to_csv()
-            self.logger.info(f"解析が完了しました。結果は {self.CSV_FILE} に出力されました。")
+            if self.cache:
+                with self.profiler.phase("save_cache"):
+                    self.save_cache()
+            self.logger.info(f"解析が完了しました。結果は {self.csv_file} に出力されました。")
 
         except Exception as e:
             self.logger.error(f"解析中にエラーが発生しました: {e}")
             traceback.print_exc()
+        finally:
+            # 途中で失敗しても、それまでに見つかった参照は出力しておく
+            self.close_sink()
+            if self.profile_report:
+                self.profiler.write_report(self.profile_report)
+                self.logger.info(f"計測結果を {self.profile_report} に出力しました。")
+
+    def scan_imports(self, python_files):
+        # astroid のツリーを作る前に ast だけで import と定義の有無を調べる
+        if self.stale_files is not None and not self.stale_files:
+            return
+        self.import_graph = ImportGraph()
+        self.import_graph.scan_files(self.project_path, python_files)
+        self.logger.info(
+            f"import の事前解析が完了しました。定義を含むファイルは "
+            f"{len(self.import_graph.defining_files)} / {len(python_files)} 個です。"
+        )
+
+    def needs_definition_pass(self, file_path):
+        return (
+            self.import_graph is None
+            or file_path in self.import_graph.defining_files
+            or file_path in self.import_graph.unparsable_files
+        )
+
+    def needs_reference_pass(self, file_path):
+        return self.reference_files is None or file_path in self.reference_files
+
+    def extract_all_definitions(self, python_files):
+        stale_files = [f for f in python_files if self.is_stale(f)]
+        parse_files = [f for f in stale_files if self.needs_definition_pass(f)]
+        if self.workers > 1 and parse_files:
+            # ワーカーの結果はファイル順に届くため、最初の定義を優先する逐次実行と同じ結果になる
+            self.logger.info(f"{self.workers} プロセスで定義を抽出します。")
+        extracted = self._iter_file_definitions(parse_files)
+
+        for file_path in python_files:
+            if self.is_stale(file_path):
+                if self.needs_definition_pass(file_path):
+                    file_definitions = next(extracted)
+                else:
+                    file_definitions = []
+                if self.cache:
+                    self.file_results[file_path] = {
+                        "definitions": [
+                            [d.file_path, d.class_name, d.function_name, d.qname]
+                            for d in file_definitions
+                        ]
+                    }
+            else:
+                file_definitions = [
+                    Definition(*values)
+                    for values in self.cache.get(file_path)["definitions"]
+                ]
+            for definition in file_definitions:
+                if self.memory_bounded:
+                    definition.node = None
+                self.definitions.register(definition)
+
+    def find_all_references(self, python_files):
+        if self.import_graph is not None:
+            # 定義を持つファイルを直接・再エクスポート経由で import していないファイルは除外する
+            self.reference_files = self.import_graph.files_referencing(
+                {definition.file_path for definition in self.definitions}
+            )
+        stale_files = [f for f in python_files if self.is_stale(f)]
+        parse_files = [f for f in stale_files if self.needs_reference_pass(f)]
+        if self.import_graph is not None:
+            self.logger.info(
+                f"import の事前解析により {len(stale_files) - len(parse_files)} 個のファイルの参照探索を省略します。"
+            )
+        process_order = python_files
+        file_hits = None
+        if self.module_cache.bounded:
+            # 定義抽出の直後にキャッシュに残っているモジュールから先に処理する。
+            # 参照は元のファイル順に書き出すため、出力は逐次実行と同じになる
+            process_order = list(reversed(python_files))
+            parse_files.reverse()
+            file_hits = {}
+        if self.workers > 1 and parse_files:
+            self.logger.info(f"{self.workers} プロセスで参照を探索します。")
+        collected = self._iter_file_references(parse_files)
+
+        definition_qnames = self.definitions.qnames
+        for file_path in process_order:
+            if self.is_stale(file_path):
+                hits = next(collected) if self.needs_reference_pass(file_path) else []
+                if self.cache:
+                    self.file_results[file_path]["references"] = hits
+            else:
+                hits = [
+                    tuple(hit)
+                    for hit in self.cache.get(file_path)["references"]
+                    if hit[0] in definition_qnames
+                ]
+            if file_hits is None:
+                self.add_references(file_path, hits)
+            else:
+                file_hits[file_path] = hits
+        if file_hits is not None:
+            for file_path in python_files:
+                self.add_references(file_path, file_hits.pop(file_path))
+
+    def _iter_file_definitions(self, python_files):
+        if self.workers == 1:
+            for file_path in python_files:
+                yield self.extract_file_definitions(file_path)
+                self.file_processed()
+            return
+
+        with self._create_executor(frozenset()) as executor:
+            for definitions, profile in executor.map(
+                _extract_definitions_task,
+                python_files,
+                chunksize=self._chunksize(python_files),
+            ):
+                self.profiler.merge_partial(profile)
+                yield definitions
+
+    def _iter_file_references(self, python_files):
+        if self.workers == 1:
+            for file_path in python_files:
+                yield self.collect_references(file_path, self.definitions.qnames)
+                if self.module_cache.bounded:
+                    # 参照の抽出が済んだモジュールはもう使わない
+                    self.module_cache.pop(file_path)
+                self.file_processed()
+            return
+
+        with self._create_executor(self.definitions.qnames) as executor:
+            for hits, stats, profile in executor.map(
+                _collect_references_task,
+                python_files,
+                chunksize=self._chunksize(python_files),
+            ):
+                self.inference_stats.update(stats)
+                self.profiler.merge_partial(profile)
+                yield hits
+
+    def load_cache(self, python_files):
+        # 内容ハッシュが変わったファイルと、それを import しているファイルだけを再解析する
+        self.cache.load()
+        file_hashes = {
+            file_path: AnalysisCache.file_hash(os.path.join(self.project_path, file_path))
+            for file_path in python_files
+        }
+        import_graph = ImportGraph()
+        self.file_imports = {}
+        for file_path, digest in file_hashes.items():
+            imports = self.cache.get_imports(file_path, digest)
+            if imports is None:
+                imports = self.collect_imports(file_path)
+            self.file_imports[file_path] = imports
+            import_graph.add_file(file_path, imports)
+
+        self.file_hashes = file_hashes
+        self.stale_files = self.cache.stale_files(file_hashes, import_graph)
+        self.logger.info(
+            f"キャッシュを利用します。{len(self.stale_files)} / {len(python_files)} 個のファイルを再解析します。"
+        )
+
+    def save_cache(self):
+        for file_path, data in self.file_results.items():
+            self.cache.put(
+                file_path,
+                self.file_hashes[file_path],
+                data,
+                self.file_imports[file_path],
+            )
+        self.cache.prune(set(self.file_hashes))
+        self.cache.save()
+
+    def collect_imports(self, file_path):
+        absolute_file_path = os.path.join(self.project_path, file_path)
+        try:
+            with open(absolute_file_path, "r", encoding="utf-8") as f:
+                return ImportGraph.collect_imports(f.read(), file_path)
+        except (SyntaxError, UnicodeDecodeError, OSError) as e:
+            self.logger.error(f"ファイル '{file_path}' の import を解析できませんでした: {e}")
+            return set()
+
+    def file_processed(self):
+        self.processed_files += 1
+        if self.astroid_batch_size and self.processed_files % self.astroid_batch_size == 0:
+            self.clear_astroid_caches()
+        elif self.module_cache.manager_over_limit(self.target_path + os.sep):
+            # 推論で読み込まれたモジュールも含めて上限を超えたらまとめて破棄する
+            self.clear_astroid_caches()
+
+    def clear_astroid_caches(self):
+        # astroid マネージャーが保持するモジュールと推論キャッシュをまとめて破棄する
+        self.module_cache.clear()
+        astroid.MANAGER.clear_cache()
+
+    def is_stale(self, file_path):
+        return self.stale_files is None or file_path in self.stale_files
+
+    def _create_executor(self, definition_qnames):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(
+                self.project_path,
+                self.target_module,
+                definition_qnames,
+                self.astroid_batch_size,
+                self.module_cache.max_modules,
+                self.module_cache.max_bytes,
+            ),
+        )
+
+    def _chunksize(self, python_files):
+        # 大きなファイルが一部のワーカーに偏らないよう、チャンクは小さめにする
+        return max(1, len(python_files) // (self.workers * 16))
 
     def get_python_files(self, path):
         python_files = []
@@ -101,14 +380,33 @@ class CallGraphAnalyzer:
             if file_path in self.module_cache:
                 module = self.module_cache[file_path]
             else:
-                module = self.builder.file_build(absolute_file_path, module_name)
-                self.module_cache[file_path] = module
+                # import の推論で astroid マネージャーが既に構築したモジュールは作り直さない
+                module = astroid.MANAGER.astroid_cache.get(module_name)
+                if module is None or module.file != absolute_file_path:
+                    started = time.perf_counter()
+                    module = self.builder.file_build(absolute_file_path, module_name)
+                    self.profiler.record_file(
+                        file_path, parse_seconds=time.perf_counter() - started
+                    )
+                self.module_cache.put(
+                    file_path,
+                    module,
+                    self.module_cache.estimate_size(absolute_file_path),
+                )
             return module
         except (AstroidError, FileNotFoundError, StopIteration) as e:
             self.logger.error(f"モジュール '{file_path}' の解析中にエラーが発生しました: {e}")
             return None
 
-    def extract_definitions(self, file_path):
+    def extract_file_definitions(self, file_path):
+        # ファイル単位の定義を得るため、専用の登録簿に抽出する
+        registry = DefinitionRegistry()
+        self.extract_definitions(file_path, registry)
+        return list(registry)
+
+    def extract_definitions(self, file_path, registry=None):
+        if registry is None:
+            registry = self.definitions
         module_name = self.get_module_qname(file_path)
         if not module_name:
             return
@@ -119,44 +417,24 @@ class CallGraphAnalyzer:
 
         for node in module.body:
             if isinstance(node, astroid.ClassDef):
-                self._extract_class_definitions(node, file_path, set())
+                self._extract_class_definitions(node, file_path, set(), registry)
             elif isinstance(node, astroid.FunctionDef):
-                qname = node.qname()
-                func_def = {
-                    "file_path": file_path,
-                    "class_name": None,
-                    "function_name": node.name,
-                    "qname": qname,
-                    "node": node,
-                }
-                self.definitions.append(func_def)
-
-    def _extract_class_definitions(self, class_node, file_path, processed_classes):
+                registry.add(file_path, None, node.name, node.qname(), node)
+
+    def _extract_class_definitions(
+        self, class_node, file_path, processed_classes, registry
+    ):
         if class_node.qname() in processed_classes:
             return
         processed_classes.add(class_node.qname())
 
-        qname = class_node.qname()
-        class_def = {
-            "file_path": file_path,
-            "class_name": class_node.name,
-            "function_name": None,
-            "qname": qname,
-            "node": class_node,
-        }
-        self.definitions.append(class_def)
+        registry.add(file_path, class_node.name, None, class_node.qname(), class_node)
 
         # 明示的に定義されたメソッドを取得
         for method in class_node.mymethods():
-            qname = method.qname()
-            method_def = {
-                "file_path": file_path,
-                "class_name": class_node.name,
-                "function_name": method.name,
-                "qname": qname,
-                "node": method,
-            }
-            self.definitions.append(method_def)
+            registry.add(
+                file_path, class_node.name, method.name, method.qname(), method
+            )
 
         # 継承元クラスを処理
         for base in class_node.bases:
@@ -172,7 +450,10 @@ class CallGraphAnalyzer:
                                 base_module.file, self.project_path
                             )
                             self._extract_class_definitions(
-                                inferred_base, base_file_path, processed_classes
+                                inferred_base,
+                                base_file_path,
+                                processed_classes,
+                                registry,
                             )
             except (InferenceError, AttributeError):
                 continue
@@ -182,48 +463,157 @@ class CallGraphAnalyzer:
             for subnode in subclass:
                 if isinstance(subnode, astroid.ClassDef):
                     self._extract_class_definitions(
-                        subnode, file_path, processed_classes
+                        subnode, file_path, processed_classes, registry
                     )
 
     def find_references_in_file(self, file_path):
+        hits = self.collect_references(file_path, self.definitions.qnames)
+        self.add_references(file_path, hits)
+
+    def collect_references(self, file_path, definition_qnames):
+        # (参照先 qname, 参照元クラス名, 参照元関数名) のリストを返す
+        hits = []
         module_name = self.get_module_qname(file_path)
         if not module_name:
-            return
+            return hits
 
         module = self.parse_module(file_path, module_name)
         if not module:
-            return
+            return hits
 
-        for node in module.nodes_of_class(
-            (astroid.Name, astroid.Attribute, astroid.Call)
-        ):
-            try:
-                for inferred in node.infer():
-                    if not hasattr(inferred, "qname"):
-                        continue
-                    inferred_qname = inferred.qname()
-                    if inferred_qname in self.definition_qnames:
-                        class_name, function_name = self.get_context(node)
-                        reference = {
-                            "source_file_path": self.get_definition_file_path(
-                                inferred_qname
-                            ),
-                            "source_class_name": self.get_definition_class_name(
-                                inferred_qname
-                            ),
-                            "source_function_name": self.get_definition_function_name(
-                                inferred_qname
-                            ),
-                            "reference_file_path": file_path,
-                            "reference_class_name": class_name,
-                            "reference_function_name": function_name,
-                        }
-                        self.references.append(reference)
-            except (InferenceError, StopIteration):
-                continue
-            except Exception as e:
-                self.logger.error(f"ファイル {file_path} のノード解析中にエラーが発生しました: {e}")
-                continue
+        started = time.perf_counter()
+        inferred_before = self.inference_stats["inferred"]
+        failed_before = self.inference_stats["failed"]
+
+        # Call の func は Name / Attribute として再度走査されるため、推論結果をノード単位で使い回す
+        inference_memo = {}
+        for node in module.nodes_of_class(self.REFERENCE_NODE_CLASSES):
+            hits.extend(
+                self.collect_node_references(node, inference_memo, file_path, definition_qnames)
+            )
+
+        self.profiler.record_file(
+            file_path,
+            analyze_seconds=time.perf_counter() - started,
+            inferences=self.inference_stats["inferred"] - inferred_before,
+            inference_failures=self.inference_stats["failed"] - failed_before,
+        )
+        return hits
+
+    def collect_node_references(self, node, inference_memo, file_path, definition_qnames):
+        # ノード 1 つ分の (参照先 qname, 参照元クラス名, 参照元関数名) のリストを返す
+        hits = []
+        self.inference_stats["nodes"] += 1
+        if self.is_external_node(node):
+            self.inference_stats["skipped_prefilter"] += 1
+            return hits
+        try:
+            if isinstance(node, astroid.Call):
+                func_values = self.infer_node(node.func, inference_memo, file_path)
+                if func_values and all(
+                    isinstance(value, astroid.ClassDef) for value in func_values
+                ):
+                    # クラスのインスタンス化は func ノードと同じ qname にしかならない
+                    self.inference_stats["skipped_duplicate"] += 1
+                    return hits
+
+            for inferred in self.infer_node(node, inference_memo, file_path):
+                if not hasattr(inferred, "qname"):
+                    continue
+                inferred_qname = inferred.qname()
+                if inferred_qname in definition_qnames:
+                    class_name, function_name = self.get_context(node)
+                    hits.append((inferred_qname, class_name, function_name))
+        except Exception as e:
+            self.logger.error(f"ファイル {file_path} のノード解析中にエラーが発生しました: {e}")
+        return hits
+
+    def infer_node(self, node, inference_memo, file_path):
+        if node in inference_memo:
+            self.inference_stats["memo_hits"] += 1
+            return inference_memo[node]
+
+        # 途中で推論に失敗しても、それまでに得られた結果は使う
+        values = []
+        self.inference_stats["inferred"] += 1
+        started = time.perf_counter()
+        try:
+            for value in node.infer():
+                values.append(value)
+        except (InferenceError, StopIteration):
+            self.inference_stats["failed"] += 1
+        except Exception as e:
+            self.inference_stats["failed"] += 1
+            self.logger.error(f"ファイル {file_path} のノード推論中にエラーが発生しました: {e}")
+        elapsed = time.perf_counter() - started
+        if self.profiler.is_slow(elapsed):
+            self.profiler.record_node(
+                elapsed, file_path, node.lineno, node.as_string()[:120]
+            )
+        inference_memo[node] = values
+        return values
+
+    def is_external_node(self, node):
+        # TARGET_MODULE 外の import を起点とする Name / Attribute の連鎖だけは推論しない。
+        # getattr() や type() などの組み込み関数、super() の戻り値は
+        # プロジェクトのクラスやインスタンスになり得るので対象外とする
+        if isinstance(node, astroid.Call):
+            node = node.func
+        while isinstance(node, astroid.Attribute):
+            node = node.expr
+        if not isinstance(node, astroid.Name):
+            return False
+
+        _, assignments = node.lookup(node.name)
+        if not assignments:
+            return True
+        return all(
+            isinstance(assignment, (astroid.Import, astroid.ImportFrom))
+            and not self.imports_target(assignment, node.name)
+            for assignment in assignments
+        )
+
+    def imports_target(self, import_node, name):
+        if isinstance(import_node, astroid.ImportFrom):
+            modnames = [
+                import_node.root().relative_to_absolute_name(
+                    import_node.modname, import_node.level
+                )
+            ]
+        else:
+            modnames = [
+                modname
+                for modname, alias in import_node.names
+                if (alias or modname.split(".")[0]) == name
+            ]
+        return any(
+            modname == self.target_module
+            or modname.startswith(f"{self.target_module}.")
+            for modname in modnames
+        )
+
+    def log_inference_stats(self):
+        stats = self.inference_stats
+        self.logger.info(
+            f"推論 {stats['inferred']} 回 (失敗 {stats['failed']} 回) / 対象ノード {stats['nodes']} 件。"
+            f"prefilter で {stats['skipped_prefilter']} 件、重複 Call で {stats['skipped_duplicate']} 件、"
+            f"メモ化で {stats['memo_hits']} 件の推論を省略しました。"
+        )
+
+    def add_references(self, file_path, hits):
+        for qname, class_name, function_name in hits:
+            definition = self.definitions.get(qname)
+            # 見つかった順に重複排除しながら書き出す
+            self.sink.add(
+                (
+                    definition.file_path,
+                    definition.class_name or "",
+                    definition.function_name or "",
+                    file_path,
+                    class_name or "",
+                    function_name or "",
+                )
+            )
 
     def get_context(self, node):
         class_name = None
@@ -241,66 +631,146 @@ class CallGraphAnalyzer:
         return class_name, function_name
 
     def get_definition_file_path(self, qname):
-        for defn in self.definitions:
-            if defn["qname"] == qname:
-                return defn["file_path"]
-        return ""
+        definition = self.definitions.get(qname)
+        return definition.file_path if definition else ""
 
     def get_definition_class_name(self, qname):
-        for defn in self.definitions:
-            if defn["qname"] == qname:
-                return defn["class_name"] or ""
-        return ""
+        definition = self.definitions.get(qname)
+        return (definition.class_name or "") if definition else ""
 
     def get_definition_function_name(self, qname):
-        for defn in self.definitions:
-            if defn["qname"] == qname:
-                return defn["function_name"] or ""
-        return ""
-
-    def write_to_csv(self):
-        fieldnames = [
-            "source_file_path",
-            "source_class_name",
-            "source_function_name",
-            "reference_file_path",
-            "reference_class_name",
-            "reference_function_name",
-        ]
-        written_rows = set()  # 重複を防ぐためのセット
-
-        with open(self.CSV_FILE, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            # 参照があるもののみを出力
-            for reference in self.references:
-                row = (
-                    reference["source_file_path"],
-                    reference["source_class_name"],
-                    reference["source_function_name"],
-                    reference["reference_file_path"],
-                    reference["reference_class_name"] or "",
-                    reference["reference_function_name"] or "",
-                )
-                if row not in written_rows:
-                    writer.writerow(
-                        {
-                            "source_file_path": reference["source_file_path"],
-                            "source_class_name": reference["source_class_name"],
-                            "source_function_name": reference["source_function_name"],
-                            "reference_file_path": reference["reference_file_path"],
-                            "reference_class_name": reference["reference_class_name"]
-                            or "",
-                            "reference_function_name": reference[
-                                "reference_function_name"
-                            ]
-                            or "",
-                        }
-                    )
-                    written_rows.add(row)
+        definition = self.definitions.get(qname)
+        return (definition.function_name or "") if definition else ""
+
+    def open_sink(self):
+        if self.output_format == "duckdb":
+            writer = DuckDBReferenceWriter(self.csv_file)
+        elif self.output_format in ("edges-duckdb", "edges-parquet"):
+            writer = EdgeStoreWriter(self.csv_file, self.output_format.split("-")[1])
+        else:
+            writer = CsvReferenceWriter(self.csv_file)
+        self.sink = ReferenceSink(writer)
+
+    def close_sink(self):
+        if self.sink is not None:
+            self.sink.close()
+            self.logger.info(
+                f"参照を {self.sink.total_rows} 件出力しました (重複 {self.sink.duplicate_rows} 件を除外)。"
+            )
+            self.sink = None
+
+
+_worker_analyzer = None
+_worker_definition_qnames = frozenset()
+
+
+def _init_worker(
+    project_path,
+    target_module,
+    definition_qnames,
+    astroid_batch_size,
+    max_cached_modules,
+    max_cache_bytes,
+):
+    # ワーカーごとに独立した astroid マネージャーのキャッシュを持たせる
+    global _worker_analyzer, _worker_definition_qnames
+    astroid.MANAGER.astroid_cache.clear()
+    _worker_analyzer = CallGraphAnalyzer(
+        project_path,
+        target_module,
+        max_cached_modules=max_cached_modules,
+        max_cache_bytes=max_cache_bytes,
+        astroid_batch_size=astroid_batch_size,
+    )
+    _worker_definition_qnames = definition_qnames
+
+
+def _extract_definitions_task(file_path):
+    _worker_analyzer.profiler.reset_files()
+    definitions = _worker_analyzer.extract_file_definitions(file_path)
+    _worker_analyzer.module_cache.clear()
+    _worker_analyzer.file_processed()
+    return definitions, _worker_analyzer.profiler.export_partial()
+
+
+def _collect_references_task(file_path):
+    _worker_analyzer.inference_stats = Counter()
+    _worker_analyzer.profiler.reset_files()
+    hits = _worker_analyzer.collect_references(file_path, _worker_definition_qnames)
+    _worker_analyzer.module_cache.clear()
+    _worker_analyzer.file_processed()
+    return (
+        hits,
+        _worker_analyzer.inference_stats,
+        _worker_analyzer.profiler.export_partial(),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TARGET_MODULE 配下の参照関係を CSV に出力します。")
+    parser.add_argument("--project-path", default=CallGraphAnalyzer.PROJECT_PATH)
+    parser.add_argument("--target-module", default=CallGraphAnalyzer.TARGET_MODULE)
+    parser.add_argument("--output", default=CallGraphAnalyzer.CSV_FILE)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="並列に解析するプロセス数 (1 で逐次実行)"
+    )
+    parser.add_argument(
+        "--cache-dir", default=None, help="解析結果キャッシュの保存先 (省略時はキャッシュしない)"
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=["csv", "duckdb", "edges-duckdb", "edges-parquet"],
+        default="csv",
+        help=(
+            "参照の出力形式。duckdb は --output の DuckDB ファイルの ref_table に、"
+            "edges-duckdb / edges-parquet はノード表と整数の辺表として出力する"
+            " (edges-parquet の --output はディレクトリ)"
+        ),
+    )
+    parser.add_argument(
+        "--profile-report", default=None, help="フェーズ・ファイル単位の計測結果を出力する JSON ファイル"
+    )
+    parser.add_argument(
+        "--max-cached-modules",
+        type=int,
+        default=None,
+        help="保持する astroid モジュール数の上限 (推論で読み込まれたモジュールも含む)",
+    )
+    parser.add_argument(
+        "--max-cache-mb",
+        type=int,
+        default=None,
+        help="保持する astroid モジュールの推定メモリ上限 (MB、推論で読み込まれたモジュールも含む)",
+    )
+    parser.add_argument(
+        "--astroid-batch-size",
+        type=int,
+        default=None,
+        help="指定したファイル数ごとに astroid マネージャーのキャッシュを破棄する",
+    )
+    parser.add_argument(
+        "--no-import-prefilter",
+        dest="import_prefilter",
+        action="store_false",
+        help="ast による import の事前解析でファイルを絞り込まない",
+    )
+    args = parser.parse_args()
+
+    analyzer = CallGraphAnalyzer(
+        project_path=args.project_path,
+        target_module=args.target_module,
+        csv_file=args.output,
+        workers=args.workers,
+        cache_dir=args.cache_dir,
+        import_prefilter=args.import_prefilter,
+        output_format=args.output_format,
+        profile_report=args.profile_report,
+        max_cached_modules=args.max_cached_modules,
+        max_cache_bytes=args.max_cache_mb * 1024 * 1024 if args.max_cache_mb else None,
+        astroid_batch_size=args.astroid_batch_size,
+    )
+    analyzer.execute()
 
 
 if __name__ == "__main__":
-    analyzer = CallGraphAnalyzer()
-    analyzer.execute()
+    main()
@@ -0,0 +1,280 @@
+import argparse
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from pyan3_fs.call_graph_condensation import CondensedCallGraph
+from pyan3_fs.call_graph_creator import CallGraphCreator
+
+
+class CallGraphQueryService:
+    """Answers call graph queries from artifacts that are loaded once.
+
+    The reference data, the start points (error sites) and the FastAPI
+    endpoints are loaded through CallGraphCreator, and the endpoint x
+    error-site matrix is computed up front. Artifact mtimes are checked at
+    most once per check_interval seconds; when they change, a new state is
+    built and swapped in, while queries keep using the old one.
+    """
+
+    QUERIES = ["callers-of", "endpoints-reaching", "errors-of-endpoint", "path-between"]
+
+    def __init__(
+        self,
+        reference_csv: str,
+        start_points_csv: str,
+        fastapi_endpoints_csv: str,
+        check_interval: float = 1.0,
+    ) -> None:
+        self.artifacts = [reference_csv, start_points_csv, fastapi_endpoints_csv]
+        self.check_interval = check_interval
+        self.logger = logging.getLogger(__name__)
+        self.reload_lock = threading.Lock()
+        self.checked_at = 0.0
+        self.mtimes = None
+        self.state = None
+        self.reload()
+
+    def _artifact_mtimes(self) -> list[float]:
+        mtimes = []
+        for path in self.artifacts:
+            if os.path.isdir(path):
+                # Parquet edge stores are directories of files.
+                mtimes.append(
+                    max(
+                        (entry.stat().st_mtime for entry in os.scandir(path)),
+                        default=os.stat(path).st_mtime,
+                    )
+                )
+            else:
+                mtimes.append(os.stat(path).st_mtime)
+        return mtimes
+
+    def reload(self) -> None:
+        mtimes = self._artifact_mtimes()
+        started = time.perf_counter()
+        creator = CallGraphCreator(
+            self.artifacts[0], self.artifacts[1], None, None, self.artifacts[2]
+        )
+        try:
+            start_points = creator.load_call_graph()
+            matrix = creator.compute_endpoint_error_matrix(start_points)
+        finally:
+            creator.conn.close()
+        # Queries run on several threads, so the condensation is completed here
+        # instead of being filled in lazily while it is shared.
+        condensed_graph = CondensedCallGraph(creator.call_graph)
+        condensed_graph.condense_all()
+        self.state = {
+            "creator": creator,
+            "graph": creator.call_graph,
+            "condensed_graph": condensed_graph,
+            "matrix": matrix,
+        }
+        self.mtimes = mtimes
+        self.logger.info(
+            f"Loaded {len(creator.call_graph)} nodes, {creator.call_graph.edge_count} edges "
+            f"and {len(matrix)} endpoint/error pairs in {time.perf_counter() - started:.2f}s"
+        )
+
+    def reload_if_changed(self) -> None:
+        now = time.monotonic()
+        if now - self.checked_at < self.check_interval:
+            return
+        with self.reload_lock:
+            if now - self.checked_at < self.check_interval:
+                return
+            self.checked_at = now
+            try:
+                changed = self._artifact_mtimes() != self.mtimes
+            except OSError:
+                # An artifact is being rewritten; try again on the next check.
+                return
+            if changed:
+                self.logger.info("Artifacts changed, reloading")
+                self.reload()
+
+    def query(self, name: str, params: dict) -> dict:
+        state = self.state
+        if name == "callers-of":
+            node_id = self._node_id(state, params)
+            graph = state["graph"]
+            return {"callers": [self._node_json(graph.nodes[i]) for i in graph.caller_list(node_id)]}
+        if name == "endpoints-reaching":
+            node_id = self._node_id(state, params)
+            graph = state["graph"]
+            endpoints = []
+            for handler_id in sorted(state["condensed_graph"].handlers_reachable_from(node_id)):
+                endpoint = state["creator"].endpoint_for_handler(graph.nodes[handler_id])
+                if endpoint is not None and endpoint.model_dump() not in endpoints:
+                    endpoints.append(endpoint.model_dump())
+            return {"endpoints": endpoints}
+        if name == "errors-of-endpoint":
+            error_sites = state["matrix"].errors_of_endpoint(
+                params.get("module_name", ""), params.get("operation_id", "")
+            )
+            error_details = state["creator"].error_details
+            return {
+                "errors": [
+                    {**self._node_json(site), **error_details.get(site, {})}
+                    for site in error_sites
+                ]
+            }
+        if name == "path-between":
+            source = self._node_id(state, params, prefix="from_")
+            target = self._node_id(state, params, prefix="to_")
+            path = self._shortest_caller_path(state["graph"], source, target)
+            return {"path": [self._node_json(state["graph"].nodes[i]) for i in path]}
+        raise ValueError(f"Unknown query: {name} (expected one of {', '.join(self.QUERIES)})")
+
+    @classmethod
+    def _node_id(cls, state: dict, params: dict, prefix: str = "") -> int:
+        node = (
+            params.get(f"{prefix}file_path", ""),
+            params.get(f"{prefix}class_name", ""),
+            params.get(f"{prefix}function_name"),
+        )
+        node_id = state["graph"].node_id(node)
+        if node_id is None:
+            raise KeyError(f"Unknown node: {node}")
+        return node_id
+
+    @classmethod
+    def _node_json(cls, node: tuple) -> dict:
+        return {"file_path": node[0], "class_name": node[1], "function_name": node[2]}
+
+    @classmethod
+    def _shortest_caller_path(cls, graph, source: int, target: int) -> list[int]:
+        """Shortest chain of callers from source up to target, or [] if there is none."""
+        parents = {source: None}
+        queue = deque([source])
+        while queue:
+            node_id = queue.popleft()
+            if node_id == target:
+                path = []
+                while node_id is not None:
+                    path.append(node_id)
+                    node_id = parents[node_id]
+                return path[::-1]
+            for caller_id in graph.caller_list(node_id):
+                if caller_id not in parents:
+                    parents[caller_id] = node_id
+                    queue.append(caller_id)
+        return []
+
+    def handle(self, name: str, params: dict) -> tuple[int, dict]:
+        try:
+            self.reload_if_changed()
+        except Exception as e:
+            # The state is only swapped in once it is complete, so the previous
+            # artifacts keep being served and the reload is retried on the next check.
+            self.logger.exception("Reloading artifacts failed")
+            return 503, {"error": f"Reloading artifacts failed: {e}"}
+        try:
+            return 200, self.query(name, params)
+        except KeyError as e:
+            return 404, {"error": str(e.args[0])}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+
+
+class CallGraphHttpHandler(BaseHTTPRequestHandler):
+    """GET /<query>?file_path=...&class_name=...&function_name=..."""
+
+    service: CallGraphQueryService = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        status, body = self.service.handle(url.path.strip("/"), params)
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        self.service.logger.debug(format % args)
+
+
+class CallGraphSocketHandler(socketserver.StreamRequestHandler):
+    """One JSON object per line: {"query": "callers-of", "file_path": ..., ...}."""
+
+    service: CallGraphQueryService = None
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                params = json.loads(line)
+                status, body = self.service.handle(params.pop("query", ""), params)
+            except json.JSONDecodeError as e:
+                status, body = 400, {"error": f"Invalid JSON: {e}"}
+            body["status"] = status
+            self.wfile.write(json.dumps(body, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve call graph queries over localhost HTTP or a Unix socket."
+    )
+    parser.add_argument("--reference-csv", default="clubjt_reference_result.csv")
+    parser.add_argument("--start-points-csv", default="clubjt_error_result.csv")
+    parser.add_argument("--fastapi-endpoints-csv", default="fastapi_endpoints.csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--unix-socket", default=None, help="Listen on this Unix socket instead of HTTP"
+    )
+    parser.add_argument(
+        "--check-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between artifact change checks",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    service = CallGraphQueryService(
+        args.reference_csv,
+        args.start_points_csv,
+        args.fastapi_endpoints_csv,
+        check_interval=args.check_interval,
+    )
+    if args.unix_socket:
+        if os.path.exists(args.unix_socket):
+            os.unlink(args.unix_socket)
+        CallGraphSocketHandler.service = service
+        server = ThreadingUnixServer(args.unix_socket, CallGraphSocketHandler)
+        service.logger.info(f"Listening on {args.unix_socket}")
+    else:
+        CallGraphHttpHandler.service = service
+        server = ThreadingHTTPServer((args.host, args.port), CallGraphHttpHandler)
+        service.logger.info(f"Listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.unlink(args.unix_socket)
+
+
+if __name__ == "__main__":
+    main()
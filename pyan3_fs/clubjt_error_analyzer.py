@@ -1,8 +1,17 @@
 import os
+import ast
 import csv
 import logging
+import argparse
+import time
 import astroid
 from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+
+from pyan3_fs.analysis_cache import AnalysisCache
+from pyan3_fs.exception_hierarchy import ExceptionHierarchyIndex
+from pyan3_fs.raise_site_extractor import AstroidRequired, RaiseSiteExtractor
+from pyan3_fs.run_profiler import RunProfiler
 
 
 class ClubjtErrorAnalyzer:
@@ -19,10 +28,42 @@ class ClubjtErrorAnalyzer:
     OUTPUT_FILE = "clubjt_error_result.csv"
 
     def __init__(
-        self, project_path: str = PROJECT_PATH, target_module: str = TARGET_MODULE
+        self,
+        project_path: str = PROJECT_PATH,
+        target_module: str = TARGET_MODULE,
+        cache_dir: str | None = None,
+        profile_report: str | None = None,
+        workers: int = 1,
+        fast_path: bool = True,
+        use_hierarchy: bool = True,
     ) -> None:
         self.project_path = project_path
         self.target_module = target_module
+        self.profile_report = profile_report
+        self.workers = max(1, workers)
+        # Raise sites are found with the stdlib ast module; astroid is only
+        # used for files the fast path cannot render exactly.
+        self.fast_path = fast_path
+        self.raise_extractor = RaiseSiteExtractor(self.TARGET_ERRORS) if fast_path else None
+        # Subclasses and aliased imports of TARGET_ERRORS are matched through
+        # a project-wide class hierarchy index, built by analyze_project.
+        self.use_hierarchy = use_hierarchy
+        self.hierarchy = None
+        self.cache_dir = cache_dir
+        self.profiler = RunProfiler("clubjt_error_analyzer")
+        self.cache = None
+        if cache_dir:
+            # Raise sites depend on the file's own syntax and on the error
+            # class hierarchy, whose digest is added to the config once built.
+            self.cache = AnalysisCache(
+                cache_dir,
+                "clubjt_error",
+                {
+                    "project_path": os.path.abspath(project_path),
+                    "target_module": target_module,
+                    "target_errors": self.TARGET_ERRORS,
+                },
+            )
         self.setup_logging()
 
     @classmethod
@@ -33,75 +74,285 @@ class ClubjtErrorAnalyzer:
 
     def execute(self) -> None:
         try:
-            results = self.analyze_project()
-            self.write_results_to_csv(results)
+            with self.profiler.phase("analyze_project"):
+                results = self.analyze_project()
+            with self.profiler.phase("write_results"):
+                self.write_results_to_csv(results)
             logging.info(f"Analysis completed. Results written to {self.OUTPUT_FILE}")
         except Exception as e:
             logging.error(f"An error occurred during execution: {str(e)}")
+        finally:
+            if self.profile_report:
+                self.profiler.write_report(self.profile_report)
 
     def analyze_project(self) -> list[dict]:
         results = []
         try:
-            for root, _, files in os.walk(
-                os.path.join(self.project_path, self.target_module)
-            ):
-                for file in files:
-                    if file.endswith(".py"):
-                        file_path = os.path.join(root, file)
-                        results.extend(self.analyze_file(file_path))
+            file_paths = self.get_python_files()
+            if self.use_hierarchy:
+                with self.profiler.phase("build_hierarchy"):
+                    self.build_hierarchy(file_paths)
+            if self.cache:
+                self.cache.load()
+            for file_results in self._iter_file_results(file_paths):
+                results.extend(file_results)
+            if self.cache:
+                self.cache.prune(
+                    {os.path.relpath(file_path, self.project_path) for file_path in file_paths}
+                )
+                self.cache.save()
         except Exception as e:
             logging.error(f"Error analyzing project: {str(e)}")
         return results
 
+    def build_hierarchy(self, file_paths: list[str]) -> None:
+        cache = None
+        if self.cache_dir:
+            cache = AnalysisCache(
+                self.cache_dir,
+                "exception_hierarchy",
+                {
+                    "project_path": os.path.abspath(self.project_path),
+                    "version": ExceptionHierarchyIndex.VERSION,
+                },
+            )
+            cache.load()
+        hierarchy = ExceptionHierarchyIndex.build(
+            self.project_path, file_paths, self.TARGET_ERRORS, cache
+        )
+        if cache:
+            cache.save()
+        self.set_hierarchy(hierarchy)
+        logging.info(
+            f"{len(hierarchy.error_classes)} of {len(hierarchy.classes)} classes "
+            "derive from the target errors"
+        )
+
+    def set_hierarchy(self, hierarchy: ExceptionHierarchyIndex) -> None:
+        self.hierarchy = hierarchy
+        if self.fast_path:
+            self.raise_extractor = RaiseSiteExtractor(self.TARGET_ERRORS, hierarchy)
+        if self.cache:
+            self.cache.config["error_classes"] = hierarchy.digest()
+
+    def get_python_files(self) -> list[str]:
+        # Sorted so that the output order does not depend on the file system
+        # or on the number of workers.
+        file_paths = []
+        for root, _, files in os.walk(os.path.join(self.project_path, self.target_module)):
+            for file in files:
+                if file.endswith(".py"):
+                    file_paths.append(os.path.join(root, file))
+        return sorted(file_paths)
+
+    def _iter_file_results(self, file_paths: list[str]):
+        """Yields the raise sites of each file, in the order of file_paths."""
+        pending = file_paths
+        cached = {}
+        digests = {}
+        if self.cache:
+            pending = []
+            for file_path in file_paths:
+                digest = AnalysisCache.file_hash(file_path)
+                entry = self.cache.get(os.path.relpath(file_path, self.project_path), digest)
+                if entry is not None:
+                    cached[file_path] = [dict(result) for result in entry["raise_sites"]]
+                else:
+                    pending.append(file_path)
+                    digests[file_path] = digest
+
+        if self.workers == 1 or len(pending) < 2:
+            analyzed = (self.analyze_file(file_path) for file_path in pending)
+            yield from self._merge_file_results(file_paths, analyzed, cached, digests)
+            return
+
+        logging.info(f"Analyzing {len(pending)} files with {self.workers} processes")
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.project_path, self.target_module, self.fast_path, self.hierarchy),
+        ) as executor:
+            analyzed = self._merge_worker_profiles(
+                executor.map(
+                    _analyze_file_task,
+                    pending,
+                    chunksize=max(1, len(pending) // (self.workers * 16)),
+                )
+            )
+            yield from self._merge_file_results(file_paths, analyzed, cached, digests)
+
+    def _merge_worker_profiles(self, task_results):
+        for results, profile in task_results:
+            self.profiler.merge_partial(profile)
+            yield results
+
+    def _merge_file_results(self, file_paths, analyzed, cached, digests):
+        # executor.map returns results in submission order, so the analyzed
+        # files are consumed in path order alongside the cached ones.
+        for file_path in file_paths:
+            if file_path in cached:
+                yield cached[file_path]
+                continue
+            results = next(analyzed)
+            if self.cache:
+                self._store_cached(file_path, digests[file_path], results)
+            yield results
+
+    def _store_cached(self, file_path: str, digest: str, results: list[dict]) -> None:
+        self.cache.put(
+            os.path.relpath(file_path, self.project_path),
+            digest,
+            {"raise_sites": [dict(result) for result in results]},
+        )
+
     def analyze_file(self, file_path: str) -> list[dict]:
         results = []
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            module = astroid.parse(content, path=file_path)
-            for node in module.nodes_of_class(astroid.Raise):
-                if isinstance(node.exc, astroid.Call):
-                    error_class = node.exc.func
-                    if isinstance(error_class, astroid.Attribute):
-                        error_class = error_class.attrname
-                    elif isinstance(error_class, astroid.Name):
-                        error_class = error_class.name
-
-                    if error_class in self.TARGET_ERRORS:
-                        result = self.extract_error_info(node, file_path)
-                        if result:
-                            results.append(result)
+            with open(file_path, "rb") as f:
+                source = f.read()
+
+            started = time.perf_counter()
+            relative_path = os.path.relpath(file_path, self.project_path)
+            if self.raise_extractor and not self.raise_extractor.may_raise_target(source):
+                self.profiler.record_file(
+                    relative_path,
+                    parse_seconds=0,
+                    analyze_seconds=time.perf_counter() - started,
+                    raise_sites=0,
+                    prefiltered=1,
+                )
+                return results
+
+            # Same newline handling as reading the file in text mode.
+            content = source.decode("utf-8")
+            if "\r" in content:
+                content = content.replace("\r\n", "\n").replace("\r", "\n")
+            sites = None
+            if self.raise_extractor:
+                try:
+                    module = ast.parse(content, filename=file_path)
+                    parsed = time.perf_counter()
+                    sites = self.raise_extractor.extract(
+                        module, ExceptionHierarchyIndex.module_qname(relative_path)
+                    )
+                except (SyntaxError, ValueError, AstroidRequired):
+                    # astroid reports syntax errors itself and renders the rest.
+                    sites = None
+            if sites is not None:
+                for class_name, function_name, error_class_name, target_error, error_args in sites:
+                    results.append(
+                        self.build_result(
+                            relative_path,
+                            class_name,
+                            function_name,
+                            error_class_name,
+                            error_args,
+                            target_error,
+                        )
+                    )
+            else:
+                started = time.perf_counter()
+                module = astroid.parse(content, path=file_path)
+                parsed = time.perf_counter()
+                for node in module.nodes_of_class(astroid.Raise):
+                    result = self.analyze_raise(node, file_path)
+                    if result:
+                        results.append(result)
+            self.profiler.record_file(
+                relative_path,
+                parse_seconds=parsed - started,
+                analyze_seconds=time.perf_counter() - parsed,
+                raise_sites=len(results),
+                astroid_fallback=int(self.raise_extractor is not None and sites is None),
+            )
         except Exception as e:
             logging.error(f"Error analyzing file {file_path}: {str(e)}")
         return results
 
-    def extract_error_info(self, node: astroid.Raise, file_path: str) -> dict:
-        try:
-            class_name = self.get_class_name(node)
-            function_name = self.get_function_name(node)
-            error_class_name = self.get_error_class_name(node.exc)
-            status_code, detail_code, reason, message = self.get_error_args(node.exc)
-            relative_path = os.path.relpath(file_path, self.project_path)
+    def analyze_raise(self, node: astroid.Raise, file_path: str) -> dict:
+        """Returns the raise site row of node, or {} if it does not raise a target error."""
+        if isinstance(node.exc, astroid.Call):
+            matched = self.match_error_class(node.exc.func, file_path)
+            if matched:
+                return self.extract_error_info(node, file_path, *matched)
+        return {}
 
-            result = {
-                "file_path": relative_path,
-                "class_name": class_name,
-                "function_name": function_name,
-                "error_class_name": error_class_name,
-                "status_code": status_code,
-                "reason": reason,
-                "message": message or self.COMMON_ERROR_MESSAGE,
-            }
+    def match_error_class(self, func: astroid.NodeNG, file_path: str) -> tuple[str, str] | None:
+        """(error class name, target error) of a raised call's func, or None."""
+        if self.hierarchy is None:
+            error_class = func
+            if isinstance(error_class, astroid.Attribute):
+                error_class = error_class.attrname
+            elif isinstance(error_class, astroid.Name):
+                error_class = error_class.name
 
-            if error_class_name == "ClubjtModuleError":
-                result["detail_code"] = detail_code
+            if error_class in self.TARGET_ERRORS:
+                return error_class, error_class
+            return None
+        dotted = self.get_dotted_name(func)
+        if dotted is None:
+            return None
+        module_name = ExceptionHierarchyIndex.module_qname(
+            os.path.relpath(file_path, self.project_path)
+        )
+        return self.hierarchy.match(module_name, dotted)
+
+    @classmethod
+    def get_dotted_name(cls, node: astroid.NodeNG) -> str | None:
+        if isinstance(node, astroid.Name):
+            return node.name
+        elif isinstance(node, astroid.Attribute):
+            expr = cls.get_dotted_name(node.expr)
+            return f"{expr}.{node.attrname}" if expr else None
+        return None
 
-            return result
+    def extract_error_info(
+        self,
+        node: astroid.Raise,
+        file_path: str,
+        error_class_name: str | None = None,
+        target_error: str | None = None,
+    ) -> dict:
+        try:
+            error_class_name = error_class_name or self.get_error_class_name(node.exc)
+            return self.build_result(
+                os.path.relpath(file_path, self.project_path),
+                self.get_class_name(node),
+                self.get_function_name(node),
+                error_class_name,
+                self.get_error_args(node.exc, target_error),
+                target_error,
+            )
         except Exception as e:
             logging.error(f"Error extracting error info: {str(e)}")
             return {}
 
+    @classmethod
+    def build_result(
+        cls,
+        relative_path: str,
+        class_name: str | None,
+        function_name: str | None,
+        error_class_name: str,
+        error_args: tuple[str | None, str | None, str | None, str | None],
+        target_error: str | None = None,
+    ) -> dict:
+        status_code, detail_code, reason, message = error_args
+        result = {
+            "file_path": relative_path,
+            "class_name": class_name,
+            "function_name": function_name,
+            "error_class_name": error_class_name,
+            "status_code": status_code,
+            "reason": reason,
+            "message": message or cls.COMMON_ERROR_MESSAGE,
+        }
+
+        if (target_error or error_class_name) == "ClubjtModuleError":
+            result["detail_code"] = detail_code
+
+        return result
+
     @classmethod
     def get_class_name(cls, node: astroid.Raise) -> str | None:
         parent = node.parent
@@ -130,12 +381,16 @@ class ClubjtErrorAnalyzer:
 
     @classmethod
     def get_error_args(
-        cls, exc_node: astroid.Call
+        cls, exc_node: astroid.Call, target_error: str | None = None
     ) -> tuple[str | None, str | None, str | None, str | None]:
         status_code = None
         detail_code = None
         reason = None
         message = None
+        # Subclasses of ClubjtModuleError take the same arguments.
+        is_module_error = (
+            target_error or cls.get_error_class_name(exc_node)
+        ) == "ClubjtModuleError"
 
         def extract_value(node: astroid.NodeNG) -> str | None:
             if isinstance(node, astroid.Const):
@@ -151,15 +406,15 @@ class ClubjtErrorAnalyzer:
             value = extract_value(arg)
             if idx == 0:
                 status_code = value
-            elif idx == 1 and cls.get_error_class_name(exc_node) == "ClubjtModuleError":
+            elif idx == 1 and is_module_error:
                 detail_code = value
-            elif idx == 1 and cls.get_error_class_name(exc_node) != "ClubjtModuleError":
+            elif idx == 1 and not is_module_error:
                 reason = value
-            elif idx == 2 and cls.get_error_class_name(exc_node) == "ClubjtModuleError":
+            elif idx == 2 and is_module_error:
                 reason = value
-            elif idx == 2 and cls.get_error_class_name(exc_node) != "ClubjtModuleError":
+            elif idx == 2 and not is_module_error:
                 message = value
-            elif idx == 3 and cls.get_error_class_name(exc_node) == "ClubjtModuleError":
+            elif idx == 3 and is_module_error:
                 message = value
 
         # Process keyword arguments
@@ -224,6 +479,58 @@ class ClubjtErrorAnalyzer:
             logging.error(f"Error writing results to CSV: {str(e)}")
 
 
+_worker_analyzer = None
+
+
+def _init_worker(
+    project_path: str,
+    target_module: str,
+    fast_path: bool,
+    hierarchy: ExceptionHierarchyIndex | None,
+) -> None:
+    global _worker_analyzer
+    _worker_analyzer = ClubjtErrorAnalyzer(project_path, target_module, fast_path=fast_path)
+    if hierarchy is not None:
+        _worker_analyzer.set_hierarchy(hierarchy)
+
+
+def _analyze_file_task(file_path: str) -> tuple[list[dict], dict]:
+    # analyze_file logs and skips a broken file, so one file cannot fail the pool.
+    _worker_analyzer.profiler.reset_files()
+    results = _worker_analyzer.analyze_file(file_path)
+    return results, _worker_analyzer.profiler.export_partial()
+
+
 if __name__ == "__main__":
-    analyzer = ClubjtErrorAnalyzer()
+    parser = argparse.ArgumentParser(description="Extract ClubjtError raise sites.")
+    parser.add_argument("--project-path", default=ClubjtErrorAnalyzer.PROJECT_PATH)
+    parser.add_argument("--target-module", default=ClubjtErrorAnalyzer.TARGET_MODULE)
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--profile-report", default=None)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Number of processes (1 runs serially)"
+    )
+    parser.add_argument(
+        "--no-fast-path",
+        dest="fast_path",
+        action="store_false",
+        help="Parse every file with astroid instead of the ast prefilter and extractor",
+    )
+    parser.add_argument(
+        "--no-hierarchy",
+        dest="use_hierarchy",
+        action="store_false",
+        help="Match raises by bare class name only, ignoring subclasses and aliases",
+    )
+    args = parser.parse_args()
+
+    analyzer = ClubjtErrorAnalyzer(
+        args.project_path,
+        args.target_module,
+        args.cache_dir,
+        args.profile_report,
+        workers=args.workers,
+        fast_path=args.fast_path,
+        use_hierarchy=args.use_hierarchy,
+    )
     analyzer.execute()
@@ -0,0 +1,122 @@
+import sys
+
+import numpy as np
+
+
+class CompactCallGraph:
+    """Callee -> callers graph stored as an interned node table plus CSR arrays.
+
+    Node ids follow the sort order of the node tuples, so the callers of a node
+    (targets[offsets[i]:offsets[i + 1]]) are already in the order that sorting
+    the tuples would give, and traversals never re-sort adjacency lists.
+    Looking up a node never inserts anything into the graph.
+    """
+
+    HANDLER_SUFFIX = "_handler.py"
+
+    def __init__(
+        self, nodes: list[tuple], offsets: np.ndarray, targets: np.ndarray
+    ) -> None:
+        self.nodes = nodes
+        self.node_ids = {node: node_id for node_id, node in enumerate(nodes)}
+        self.offsets = offsets
+        self.targets = targets
+        self.is_handler = self._file_flags(self.HANDLER_SUFFIX)
+        self.has_callers = np.diff(offsets) > 0
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    @classmethod
+    def sort_key(cls, node: tuple) -> tuple:
+        # Function names are NULL for class references; order them first.
+        return (node[0], node[1], node[2] is not None, node[2] or "")
+
+    @classmethod
+    def intern_node(cls, file_path, class_name, function_name) -> tuple:
+        return (
+            sys.intern(file_path),
+            sys.intern(class_name or ""),
+            sys.intern(function_name) if function_name is not None else None,
+        )
+
+    @classmethod
+    def from_edges(cls, edges, extra_nodes=()) -> "CompactCallGraph":
+        """Builds the graph from (called, caller) node tuple pairs.
+
+        extra_nodes are added even when they have no edges, e.g. start points.
+        """
+        node_ids = {}
+        called_ids = []
+        caller_ids = []
+        for called, caller in edges:
+            called_ids.append(node_ids.setdefault(called, len(node_ids)))
+            caller_ids.append(node_ids.setdefault(caller, len(node_ids)))
+        for node in extra_nodes:
+            node_ids.setdefault(node, len(node_ids))
+        return cls.from_id_arrays(
+            list(node_ids),
+            np.asarray(called_ids, dtype=np.int64),
+            np.asarray(caller_ids, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_id_arrays(
+        cls, nodes: list[tuple], called_ids: np.ndarray, caller_ids: np.ndarray
+    ) -> "CompactCallGraph":
+        """Builds the graph from edges given as ids into an unsorted node table."""
+        order = sorted(range(len(nodes)), key=lambda node_id: cls.sort_key(nodes[node_id]))
+        rank = np.empty(len(nodes), dtype=np.int64)
+        rank[order] = np.arange(len(nodes), dtype=np.int64)
+        sorted_nodes = [nodes[node_id] for node_id in order]
+        return cls.from_sorted_id_arrays(sorted_nodes, rank[called_ids], rank[caller_ids])
+
+    @classmethod
+    def from_sorted_id_arrays(
+        cls, nodes: list[tuple], called_ids: np.ndarray, caller_ids: np.ndarray
+    ) -> "CompactCallGraph":
+        """Builds the graph from edges given as ids into a node table already in sort_key order."""
+        node_count = max(len(nodes), 1)
+        keys = np.unique(
+            np.asarray(called_ids, dtype=np.int64) * node_count
+            + np.asarray(caller_ids, dtype=np.int64)
+        )
+        called = keys // node_count
+        offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(called, minlength=len(nodes)), out=offsets[1:])
+        targets = (keys % node_count).astype(np.int32)
+        return cls(nodes, offsets, targets)
+
+    def _file_flags(self, suffix: str) -> np.ndarray:
+        if not self.nodes:
+            return np.zeros(0, dtype=bool)
+        files, inverse = np.unique(
+            np.array([node[0] for node in self.nodes], dtype=object), return_inverse=True
+        )
+        return np.char.endswith(files.astype(str), suffix)[inverse]
+
+    def node_id(self, node: tuple) -> int | None:
+        return self.node_ids.get(node)
+
+    def callers(self, node_id: int) -> np.ndarray:
+        return self.targets[self.offsets[node_id] : self.offsets[node_id + 1]]
+
+    def caller_list(self, node_id: int) -> list[int]:
+        return self.targets[self.offsets[node_id] : self.offsets[node_id + 1]].tolist()
+
+    def edge_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the (called_ids, caller_ids) arrays of all edges."""
+        called = np.repeat(np.arange(len(self.nodes), dtype=np.int64), np.diff(self.offsets))
+        return called, self.targets.astype(np.int64)
+
+    def callee_csr(self) -> tuple[np.ndarray, np.ndarray]:
+        """Returns CSR (offsets, targets) arrays of the forward caller -> callees direction."""
+        called, callers = self.edge_arrays()
+        order = np.argsort(callers, kind="stable")
+        offsets = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(callers, minlength=len(self.nodes)), out=offsets[1:])
+        return offsets, called[order].astype(np.int32)
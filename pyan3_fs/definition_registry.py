@@ -0,0 +1,84 @@
+import sys
+from collections import defaultdict
+
+
+class Definition:
+    """クラス・関数・メソッドの定義を表す軽量レコード。"""
+
+    __slots__ = ("file_path", "class_name", "function_name", "qname", "node")
+
+    def __init__(self, file_path, class_name, function_name, qname, node=None):
+        self.file_path = sys.intern(file_path)
+        self.class_name = sys.intern(class_name) if class_name else None
+        self.function_name = sys.intern(function_name) if function_name else None
+        self.qname = sys.intern(qname)
+        self.node = node
+
+    def __getstate__(self):
+        # astroid のノードはプロセス間で受け渡さない
+        return (self.file_path, self.class_name, self.function_name, self.qname)
+
+    def __setstate__(self, state):
+        file_path, class_name, function_name, qname = state
+        self.__init__(file_path, class_name, function_name, qname)
+
+    def __repr__(self):
+        return (
+            f"Definition(file_path={self.file_path!r}, class_name={self.class_name!r}, "
+            f"function_name={self.function_name!r}, qname={self.qname!r})"
+        )
+
+
+class DefinitionRegistry:
+    """qname・ファイル・クラス名で索引付けされた定義の登録簿。"""
+
+    def __init__(self):
+        self._by_qname = {}
+        self._by_file = defaultdict(list)
+        self._by_class = defaultdict(list)
+        self._qnames = None
+
+    def __len__(self):
+        return len(self._by_qname)
+
+    def __iter__(self):
+        return iter(self._by_qname.values())
+
+    def __contains__(self, qname):
+        return qname in self._by_qname
+
+    def add(self, file_path, class_name, function_name, qname, node=None):
+        # 同じ qname が複数回見つかった場合は最初に登録された定義を優先する
+        if qname in self._by_qname:
+            return self._by_qname[qname]
+        return self.register(Definition(file_path, class_name, function_name, qname, node))
+
+    def register(self, definition):
+        if definition.qname in self._by_qname:
+            return self._by_qname[definition.qname]
+        self._by_qname[definition.qname] = definition
+        self._by_file[definition.file_path].append(definition)
+        if definition.class_name:
+            self._by_class[definition.class_name].append(definition)
+        self._qnames = None
+        return definition
+
+    def get(self, qname):
+        return self._by_qname.get(qname)
+
+    def by_file(self, file_path):
+        return self._by_file.get(file_path, [])
+
+    def by_class(self, class_name):
+        return self._by_class.get(class_name, [])
+
+    @property
+    def qnames(self):
+        if self._qnames is None:
+            self._qnames = frozenset(self._by_qname)
+        return self._qnames
+
+    def release_nodes(self):
+        # 抽出完了後は astroid のツリーを GC できるようにノード参照を外す
+        for definition in self._by_qname.values():
+            definition.node = None
@@ -0,0 +1,170 @@
+import os
+
+import duckdb
+import numpy as np
+
+from pyan3_fs.reference_sink import insert_arrays
+
+
+class EdgeStoreWriter:
+    """参照を辞書エンコードしたノード表と整数の辺表として書き出すライター。
+
+    nodes(node_id, file_path, class_name, function_name) と
+    edges(called_id, caller_id) の 2 表を、永続化した DuckDB ファイル
+    (fmt="duckdb") またはディレクトリ内の Parquet ファイル (fmt="parquet")
+    に出力します。空文字は CSV を読み込んだときと同じく NULL として保存します。
+    """
+
+    def __init__(self, path: str, fmt: str = "duckdb") -> None:
+        self.path = path
+        self.fmt = fmt
+        self.node_ids: dict[tuple, int] = {}
+        if fmt == "parquet":
+            os.makedirs(path, exist_ok=True)
+            self.conn = duckdb.connect(":memory:")
+        else:
+            self.conn = duckdb.connect(path)
+        EdgeStore.create_tables(self.conn)
+
+    def write_batch(self, rows: list[tuple]) -> None:
+        if not rows:
+            return
+        new_nodes = []
+        called_ids = []
+        caller_ids = []
+        for row in rows:
+            called_ids.append(self._node_id(row[0:3], new_nodes))
+            caller_ids.append(self._node_id(row[3:6], new_nodes))
+        # executemany は 1 行ずつ INSERT するため、列ごとの配列でまとめて取り込む
+        if new_nodes:
+            node_columns = list(zip(*new_nodes))
+            insert_arrays(
+                self.conn,
+                "nodes",
+                [np.asarray(node_columns[0], dtype=np.int64)]
+                + [
+                    np.array([value or "" for value in column], dtype=str)
+                    for column in node_columns[1:]
+                ],
+            )
+        insert_arrays(
+            self.conn,
+            "edges",
+            [np.asarray(called_ids, dtype=np.int64), np.asarray(caller_ids, dtype=np.int64)],
+        )
+
+    def _node_id(self, node: tuple, new_nodes: list[tuple]) -> int:
+        node_id = self.node_ids.get(node)
+        if node_id is None:
+            node_id = len(self.node_ids)
+            self.node_ids[node] = node_id
+            new_nodes.append((node_id, *node))
+        return node_id
+
+    def close(self) -> None:
+        try:
+            if self.fmt == "parquet":
+                for table_name in ("nodes", "edges"):
+                    target = os.path.join(self.path, f"{table_name}.parquet")
+                    self.conn.execute(
+                        f"COPY {table_name} TO '{target}' (FORMAT PARQUET, COMPRESSION ZSTD)"
+                    )
+        finally:
+            self.conn.close()
+
+
+class EdgeStore:
+    """ノード表・辺表形式の参照データを扱うためのユーティリティ。"""
+
+    # DuckDB のデータベースファイルは先頭 8 バイトの後にこのマジックを持つ
+    DUCKDB_MAGIC = b"DUCK"
+
+    @classmethod
+    def create_tables(cls, conn: duckdb.DuckDBPyConnection) -> None:
+        conn.execute("DROP TABLE IF EXISTS edges")
+        conn.execute("DROP TABLE IF EXISTS nodes")
+        conn.execute(
+            """
+            CREATE TABLE nodes (
+                node_id INTEGER,
+                file_path VARCHAR,
+                class_name VARCHAR,
+                function_name VARCHAR
+            )
+        """
+        )
+        conn.execute("CREATE TABLE edges (called_id INTEGER, caller_id INTEGER)")
+
+    @classmethod
+    def detect_format(cls, path: str) -> str:
+        """参照データのパスから形式 (csv / duckdb / parquet) を判定します。
+
+        DuckDB ファイルは拡張子ではなくファイル先頭のマジックで判定するため、
+        任意のパスに出力したものも読み込めます。
+        """
+        if os.path.isdir(path):
+            return "parquet"
+        try:
+            with open(path, "rb") as f:
+                header = f.read(12)
+        except OSError:
+            return "csv"
+        if header[8:12] == cls.DUCKDB_MAGIC:
+            return "duckdb"
+        return "csv"
+
+    @classmethod
+    def attach_tables(cls, conn: duckdb.DuckDBPyConnection, path: str) -> tuple[str, str] | None:
+        """ノード表・辺表を参照する SQL 上の名前 (nodes, edges) を返します。
+
+        DuckDB ファイルは edge_store として READ_ONLY でアタッチします。
+        ref_table しか持たない DuckDB ファイルの場合は None を返します。
+        """
+        if cls.detect_format(path) == "parquet":
+            return (
+                f"read_parquet('{os.path.join(path, 'nodes.parquet')}')",
+                f"read_parquet('{os.path.join(path, 'edges.parquet')}')",
+            )
+        conn.execute(f"ATTACH '{path}' AS edge_store (READ_ONLY)")
+        tables = {
+            row[0]
+            for row in conn.execute(
+                "SELECT table_name FROM duckdb_tables() WHERE database_name = 'edge_store'"
+            ).fetchall()
+        }
+        if "edges" not in tables:
+            return None
+        return "edge_store.nodes", "edge_store.edges"
+
+    @classmethod
+    def detach_tables(cls, conn: duckdb.DuckDBPyConnection, path: str) -> None:
+        if cls.detect_format(path) == "duckdb":
+            conn.execute("DETACH edge_store")
+
+    @classmethod
+    def create_ref_table(
+        cls, conn: duckdb.DuckDBPyConnection, path: str, table_name: str = "ref_table"
+    ) -> None:
+        """ノード表・辺表を結合し、CSV と同じ列構成の ref_table を作成します。"""
+        tables = cls.attach_tables(conn, path)
+        if tables is None:
+            # reference_sink の DuckDBReferenceWriter が出力した ref_table をそのまま使う
+            conn.execute(f"CREATE TABLE {table_name} AS SELECT * FROM edge_store.ref_table")
+        else:
+            nodes, edges = tables
+            conn.execute(
+                f"""
+                CREATE TABLE {table_name} AS
+                SELECT
+                    called.file_path AS called_file_path,
+                    called.class_name AS called_class_name,
+                    called.function_name AS called_function_name,
+                    caller.file_path AS caller_file_path,
+                    caller.class_name AS caller_class_name,
+                    caller.function_name AS caller_function_name
+                FROM {edges} AS e
+                JOIN {nodes} AS called ON called.node_id = e.called_id
+                JOIN {nodes} AS caller ON caller.node_id = e.caller_id
+            """
+            )
+        cls.detach_tables(conn, path)
@@ -0,0 +1,90 @@
+import numpy as np
+
+from pyan3_fs.fastapi_endpoint_datasouce import FastApiEndpoint
+
+
+class EndpointErrorMatrix:
+    """Sparse endpoint x error-site reachability matrix.
+
+    Entry (row, col) means that the error site error_sites[col] can be reached
+    from endpoints[row]. The matrix is stored in COO form sorted by
+    (col, row), i.e. in start point order, and saved as a compressed .npz file.
+    """
+
+    ENDPOINT_FIELDS = ["module_name", "http_method", "path", "operation_id"]
+    ERROR_SITE_FIELDS = ["file_path", "class_name", "function_name"]
+
+    def __init__(
+        self,
+        endpoints: list[FastApiEndpoint],
+        error_sites: list[tuple],
+        rows: np.ndarray,
+        cols: np.ndarray,
+    ) -> None:
+        self.endpoints = endpoints
+        self.error_sites = error_sites
+        order = np.lexsort((rows, cols))
+        self.rows = np.asarray(rows, dtype=np.int32)[order]
+        self.cols = np.asarray(cols, dtype=np.int32)[order]
+        self.endpoint_rows = {}
+        for row, ep in enumerate(endpoints):
+            self.endpoint_rows.setdefault((ep.module_name, ep.operation_id), row)
+        self.error_site_cols = {site: col for col, site in enumerate(error_sites)}
+        self._by_row = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def entries(self):
+        """Yields (endpoint, error_site) pairs in start point order."""
+        for row, col in zip(self.rows.tolist(), self.cols.tolist()):
+            yield self.endpoints[row], self.error_sites[col]
+
+    def errors_of_endpoint(self, module_name: str, operation_id: str) -> list[tuple]:
+        """Error sites that can be raised while serving the endpoint."""
+        row = self.endpoint_rows.get((module_name, operation_id))
+        if row is None:
+            return []
+        if self._by_row is None:
+            order = np.argsort(self.rows, kind="stable")
+            self._by_row = (self.rows[order], self.cols[order])
+        rows, cols = self._by_row
+        start, end = np.searchsorted(rows, [row, row + 1])
+        return [self.error_sites[col] for col in cols[start:end].tolist()]
+
+    def endpoints_of_error(self, error_site: tuple) -> list[FastApiEndpoint]:
+        """Endpoints that share the error site."""
+        col = self.error_site_cols.get(error_site)
+        if col is None:
+            return []
+        start, end = np.searchsorted(self.cols, [col, col + 1])
+        return [self.endpoints[row] for row in self.rows[start:end].tolist()]
+
+    def shared_errors(self, endpoint_a: tuple, endpoint_b: tuple) -> list[tuple]:
+        """Error sites reachable from both (module_name, operation_id) endpoints."""
+        errors_b = set(self.errors_of_endpoint(*endpoint_b))
+        return [site for site in self.errors_of_endpoint(*endpoint_a) if site in errors_b]
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            rows=self.rows,
+            cols=self.cols,
+            endpoints=np.array(
+                [[getattr(ep, field) for field in self.ENDPOINT_FIELDS] for ep in self.endpoints],
+                dtype=str,
+            ).reshape(-1, len(self.ENDPOINT_FIELDS)),
+            error_sites=np.array(
+                [[value or "" for value in site] for site in self.error_sites], dtype=str
+            ).reshape(-1, len(self.ERROR_SITE_FIELDS)),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "EndpointErrorMatrix":
+        with np.load(path) as data:
+            endpoints = [
+                FastApiEndpoint(**dict(zip(cls.ENDPOINT_FIELDS, values)))
+                for values in data["endpoints"].tolist()
+            ]
+            error_sites = [tuple(values) for values in data["error_sites"].tolist()]
+            return cls(endpoints, error_sites, data["rows"], data["cols"])
@@ -0,0 +1,219 @@
+import ast
+import hashlib
+import json
+import logging
+import os
+
+from pyan3_fs.analysis_cache import AnalysisCache
+
+
+class ExceptionHierarchyIndex:
+    """Project-wide index of the classes that derive from the target errors.
+
+    Every module of the project is scanned once with the stdlib ast module
+    for its imports (local name -> dotted name) and its class definitions
+    with their base class expressions. Bases are resolved through the
+    imports, including package re-exports, and each class that transitively
+    derives from one of the target errors is mapped to the nearest target
+    error it derives from. Matching a raise is then a few dict lookups.
+
+    The per-file scan results only depend on the file itself, so they are
+    cached by content hash; the hierarchy is re-resolved on every run.
+    """
+
+    VERSION = 1
+    # Re-exports are followed at most this many modules deep.
+    MAX_RESOLVE_DEPTH = 8
+
+    def __init__(self, target_errors: list[str], modules: dict[str, dict]) -> None:
+        self.target_errors = set(target_errors)
+        self.modules = modules
+        self.classes = {
+            f"{module_name}.{class_path}": (module_name, bases)
+            for module_name, module in modules.items()
+            for class_path, bases in module["classes"].items()
+        }
+        self.error_classes = self._resolve_error_classes()
+        self.error_names = sorted(
+            {qname.rsplit(".", 1)[-1] for qname in self.error_classes}
+            | self.target_errors
+            | self._error_aliases()
+        )
+
+    @classmethod
+    def build(
+        cls,
+        project_path: str,
+        file_paths: list[str],
+        target_errors: list[str],
+        cache: AnalysisCache | None = None,
+    ) -> "ExceptionHierarchyIndex":
+        modules = {}
+        for file_path in file_paths:
+            relative_path = os.path.relpath(file_path, project_path)
+            digest = AnalysisCache.file_hash(file_path) if cache else None
+            entry = cache.get(relative_path, digest) if cache else None
+            if entry is None:
+                entry = cls.scan_file(file_path, relative_path)
+                if cache:
+                    cache.put(relative_path, digest, entry)
+            modules[cls.module_qname(relative_path)] = entry
+        if cache:
+            cache.prune({os.path.relpath(file_path, project_path) for file_path in file_paths})
+        return cls(target_errors, modules)
+
+    @classmethod
+    def module_qname(cls, relative_path: str) -> str:
+        parts = os.path.splitext(relative_path)[0].split(os.sep)
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+        return ".".join(parts)
+
+    @classmethod
+    def scan_file(cls, file_path: str, relative_path: str) -> dict:
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                module = ast.parse(f.read(), filename=file_path)
+        except (SyntaxError, ValueError, UnicodeDecodeError, OSError) as e:
+            logging.error(f"Error scanning classes in {file_path}: {e}")
+            return {"names": {}, "classes": {}}
+        is_package = os.path.basename(relative_path) == "__init__.py"
+        return {
+            "names": cls.import_names(module, cls.module_qname(relative_path), is_package),
+            "classes": cls.class_bases(module.body),
+        }
+
+    @classmethod
+    def import_names(cls, module: ast.Module, module_name: str, is_package: bool) -> dict:
+        """Maps the names bound by the module's imports to dotted names."""
+        package = module_name.split(".") if is_package else module_name.split(".")[:-1]
+        names = {}
+        for node in ast.walk(module):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        names[alias.asname] = alias.name
+                    else:
+                        top = alias.name.split(".")[0]
+                        names[top] = top
+            elif isinstance(node, ast.ImportFrom):
+                if node.level:
+                    base = package[: len(package) - node.level + 1]
+                    base = ".".join(base + ([node.module] if node.module else []))
+                else:
+                    base = node.module or ""
+                for alias in node.names:
+                    if alias.name != "*":
+                        names[alias.asname or alias.name] = (
+                            f"{base}.{alias.name}" if base else alias.name
+                        )
+        return names
+
+    @classmethod
+    def class_bases(cls, body: list, prefix: str = "") -> dict:
+        """Maps class paths ("Outer.Inner") of module and class bodies to dotted base names."""
+        classes = {}
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                class_path = f"{prefix}{node.name}"
+                classes[class_path] = [
+                    name for name in (cls.dotted_name(base) for base in node.bases) if name
+                ]
+                classes.update(cls.class_bases(node.body, f"{class_path}."))
+        return classes
+
+    @classmethod
+    def dotted_name(cls, node: ast.expr) -> str | None:
+        if isinstance(node, ast.Name):
+            return node.id
+        if isinstance(node, ast.Attribute):
+            value = cls.dotted_name(node.value)
+            return f"{value}.{node.attr}" if value else None
+        return None
+
+    def resolve(self, module_name: str, dotted: str, depth: int = 0) -> str:
+        """Qualified name that dotted refers to inside module_name."""
+        module = self.modules.get(module_name)
+        if module is not None:
+            first, _, rest = dotted.partition(".")
+            if f"{module_name}.{dotted}" in self.classes:
+                return f"{module_name}.{dotted}"
+            if first in module["names"]:
+                target = module["names"][first]
+                return self.canonical(f"{target}.{rest}" if rest else target, depth + 1)
+        return self.canonical(dotted, depth + 1)
+
+    def canonical(self, qname: str, depth: int = 0) -> str:
+        """Follows re-exports of package and module names to the defining class."""
+        if qname in self.classes or depth > self.MAX_RESOLVE_DEPTH:
+            return qname
+        parts = qname.split(".")
+        for i in range(len(parts) - 1, 0, -1):
+            module_name = ".".join(parts[:i])
+            if module_name in self.modules:
+                name = ".".join(parts[i:])
+                if name.partition(".")[0] in self.modules[module_name]["names"]:
+                    return self.resolve(module_name, name, depth)
+                return qname
+        return qname
+
+    def _resolve_error_classes(self) -> dict[str, str]:
+        targets = {}
+        for qname in self.classes:
+            self._target_of(qname, targets, set())
+        return {qname: target for qname, target in targets.items() if target}
+
+    def _target_of(self, qname: str, targets: dict, visiting: set) -> str | None:
+        if qname in targets:
+            return targets[qname]
+        name = qname.rsplit(".", 1)[-1]
+        if name in self.target_errors:
+            targets[qname] = name
+            return name
+        if qname in visiting:
+            # Inheritance cycle: this path does not lead to a target error.
+            return None
+        visiting.add(qname)
+        target = None
+        module_name, bases = self.classes[qname]
+        for base in bases:
+            base_qname = self.resolve(module_name, base)
+            if base_qname in self.classes:
+                target = self._target_of(base_qname, targets, visiting)
+            else:
+                # A base outside the project, e.g. an error class from a library.
+                base_name = base_qname.rsplit(".", 1)[-1]
+                target = base_name if base_name in self.target_errors else None
+            if target:
+                break
+        visiting.discard(qname)
+        targets[qname] = target
+        return target
+
+    def _error_aliases(self) -> set[str]:
+        # Local names such as "from errors import ClubjtError as BaseErr" that
+        # only show up in the source under their alias.
+        aliases = set()
+        for module in self.modules.values():
+            for name, dotted in module["names"].items():
+                qname = self.canonical(dotted)
+                if qname in self.error_classes or qname.rsplit(".", 1)[-1] in self.target_errors:
+                    aliases.add(name)
+        return aliases
+
+    def match(self, module_name: str, dotted: str) -> tuple[str, str] | None:
+        """(error class name, target error) raised by a call of dotted, or None."""
+        qname = self.resolve(module_name, dotted)
+        target = self.error_classes.get(qname)
+        name = qname.rsplit(".", 1)[-1]
+        if target is None and name in self.target_errors:
+            target = name
+        if target is None:
+            return None
+        return name, target
+
+    def digest(self) -> str:
+        payload = json.dumps(
+            [sorted(self.error_classes.items()), self.error_names], ensure_ascii=False
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,385 @@
+import argparse
+import logging
+import os
+import time
+
+import astroid
+
+from pyan3_fs.call_graph_parser import CallGraphAnalyzer
+from pyan3_fs.clubjt_error_analyzer import ClubjtErrorAnalyzer
+from pyan3_fs.definition_registry import DefinitionRegistry
+from pyan3_fs.operator_parser import TARGET_HANDLER_FILES, OperatorParser
+from pyan3_fs.run_profiler import RunProfiler
+
+
+class FileContext:
+    """The file an extractor is currently looking at."""
+
+    __slots__ = ("file_path", "absolute_path", "module_name", "module")
+
+    def __init__(self, file_path: str, absolute_path: str, module_name: str, module) -> None:
+        self.file_path = file_path
+        self.absolute_path = absolute_path
+        self.module_name = module_name
+        self.module = module
+
+
+class ResultStore:
+    """Rows produced by each extractor, grouped by file in the order files were processed."""
+
+    def __init__(self) -> None:
+        self._file_rows: dict[str, dict[str, list]] = {}
+
+    def add(self, name: str, file_path: str, rows: list) -> None:
+        self._file_rows.setdefault(name, {})[file_path] = rows
+
+    def file_rows(self, name: str) -> dict[str, list]:
+        return self._file_rows.get(name, {})
+
+    def replace(self, name: str, file_rows: dict[str, list]) -> None:
+        self._file_rows[name] = file_rows
+
+    def rows(self, name: str) -> list:
+        return [row for rows in self.file_rows(name).values() for row in rows]
+
+
+class Extractor:
+    """An analysis run by ExtractionEngine on modules it has already parsed.
+
+    begin_file() returns the list that collects the file's rows; visit() is
+    then called for every node of node_classes in preorder. finalize() runs
+    once all files are in the ResultStore, in extractor order, and write()
+    produces the extractor's output file.
+    """
+
+    name = ""
+    node_classes = ()
+
+    def wants_file(self, file_path: str, source: bytes) -> bool:
+        return True
+
+    def begin_file(self, context: FileContext) -> list:
+        return []
+
+    def visit(self, node, context: FileContext, rows: list) -> None:
+        pass
+
+    def finalize(self, store: ResultStore) -> None:
+        pass
+
+    def write(self, store: ResultStore) -> None:
+        pass
+
+
+class RaiseSiteRowExtractor(Extractor):
+    """Raise sites of ClubjtErrorAnalyzer.TARGET_ERRORS, as in clubjt_error_result.csv."""
+
+    name = "raise_sites"
+    node_classes = (astroid.Raise,)
+
+    def __init__(self, project_path: str, target_module: str) -> None:
+        self.analyzer = ClubjtErrorAnalyzer(project_path, target_module)
+        # The class hierarchy needs every module's classes before any raise
+        # can be matched, so it is built up front from the stdlib ast scan.
+        self.analyzer.build_hierarchy(self.analyzer.get_python_files())
+
+    def wants_file(self, file_path: str, source: bytes) -> bool:
+        return self.analyzer.raise_extractor.may_raise_target(source)
+
+    def visit(self, node, context: FileContext, rows: list) -> None:
+        result = self.analyzer.analyze_raise(node, context.absolute_path)
+        if result:
+            rows.append(result)
+
+    def finalize(self, store: ResultStore) -> None:
+        # ClubjtErrorAnalyzer lists raise sites in path order.
+        store.replace(self.name, dict(sorted(store.file_rows(self.name).items())))
+
+    def write(self, store: ResultStore) -> None:
+        self.analyzer.write_results_to_csv(store.rows(self.name))
+
+
+class EndpointExtractor(Extractor):
+    """FastAPI endpoints of the handler files, as in fastapi_endpoints.csv."""
+
+    name = "endpoints"
+
+    def __init__(self, project_path: str, handler_files: list[str]) -> None:
+        self.parser = OperatorParser(project_path, handler_files)
+        self.handler_files = [os.path.normpath(file_path) for file_path in handler_files]
+
+    def wants_file(self, file_path: str, source: bytes) -> bool:
+        return file_path in self.handler_files
+
+    def begin_file(self, context: FileContext) -> list:
+        return OperatorParser.module_endpoints(context.module, context.file_path)
+
+    def finalize(self, store: ResultStore) -> None:
+        # OperatorParser lists endpoints in handler file order.
+        file_rows = store.file_rows(self.name)
+        store.replace(
+            self.name,
+            {
+                file_path: file_rows[file_path]
+                for file_path in self.handler_files
+                if file_path in file_rows
+            },
+        )
+
+    def write(self, store: ResultStore) -> None:
+        endpoints = store.rows(self.name)
+        if endpoints:
+            self.parser.write_to_csv(endpoints)
+
+
+class DefinitionExtractor(Extractor):
+    """Class, function and method definitions, as collected by CallGraphAnalyzer."""
+
+    name = "definitions"
+
+    def __init__(self, analyzer: CallGraphAnalyzer) -> None:
+        self.analyzer = analyzer
+
+    def wants_file(self, file_path: str, source: bytes) -> bool:
+        return _is_reference_file(file_path)
+
+    def begin_file(self, context: FileContext) -> list:
+        definitions = self.analyzer.extract_file_definitions(context.file_path)
+        for definition in definitions:
+            # Only qnames and locations are needed once the file is done.
+            definition.node = None
+        return definitions
+
+
+class ReferenceExtractor(Extractor):
+    """References to project definitions, as in clubjt_reference_result.csv.
+
+    The definitions of files that come later are not known yet while a file
+    is walked, so every reference that resolves into the target module is
+    kept, and finalize() drops those that do not name a collected definition.
+    This is the same rule CallGraphAnalyzer applies to cached references.
+    """
+
+    name = "references"
+    node_classes = CallGraphAnalyzer.REFERENCE_NODE_CLASSES
+
+    def __init__(self, analyzer: CallGraphAnalyzer) -> None:
+        self.analyzer = analyzer
+        self.target_qnames = _TargetModuleQnames(analyzer.target_module)
+        self.inference_memo = {}
+
+    def wants_file(self, file_path: str, source: bytes) -> bool:
+        return _is_reference_file(file_path)
+
+    def begin_file(self, context: FileContext) -> list:
+        self.inference_memo = {}
+        return []
+
+    def visit(self, node, context: FileContext, rows: list) -> None:
+        rows.extend(
+            self.analyzer.collect_node_references(
+                node, self.inference_memo, context.file_path, self.target_qnames
+            )
+        )
+
+    def finalize(self, store: ResultStore) -> None:
+        registry = DefinitionRegistry()
+        for definition in store.rows(DefinitionExtractor.name):
+            registry.register(definition)
+        self.analyzer.definitions = registry
+        store.replace(
+            self.name,
+            {
+                file_path: [hit for hit in hits if hit[0] in registry]
+                for file_path, hits in store.file_rows(self.name).items()
+            },
+        )
+
+    def write(self, store: ResultStore) -> None:
+        self.analyzer.open_sink()
+        try:
+            for file_path, hits in store.file_rows(self.name).items():
+                self.analyzer.add_references(file_path, hits)
+        finally:
+            self.analyzer.close_sink()
+        self.analyzer.log_inference_stats()
+
+
+class _TargetModuleQnames:
+    """Stands in for the definition qnames: any qname inside the target module."""
+
+    def __init__(self, target_module: str) -> None:
+        self.target_module = target_module
+        self.prefix = f"{target_module}."
+
+    def __contains__(self, qname: str) -> bool:
+        return qname == self.target_module or qname.startswith(self.prefix)
+
+
+def _is_reference_file(file_path: str) -> bool:
+    # CallGraphAnalyzer.get_python_files skips 'tests' directories.
+    return "tests" not in file_path.split(os.sep)[:-1]
+
+
+class ExtractionEngine:
+    """Parses each file of the target module once and runs every extractor on it.
+
+    A file is read once; it is parsed with astroid only if some extractor
+    wants it, and a single preorder walk over the module dispatches each node
+    to the extractors registered for its class. Per-file rows go into a
+    ResultStore that the extractors finalize and write at the end.
+    """
+
+    def __init__(
+        self,
+        project_path: str,
+        target_module: str,
+        extractors: list[Extractor],
+        analyzer: CallGraphAnalyzer | None = None,
+        profile_report: str | None = None,
+    ) -> None:
+        self.project_path = os.path.abspath(project_path)
+        self.target_module = target_module
+        self.extractors = extractors
+        self.profile_report = profile_report
+        self.profiler = RunProfiler("extraction_engine")
+        self.store = ResultStore()
+        # Modules are parsed through CallGraphAnalyzer so that module names
+        # and inference match a separate call_graph_parser run, and so that
+        # the definition and reference extractors find the module cached.
+        self.analyzer = analyzer or CallGraphAnalyzer(self.project_path, target_module)
+        self.analyzer.profiler = self.profiler
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def with_all_extractors(
+        cls,
+        project_path: str,
+        target_module: str,
+        handler_files: list[str],
+        profile_report: str | None = None,
+    ) -> "ExtractionEngine":
+        analyzer = CallGraphAnalyzer(project_path, target_module)
+        extractors = [
+            RaiseSiteRowExtractor(project_path, target_module),
+            EndpointExtractor(project_path, handler_files),
+            DefinitionExtractor(analyzer),
+            ReferenceExtractor(analyzer),
+        ]
+        return cls(
+            project_path,
+            target_module,
+            extractors,
+            analyzer=analyzer,
+            profile_report=profile_report,
+        )
+
+    def execute(self) -> ResultStore:
+        try:
+            with self.profiler.phase("extract"):
+                file_paths = self.get_python_files()
+                self.logger.info(
+                    f"Running {len(self.extractors)} extractors over {len(file_paths)} files"
+                )
+                for file_path in file_paths:
+                    self.process_file(file_path)
+            with self.profiler.phase("finalize"):
+                for extractor in self.extractors:
+                    extractor.finalize(self.store)
+            with self.profiler.phase("write"):
+                for extractor in self.extractors:
+                    extractor.write(self.store)
+        finally:
+            if self.profile_report:
+                self.profiler.write_report(self.profile_report)
+        return self.store
+
+    def get_python_files(self) -> list[str]:
+        file_paths = []
+        for root, _, files in os.walk(os.path.join(self.project_path, self.target_module)):
+            for file in files:
+                if file.endswith(".py"):
+                    file_paths.append(os.path.relpath(os.path.join(root, file), self.project_path))
+        return file_paths
+
+    def process_file(self, file_path: str) -> None:
+        absolute_path = os.path.join(self.project_path, file_path)
+        try:
+            with open(absolute_path, "rb") as f:
+                source = f.read()
+        except OSError as e:
+            self.logger.error(f"Error reading file {file_path}: {e}")
+            return
+        active = [
+            extractor for extractor in self.extractors if extractor.wants_file(file_path, source)
+        ]
+        if not active:
+            self.profiler.record_file(file_path, skipped=1)
+            return
+
+        module_name = self.analyzer.get_module_qname(file_path)
+        module = self.analyzer.parse_module(file_path, module_name)
+        if module is None:
+            return
+        started = time.perf_counter()
+        context = FileContext(file_path, absolute_path, module_name, module)
+        file_rows = {}
+        for extractor in active:
+            try:
+                file_rows[extractor.name] = extractor.begin_file(context)
+            except Exception as e:
+                self.logger.error(f"{extractor.name}: error analyzing file {file_path}: {e}")
+        visitors = [
+            extractor
+            for extractor in active
+            if extractor.node_classes and extractor.name in file_rows
+        ]
+        node_classes = tuple(
+            {node_class for extractor in visitors for node_class in extractor.node_classes}
+        )
+        if node_classes:
+            for node in module.nodes_of_class(node_classes):
+                for extractor in visitors:
+                    if isinstance(node, extractor.node_classes):
+                        extractor.visit(node, context, file_rows[extractor.name])
+        for name, rows in file_rows.items():
+            self.store.add(name, file_path, rows)
+        # Every extractor is done with the module.
+        self.analyzer.module_cache.pop(file_path)
+        self.profiler.record_file(
+            file_path,
+            analyze_seconds=time.perf_counter() - started,
+            extractors=len(active),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Parse the target module once and write clubjt_error_result.csv, "
+            "fastapi_endpoints.csv and clubjt_reference_result.csv."
+        )
+    )
+    parser.add_argument("--project-path", default=CallGraphAnalyzer.PROJECT_PATH)
+    parser.add_argument("--target-module", default=CallGraphAnalyzer.TARGET_MODULE)
+    parser.add_argument(
+        "--handler-file",
+        action="append",
+        dest="handler_files",
+        default=None,
+        help="Handler file relative to the project path (repeatable)",
+    )
+    parser.add_argument("--profile-report", default=None)
+    args = parser.parse_args()
+
+    engine = ExtractionEngine.with_all_extractors(
+        args.project_path,
+        args.target_module,
+        args.handler_files or TARGET_HANDLER_FILES,
+        profile_report=args.profile_report,
+    )
+    engine.execute()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import ast
+import os
+from collections import defaultdict
+
+
+class ImportGraph:
+    """標準ライブラリの ast だけで構築するプロジェクト内の import 依存グラフ。"""
+
+    def __init__(self) -> None:
+        self.imports: dict[str, set[str]] = {}
+        self.import_records: dict[str, list[tuple[str, str | None]]] = {}
+        self.module_files: dict[str, str] = {}
+        self.defining_files: set[str] = set()
+        self.unparsable_files: set[str] = set()
+        self._importers: dict[str, set[str]] | None = None
+
+    @classmethod
+    def module_name_of(cls, file_path: str) -> str:
+        """プロジェクトからの相対パスをモジュール名に変換します (__init__ はパッケージ名)。"""
+        parts = list(os.path.normpath(os.path.splitext(file_path)[0]).split(os.sep))
+        if parts and parts[-1] == "__init__":
+            parts.pop()
+        return ".".join(parts)
+
+    @classmethod
+    def collect_imports(cls, source: str, file_path: str) -> set[str]:
+        """ファイル内の import 文が参照しうるモジュール名をすべて返します。"""
+        tree = ast.parse(source, filename=file_path)
+        return cls.imports_from_records(cls.collect_import_records(tree, file_path))
+
+    @classmethod
+    def collect_import_records(
+        cls, tree: ast.Module, file_path: str
+    ) -> list[tuple[str, str | None]]:
+        """import 文を (モジュール名, 名前) の組に正規化します。
+
+        import X は (X, None)、from X import Y [as Z] は (X, Y)、
+        from X import * は (X, "*") になります。相対 import は絶対名に解決します。
+        """
+        module_name = cls.module_name_of(file_path)
+        is_package = os.path.basename(file_path) == "__init__.py"
+        package = module_name if is_package else module_name.rpartition(".")[0]
+
+        records = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    records.append((alias.name, None))
+            elif isinstance(node, ast.ImportFrom):
+                base = cls.resolve_relative(package, node.module, node.level)
+                if base is None:
+                    continue
+                for alias in node.names:
+                    records.append((base, alias.name))
+        return records
+
+    @classmethod
+    def imports_from_records(cls, records: list[tuple[str, str | None]]) -> set[str]:
+        imported = set()
+        for module, name in records:
+            imported.update(cls._with_parents(module) if module else [])
+            if name is not None and name != "*":
+                # from X import Y の Y がサブモジュールの場合もある
+                imported.add(f"{module}.{name}" if module else name)
+        imported.discard("")
+        return imported
+
+    @classmethod
+    def has_top_level_definitions(cls, tree: ast.Module) -> bool:
+        return any(
+            isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+            for node in tree.body
+        )
+
+    @classmethod
+    def resolve_relative(
+        cls, package: str, module: str | None, level: int
+    ) -> str | None:
+        if level == 0:
+            return module or ""
+        package_parts = package.split(".") if package else []
+        if level - 1 > len(package_parts):
+            return None
+        base_parts = package_parts[: len(package_parts) - (level - 1)]
+        if module:
+            base_parts.append(module)
+        return ".".join(base_parts)
+
+    @classmethod
+    def _with_parents(cls, module_name: str) -> list[str]:
+        # import a.b.c はパッケージ a, a.b の __init__ も実行する
+        parts = module_name.split(".")
+        return [".".join(parts[: i + 1]) for i in range(len(parts))]
+
+    def add_file(self, file_path: str, imports: set[str]) -> None:
+        self.imports[file_path] = set(imports)
+        self.module_files[self.module_name_of(file_path)] = file_path
+        self._importers = None
+
+    def scan_files(self, project_path: str, file_paths: list[str]) -> None:
+        """ファイルを ast で解析し、import と最上位の定義の有無を登録します。"""
+        for file_path in file_paths:
+            try:
+                with open(os.path.join(project_path, file_path), "rb") as f:
+                    tree = ast.parse(f.read(), filename=file_path)
+            except (SyntaxError, ValueError, OSError):
+                # 判定できないファイルは後段の解析に任せる
+                self.unparsable_files.add(file_path)
+                self.module_files[self.module_name_of(file_path)] = file_path
+                continue
+            records = self.collect_import_records(tree, file_path)
+            self.import_records[file_path] = records
+            self.add_file(file_path, self.imports_from_records(records))
+            if self.has_top_level_definitions(tree):
+                self.defining_files.add(file_path)
+
+    def files_referencing(self, target_files: set[str]) -> set[str]:
+        """target_files の定義を参照しうるファイルを返します。
+
+        target_files 自身、target_files から直接 import しているファイル、
+        パッケージの __init__ などを経由した再エクスポート (from X import *
+        を含む) で import しているファイルが対象です。
+        """
+        target_modules = {self.module_name_of(file_path) for file_path in target_files}
+        exporting = set(target_modules)
+        changed = True
+        while changed:
+            changed = False
+            for file_path, records in self.import_records.items():
+                module_name = self.module_name_of(file_path)
+                if module_name in exporting:
+                    continue
+                if self._imports_any(records, exporting, target_modules):
+                    exporting.add(module_name)
+                    changed = True
+
+        result = set(target_files) | self.unparsable_files
+        for file_path, records in self.import_records.items():
+            if self.module_name_of(file_path) in exporting or self._imports_any(
+                records, exporting, target_modules
+            ):
+                result.add(file_path)
+        return result
+
+    @classmethod
+    def _imports_any(
+        cls,
+        records: list[tuple[str, str | None]],
+        exporting: set[str],
+        target_modules: set[str],
+    ) -> bool:
+        for module, name in records:
+            if module in exporting:
+                return True
+            if name is None:
+                # import pkg の場合は pkg.sub.Target のように属性経由で参照できる
+                prefix = f"{module}."
+                if any(target.startswith(prefix) for target in target_modules):
+                    return True
+            elif name != "*" and f"{module}.{name}" in exporting:
+                return True
+        return False
+
+    def dependencies_of(self, file_path: str) -> set[str]:
+        """ファイルが直接 import しているプロジェクト内ファイルを返します。"""
+        return {
+            self.module_files[name]
+            for name in self.imports.get(file_path, ())
+            if name in self.module_files
+        }
+
+    def dependents(self, module_names: set[str]) -> set[str]:
+        """指定モジュールに推移的に依存しているファイルをすべて返します。"""
+        importers = self._get_importers()
+        result = set()
+        pending = list(module_names)
+        seen_modules = set(module_names)
+        while pending:
+            for file_path in importers.get(pending.pop(), ()):
+                if file_path in result:
+                    continue
+                result.add(file_path)
+                module_name = self.module_name_of(file_path)
+                if module_name not in seen_modules:
+                    seen_modules.add(module_name)
+                    pending.append(module_name)
+        return result
+
+    def _get_importers(self) -> dict[str, set[str]]:
+        if self._importers is None:
+            importers = defaultdict(set)
+            for file_path, names in self.imports.items():
+                for name in names:
+                    importers[name].add(file_path)
+            self._importers = importers
+        return self._importers
@@ -0,0 +1,326 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from pyan3_fs.call_graph_condensation import CondensedCallGraph
+from pyan3_fs.call_graph_creator import CallGraphCreator
+from pyan3_fs.compact_call_graph import CompactCallGraph
+from pyan3_fs.edge_store import EdgeStore
+from pyan3_fs.endpoint_error_matrix import EndpointErrorMatrix
+
+
+class IncrementalMappingUpdater:
+    """Updates the call graph and handler_error_mapping.csv from an edge diff.
+
+    The previous run's endpoint x error-site matrix (see --traversal bitset)
+    holds the (endpoint, start point) pairs of every start point. A start
+    point can only gain or lose pairs if, in the previous graph, it reaches
+    the called side of an added or removed edge, or if its raise site itself
+    changed. Only those start points are traversed again, on the patched
+    graph; the pairs of all other start points are carried over from the
+    previous matrix.
+    """
+
+    def __init__(
+        self,
+        reference_csv: str,
+        start_points_csv: str,
+        previous_start_points_csv: str,
+        fastapi_endpoints_csv: str,
+        matrix_file: str,
+        mapping_csv: str,
+        added_edges_csv: str | None = None,
+        removed_edges_csv: str | None = None,
+        output_matrix_file: str | None = None,
+        output_reference_csv: str | None = None,
+        report_file: str | None = None,
+    ) -> None:
+        self.reference_csv = reference_csv
+        self.start_points_csv = start_points_csv
+        self.previous_start_points_csv = previous_start_points_csv
+        self.fastapi_endpoints_csv = fastapi_endpoints_csv
+        self.matrix_file = matrix_file
+        self.mapping_csv = mapping_csv
+        self.added_edges_csv = added_edges_csv
+        self.removed_edges_csv = removed_edges_csv
+        self.output_matrix_file = output_matrix_file or matrix_file
+        self.output_reference_csv = output_reference_csv
+        self.report_file = report_file
+        self.logger = logging.getLogger(__name__)
+
+    def execute(self) -> dict:
+        started = time.perf_counter()
+        creator = CallGraphCreator(
+            self.reference_csv,
+            self.start_points_csv,
+            None,
+            self.mapping_csv,
+            self.fastapi_endpoints_csv,
+        )
+        try:
+            start_points = creator.load_call_graph()
+            added = self._load_edges(creator.conn, "added_edges", self.added_edges_csv)
+            removed = self._load_edges(creator.conn, "removed_edges", self.removed_edges_csv)
+            if self.output_reference_csv:
+                if creator.edge_tables is not None:
+                    # The call graph was built from the stored ids without a ref_table.
+                    EdgeStore.create_ref_table(creator.conn, self.reference_csv)
+                self._write_reference(creator.conn)
+        finally:
+            creator.conn.close()
+        old_graph = creator.call_graph
+        error_sites = list(dict.fromkeys(start_points))
+
+        changed_sites = self._changed_raise_sites(creator.error_details, error_sites)
+        previous_matrix = EndpointErrorMatrix.load(self.matrix_file)
+        if self._endpoint_keys(previous_matrix.endpoints) != self._endpoint_keys(
+            creator.fastapi_endpoints
+        ):
+            self.logger.info("FastAPI endpoints changed, recomputing every start point")
+            affected = set(error_sites)
+        else:
+            affected = self._start_points_reaching(
+                old_graph, {called for called, _ in added + removed}, set(error_sites)
+            )
+            affected |= changed_sites
+
+        new_graph = self._patch_graph(old_graph, added, removed)
+        creator.call_graph = new_graph
+        matrix = self._update_matrix(creator, previous_matrix, error_sites, affected)
+
+        previous_rows = self._read_mapping_rows(self.mapping_csv)
+        creator.write_mapping_from_matrix(matrix)
+        matrix.save(self.output_matrix_file)
+        current_rows = self._read_mapping_rows(self.mapping_csv)
+
+        report = {
+            "added_edges": len(added),
+            "removed_edges": len(removed),
+            "changed_raise_sites": len(changed_sites),
+            "start_points": len(error_sites),
+            "affected_start_points": len(affected),
+            "mapping_rows_added": [row for row in current_rows if row not in previous_rows],
+            "mapping_rows_removed": [row for row in previous_rows if row not in current_rows],
+            "seconds": round(time.perf_counter() - started, 6),
+        }
+        self.logger.info(
+            f"{report['affected_start_points']}/{report['start_points']} start points affected, "
+            f"{len(report['mapping_rows_added'])} mapping rows added, "
+            f"{len(report['mapping_rows_removed'])} removed"
+        )
+        if self.report_file:
+            with open(self.report_file, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    @classmethod
+    def _load_edges(cls, conn, table_name: str, edges_csv: str | None) -> list[tuple]:
+        # Same columns, filter and normalization as CallGraphCreator._build_call_graph.
+        CallGraphCreator.create_reference_table(conn, table_name)
+        if edges_csv is None:
+            return []
+        conn.execute(f"COPY {table_name} FROM '{edges_csv}' (HEADER, DELIMITER ',')")
+        rows = conn.execute(
+            f"""
+            SELECT DISTINCT
+                called_file_path, called_class_name, called_function_name,
+                caller_file_path, caller_class_name, caller_function_name
+            FROM {table_name}
+            WHERE caller_file_path NOT LIKE '%test_%'
+        """
+        ).fetchall()
+        return [
+            (
+                CompactCallGraph.intern_node(row[0], row[1], row[2]),
+                CompactCallGraph.intern_node(row[3], row[4], row[5]),
+            )
+            for row in rows
+        ]
+
+    def _write_reference(self, conn) -> None:
+        conn.execute(
+            f"""
+            COPY (
+                SELECT * FROM (SELECT * FROM ref_table EXCEPT SELECT * FROM removed_edges)
+                UNION ALL
+                SELECT * FROM (SELECT * FROM added_edges EXCEPT SELECT * FROM ref_table)
+            ) TO '{self.output_reference_csv}' (HEADER, DELIMITER ',')
+        """
+        )
+        self.logger.info(f"Patched reference data written to {self.output_reference_csv}")
+
+    def _changed_raise_sites(self, error_details: dict, error_sites: list[tuple]) -> set:
+        previous = CallGraphCreator(
+            self.reference_csv, self.previous_start_points_csv, None, None, None
+        )
+        try:
+            previous.load_start_points()
+        finally:
+            previous.conn.close()
+        return {
+            site
+            for site in error_sites
+            if previous.error_details.get(site) != error_details[site]
+        }
+
+    @classmethod
+    def _endpoint_keys(cls, endpoints) -> list[tuple]:
+        return [
+            (ep.module_name, ep.http_method, ep.path, ep.operation_id) for ep in endpoints
+        ]
+
+    @classmethod
+    def _start_points_reaching(
+        cls, graph: CompactCallGraph, changed_nodes: set, start_points: set
+    ) -> set:
+        """Start points that reach one of changed_nodes in graph, handlers being terminal."""
+        offsets, callees = graph.callee_csr()
+        is_handler = graph.is_handler
+        queue = deque(
+            node_id
+            for node_id in (graph.node_id(node) for node in changed_nodes)
+            # Edges leaving a handler are never followed, so they change nothing.
+            if node_id is not None and not is_handler[node_id]
+        )
+        seen = set(queue)
+        while queue:
+            node_id = queue.popleft()
+            for callee_id in callees[offsets[node_id] : offsets[node_id + 1]].tolist():
+                if callee_id not in seen and not is_handler[callee_id]:
+                    seen.add(callee_id)
+                    queue.append(callee_id)
+        return {graph.nodes[node_id] for node_id in seen} & start_points
+
+    @classmethod
+    def _patch_graph(
+        cls, graph: CompactCallGraph, added: list[tuple], removed: list[tuple]
+    ) -> CompactCallGraph:
+        if not added and not removed:
+            return graph
+        nodes = list(graph.nodes)
+        node_ids = dict(graph.node_ids)
+        called, callers = graph.edge_arrays()
+        node_count = len(nodes)
+
+        removed_keys = [
+            node_ids[called_node] * node_count + node_ids[caller_node]
+            for called_node, caller_node in removed
+            if called_node in node_ids and caller_node in node_ids
+        ]
+        if removed_keys:
+            keep = ~np.isin(called * node_count + callers, removed_keys)
+            called, callers = called[keep], callers[keep]
+
+        added_called = []
+        added_callers = []
+        for called_node, caller_node in added:
+            for node in (called_node, caller_node):
+                if node not in node_ids:
+                    node_ids[node] = len(nodes)
+                    nodes.append(node)
+            added_called.append(node_ids[called_node])
+            added_callers.append(node_ids[caller_node])
+        return CompactCallGraph.from_id_arrays(
+            nodes,
+            np.concatenate([called, np.asarray(added_called, dtype=np.int64)]),
+            np.concatenate([callers, np.asarray(added_callers, dtype=np.int64)]),
+        )
+
+    def _update_matrix(
+        self,
+        creator: CallGraphCreator,
+        previous: EndpointErrorMatrix,
+        error_sites: list[tuple],
+        affected: set,
+    ) -> EndpointErrorMatrix:
+        columns = {site: col for col, site in enumerate(error_sites)}
+        rows = []
+        cols = []
+        for row, col in zip(previous.rows.tolist(), previous.cols.tolist()):
+            # Saved error sites are string tuples, like the keys read from the CSV.
+            site = previous.error_sites[col]
+            if site in columns and site not in affected:
+                rows.append(row)
+                cols.append(columns[site])
+
+        endpoint_rows = {}
+        for row, ep in enumerate(creator.fastapi_endpoints):
+            endpoint_rows.setdefault((ep.module_name, ep.operation_id), row)
+        graph = creator.call_graph
+        condensed_graph = CondensedCallGraph(graph)
+        for site in affected:
+            for handler_id in condensed_graph.handlers_reachable_from(graph.node_id(site)):
+                endpoint = creator.endpoint_for_handler(graph.nodes[handler_id])
+                if endpoint is not None:
+                    rows.append(endpoint_rows[(endpoint.module_name, endpoint.operation_id)])
+                    cols.append(columns[site])
+
+        keys = np.unique(
+            np.asarray(rows, dtype=np.int64) * max(len(error_sites), 1)
+            + np.asarray(cols, dtype=np.int64)
+        )
+        return EndpointErrorMatrix(
+            creator.fastapi_endpoints,
+            error_sites,
+            keys // max(len(error_sites), 1),
+            keys % max(len(error_sites), 1),
+        )
+
+    @classmethod
+    def _read_mapping_rows(cls, mapping_csv: str) -> dict[tuple, None]:
+        # An insertion-ordered set: the report lists rows in file order.
+        if not os.path.exists(mapping_csv):
+            return {}
+        with open(mapping_csv, "r", encoding="utf-8") as f:
+            return dict.fromkeys(tuple(row) for row in list(csv.reader(f))[1:] if row)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Update handler_error_mapping.csv from added/removed reference edges."
+    )
+    parser.add_argument("--reference-csv", default="clubjt_reference_result.csv")
+    parser.add_argument("--start-points-csv", default="clubjt_error_result.csv")
+    parser.add_argument(
+        "--previous-start-points-csv",
+        required=True,
+        help="Start points CSV of the run that produced --matrix-file",
+    )
+    parser.add_argument("--fastapi-endpoints-csv", default="fastapi_endpoints.csv")
+    parser.add_argument("--matrix-file", required=True, help="Matrix of the previous run")
+    parser.add_argument("--mapping-csv", default="handler_error_mapping.csv")
+    parser.add_argument("--added-edges-csv", default=None)
+    parser.add_argument("--removed-edges-csv", default=None)
+    parser.add_argument("--output-matrix-file", default=None)
+    parser.add_argument(
+        "--output-reference-csv", default=None, help="Write the patched reference CSV here"
+    )
+    parser.add_argument("--report", default=None, help="Write a JSON change report here")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    IncrementalMappingUpdater(
+        args.reference_csv,
+        args.start_points_csv,
+        args.previous_start_points_csv,
+        args.fastapi_endpoints_csv,
+        args.matrix_file,
+        args.mapping_csv,
+        added_edges_csv=args.added_edges_csv,
+        removed_edges_csv=args.removed_edges_csv,
+        output_matrix_file=args.output_matrix_file,
+        output_reference_csv=args.output_reference_csv,
+        report_file=args.report,
+    ).execute()
+
+
+if __name__ == "__main__":
+    main()
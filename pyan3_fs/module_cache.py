@@ -0,0 +1,129 @@
+import os
+from collections import OrderedDict
+from itertools import islice
+
+import astroid
+
+
+class ModuleCache:
+    """astroid の Module を保持する LRU キャッシュ。
+
+    件数 (max_modules) と推定バイト数 (max_bytes) のどちらか、または両方で
+    上限を設定できます。上限を指定しない場合は従来どおりすべて保持します。
+
+    AstroidBuilder.file_build はモジュールを astroid.MANAGER.astroid_cache にも
+    登録するため、上限を設定した場合は追い出したモジュールをマネージャーからも外します。
+    """
+
+    # astroid のツリーはソースの数十倍のメモリを使うため、ファイルサイズから推定する
+    ESTIMATED_BYTES_PER_SOURCE_BYTE = 40
+
+    def __init__(self, max_modules: int | None = None, max_bytes: int | None = None) -> None:
+        self.max_modules = max_modules
+        self.max_bytes = max_bytes
+        self.modules: OrderedDict = OrderedDict()
+        self.sizes: dict[str, int] = {}
+        self.total_bytes = 0
+        self.evictions = 0
+        # マネージャーが保持する対象モジュール (名前 -> 推定サイズ)。
+        # astroid_cache は挿入順の dict なので、前回確認した件数より後ろだけを調べる
+        self.manager_sizes: dict[str, int] = {}
+        self.manager_bytes = 0
+        self.manager_seen = 0
+
+    @property
+    def bounded(self) -> bool:
+        return self.max_modules is not None or self.max_bytes is not None
+
+    def __contains__(self, file_path: str) -> bool:
+        return file_path in self.modules
+
+    def __len__(self) -> int:
+        return len(self.modules)
+
+    def __getitem__(self, file_path: str):
+        module = self.modules[file_path]
+        self.modules.move_to_end(file_path)
+        return module
+
+    def __setitem__(self, file_path: str, module) -> None:
+        self.put(file_path, module)
+
+    def estimate_size(self, absolute_file_path: str) -> int:
+        try:
+            return os.path.getsize(absolute_file_path) * self.ESTIMATED_BYTES_PER_SOURCE_BYTE
+        except OSError:
+            return 0
+
+    def put(self, file_path: str, module, size: int = 0) -> None:
+        self.pop(file_path)
+        self.modules[file_path] = module
+        self.sizes[file_path] = size
+        self.total_bytes += size
+        self._evict()
+
+    def pop(self, file_path: str):
+        module = self.modules.pop(file_path, None)
+        if module is not None:
+            self.total_bytes -= self.sizes.pop(file_path)
+            self._release(module)
+        return module
+
+    def manager_over_limit(self, path_prefix: str) -> bool:
+        """path_prefix 以下のモジュールを astroid マネージャーが上限を超えて保持しているか。
+
+        推論中の import で構築されたモジュールは ModuleCache を経由せずに
+        マネージャーに登録されるため、マネージャー側の件数と推定サイズを確認します。
+        """
+        if not self.bounded:
+            return False
+        astroid_cache = astroid.MANAGER.astroid_cache
+        added = len(astroid_cache) - self.manager_seen
+        if added < 0:
+            # 把握していない削除があった場合は数え直す
+            self._reset_manager_sizes()
+            added = len(astroid_cache)
+        for module in islice(reversed(astroid_cache.values()), added):
+            if module.file and module.file.startswith(path_prefix):
+                size = self.estimate_size(module.file)
+                self.manager_bytes += size - self.manager_sizes.get(module.name, 0)
+                self.manager_sizes[module.name] = size
+        self.manager_seen = len(astroid_cache)
+        if self.max_modules is not None and len(self.manager_sizes) > self.max_modules:
+            return True
+        return self.max_bytes is not None and self.manager_bytes > self.max_bytes
+
+    def clear(self) -> None:
+        # astroid マネージャーもあわせて破棄される前提で、次回の確認時に数え直す
+        self.modules.clear()
+        self.sizes.clear()
+        self.total_bytes = 0
+        self._reset_manager_sizes()
+
+    def _reset_manager_sizes(self) -> None:
+        self.manager_sizes.clear()
+        self.manager_bytes = 0
+        self.manager_seen = 0
+
+    def _evict(self) -> None:
+        # 直近に追加したモジュールは残すため、最低 1 件は保持する
+        while len(self.modules) > 1 and (
+            (self.max_modules is not None and len(self.modules) > self.max_modules)
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            file_path, module = self.modules.popitem(last=False)
+            self.total_bytes -= self.sizes.pop(file_path)
+            self.evictions += 1
+            self._release(module)
+
+    def _release(self, module) -> None:
+        if not self.bounded:
+            return
+        # マネージャーが同じモジュールを保持している場合だけ外す
+        astroid_cache = astroid.MANAGER.astroid_cache
+        if astroid_cache.get(module.name) is module:
+            del astroid_cache[module.name]
+            if module.name in self.manager_sizes:
+                # 確認済みの範囲から外れた分だけ件数を戻す
+                self.manager_bytes -= self.manager_sizes.pop(module.name)
+                self.manager_seen -= 1
@@ -2,6 +2,8 @@ import astroid
 import csv
 import os
 
+from pyan3_fs.analysis_cache import AnalysisCache
+
 PROJECT_PATH = "/Users/sugiyama/clubjt-server/clubjt-impl"
 TARGET_HANDLER_FILES = [
     "clubjt_impl/api/user_handler.py",
@@ -10,16 +12,25 @@ TARGET_HANDLER_FILES = [
 
 
 class OperatorParser:
-    def __init__(self, project_path, target_handler_files):
+    def __init__(self, project_path, target_handler_files, cache_dir=None):
         self.project_path = project_path
         self.target_handler_files = target_handler_files
         self.output_file = "fastapi_endpoints.csv"
+        self.cache = None
+        if cache_dir:
+            self.cache = AnalysisCache(
+                cache_dir, "fastapi_endpoints", {"project_path": os.path.abspath(project_path)}
+            )
 
     def parse_fastapi_endpoints(self, file_path):
         with open(file_path, "r") as file:
             content = file.read()
 
         module = astroid.parse(content)
+        return self.module_endpoints(module, file_path)
+
+    @classmethod
+    def module_endpoints(cls, module, file_path):
         endpoints = []
         module_name = os.path.splitext(os.path.basename(file_path))[0]
 
@@ -54,15 +65,34 @@ class OperatorParser:
             writer.writerow(["module_name", "http_method", "path", "operation_id"])
             writer.writerows(all_endpoints)
 
+    def parse_fastapi_endpoints_cached(self, handler_file):
+        file_path = os.path.join(self.project_path, handler_file)
+        digest = AnalysisCache.file_hash(file_path)
+        cached = self.cache.get(handler_file, digest)
+        if cached is not None:
+            return [tuple(endpoint) for endpoint in cached["endpoints"]]
+
+        endpoints = self.parse_fastapi_endpoints(file_path)
+        self.cache.put(handler_file, digest, {"endpoints": endpoints})
+        return endpoints
+
     def execute(self):
         all_endpoints = []
+        if self.cache:
+            self.cache.load()
         for handler_file in self.target_handler_files:
             file_path = os.path.join(self.project_path, handler_file)
             try:
-                endpoints = self.parse_fastapi_endpoints(file_path)
+                if self.cache:
+                    endpoints = self.parse_fastapi_endpoints_cached(handler_file)
+                else:
+                    endpoints = self.parse_fastapi_endpoints(file_path)
                 all_endpoints.extend(endpoints)
             except Exception as e:
                 print(f"Error processing file {file_path}: {str(e)}")
+        if self.cache:
+            self.cache.prune(set(self.target_handler_files))
+            self.cache.save()
 
         if all_endpoints:
             self.write_to_csv(all_endpoints)
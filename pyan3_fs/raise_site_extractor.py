@@ -0,0 +1,253 @@
+import ast
+import re
+
+
+class AstroidRequired(Exception):
+    """The raise site contains an expression whose text only astroid can reproduce."""
+
+
+class RaiseSiteExtractor:
+    """Extracts raise sites of the target errors with the stdlib ast module.
+
+    Produces the same values as ClubjtErrorAnalyzer's astroid based
+    extraction, which only looks at syntax. Expressions that the astroid
+    path renders with as_string() are reproduced here for names,
+    attributes, calls, constants, tuples, lists and binary operators;
+    anything else raises AstroidRequired so that the caller can fall back to
+    astroid for the file.
+    """
+
+    # Statement lists in the child order astroid uses, so that raise sites
+    # come out in the same order as Module.nodes_of_class(Raise).
+    STATEMENT_FIELDS = ("body", "handlers", "orelse", "finalbody", "cases")
+    BINOP_SYMBOLS = {
+        ast.Add: "+",
+        ast.Sub: "-",
+        ast.Mult: "*",
+        ast.MatMult: "@",
+        ast.Div: "/",
+        ast.FloorDiv: "//",
+        ast.Mod: "%",
+        ast.Pow: "**",
+        ast.LShift: "<<",
+        ast.RShift: ">>",
+        ast.BitOr: "|",
+        ast.BitXor: "^",
+        ast.BitAnd: "&",
+    }
+    # Same table as astroid's OP_PRECEDENCE.
+    BINOP_PRECEDENCE = {
+        "|": 6,
+        "^": 7,
+        "&": 8,
+        "<<": 9,
+        ">>": 9,
+        "+": 10,
+        "-": 10,
+        "*": 11,
+        "@": 11,
+        "/": 11,
+        "//": 11,
+        "%": 11,
+        "**": 13,
+    }
+    ATOM_PRECEDENCE = 15
+
+    def __init__(self, target_errors: list[str], hierarchy=None) -> None:
+        self.target_errors = set(target_errors)
+        # With an ExceptionHierarchyIndex, subclasses of the target errors
+        # match too, and names are resolved through the module's imports.
+        self.hierarchy = hierarchy
+        error_names = hierarchy.error_names if hierarchy else sorted(target_errors)
+        names = b"|".join(re.escape(name.encode()) for name in error_names)
+        self.target_pattern = re.compile(rb"\b(?:" + names + rb")\b")
+
+    def may_raise_target(self, source: bytes) -> bool:
+        """Cheap byte-level check; False means the file has no matching raise."""
+        return b"raise" in source and self.target_pattern.search(source) is not None
+
+    def extract(self, module: ast.Module, module_name: str = "") -> list[tuple]:
+        """Returns (class_name, function_name, error_class_name, target_error, error_args)
+        per raise site.
+
+        Raises AstroidRequired when an argument cannot be rendered exactly
+        like astroid does.
+        """
+        sites = []
+        for node, class_name, function_name in self.iter_raises(module):
+            if not isinstance(node.exc, ast.Call):
+                continue
+            matched = self.match(node.exc, module_name)
+            if matched:
+                error_class_name, target_error = matched
+                sites.append(
+                    (
+                        class_name,
+                        function_name,
+                        error_class_name,
+                        target_error,
+                        self.error_args(node.exc, target_error),
+                    )
+                )
+        return sites
+
+    def match(self, exc_node: ast.Call, module_name: str) -> tuple[str, str] | None:
+        """(error class name, target error) of the raised call, or None."""
+        if self.hierarchy is None:
+            error_class_name = self.error_class_name(exc_node)
+            if error_class_name in self.target_errors:
+                return error_class_name, error_class_name
+            return None
+        dotted = self.hierarchy.dotted_name(exc_node.func)
+        return self.hierarchy.match(module_name, dotted) if dotted else None
+
+    @classmethod
+    def iter_raises(cls, module: ast.Module):
+        """Yields (Raise, enclosing class name, enclosing function name) in preorder."""
+        stack = [(statement, None, None) for statement in reversed(module.body)]
+        while stack:
+            node, class_name, function_name = stack.pop()
+            if isinstance(node, ast.Raise):
+                yield node, class_name, function_name
+                continue
+            if isinstance(node, ast.ClassDef):
+                class_name = node.name
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                function_name = node.name
+            children = []
+            for field in cls.STATEMENT_FIELDS:
+                children.extend(getattr(node, field, ()))
+            stack.extend((child, class_name, function_name) for child in reversed(children))
+
+    @classmethod
+    def error_class_name(cls, exc_node: ast.Call) -> str:
+        if isinstance(exc_node.func, ast.Attribute):
+            return exc_node.func.attr
+        elif isinstance(exc_node.func, ast.Name):
+            return exc_node.func.id
+        return "Unknown"
+
+    @classmethod
+    def error_args(
+        cls, exc_node: ast.Call, target_error: str | None = None
+    ) -> tuple[str | None, str | None, str | None, str | None]:
+        """Same mapping of positional and keyword arguments as ClubjtErrorAnalyzer.get_error_args."""
+        status_code = None
+        detail_code = None
+        reason = None
+        message = None
+        is_module_error = (target_error or cls.error_class_name(exc_node)) == "ClubjtModuleError"
+
+        for idx, arg in enumerate(exc_node.args):
+            value = cls.extract_value(arg)
+            if idx == 0:
+                status_code = value
+            elif idx == 1 and is_module_error:
+                detail_code = value
+            elif idx == 1:
+                reason = value
+            elif idx == 2 and is_module_error:
+                reason = value
+            elif idx == 2:
+                message = value
+            elif idx == 3 and is_module_error:
+                message = value
+
+        for keyword in exc_node.keywords:
+            value = cls.extract_value(keyword.value)
+            if keyword.arg == "status_code":
+                status_code = value
+            elif keyword.arg == "detail_code":
+                detail_code = value
+            elif keyword.arg == "reason":
+                reason = value
+            elif keyword.arg == "message":
+                message = value
+
+        return status_code, detail_code, reason, message
+
+    @classmethod
+    def extract_value(cls, node: ast.expr) -> str | None:
+        if isinstance(node, ast.Constant):
+            return str(node.value)
+        elif isinstance(node, ast.JoinedStr):
+            return cls.process_fstring(node)
+        elif isinstance(node, (ast.BinOp, ast.Call)):
+            return cls.node_source(node)
+        return None
+
+    @classmethod
+    def process_fstring(cls, node: ast.JoinedStr) -> str:
+        parts = []
+        for part in node.values:
+            if isinstance(part, ast.Constant):
+                parts.append(part.value)
+            elif isinstance(part, ast.FormattedValue):
+                parts.append(f"{{{cls.node_source(part.value)}}}")
+        return "".join(parts)
+
+    @classmethod
+    def node_source(cls, node: ast.expr) -> str:
+        """Counterpart of ClubjtErrorAnalyzer.get_node_source."""
+        if isinstance(node, ast.Name):
+            return node.id
+        elif isinstance(node, ast.Attribute):
+            return f"{cls.node_source(node.value)}.{node.attr}"
+        elif isinstance(node, ast.Call):
+            func = cls.node_source(node.func)
+            args = ", ".join(cls.node_source(arg) for arg in node.args)
+            return f"{func}({args})"
+        return cls.as_string(node)
+
+    @classmethod
+    def as_string(cls, node: ast.expr) -> str:
+        """astroid's NodeNG.as_string() for the expressions handled here."""
+        if isinstance(node, ast.Constant):
+            return "..." if node.value is Ellipsis else repr(node.value)
+        elif isinstance(node, ast.Name):
+            return node.id
+        elif isinstance(node, ast.Attribute) and isinstance(
+            node.value, (ast.Name, ast.Attribute, ast.Call)
+        ):
+            return f"{cls.as_string(node.value)}.{node.attr}"
+        elif isinstance(node, ast.Call) and isinstance(node.func, (ast.Name, ast.Attribute)):
+            args = [cls.as_string(arg) for arg in node.args]
+            for keyword in node.keywords:
+                if keyword.arg is None:
+                    args.append(f"**{cls.as_string(keyword.value)}")
+                else:
+                    args.append(f"{keyword.arg}={cls.as_string(keyword.value)}")
+            return f"{cls.as_string(node.func)}({', '.join(args)})"
+        elif isinstance(node, ast.Tuple):
+            if len(node.elts) == 1:
+                return f"({cls.as_string(node.elts[0])}, )"
+            return f"({', '.join(cls.as_string(elt) for elt in node.elts)})"
+        elif isinstance(node, ast.List):
+            return f"[{', '.join(cls.as_string(elt) for elt in node.elts)}]"
+        elif isinstance(node, ast.BinOp) and type(node.op) in cls.BINOP_SYMBOLS:
+            op = cls.BINOP_SYMBOLS[type(node.op)]
+            left = cls._operand_string(op, node.left, is_left=True)
+            right = cls._operand_string(op, node.right, is_left=False)
+            if op == "**":
+                return f"{left}{op}{right}"
+            return f"{left} {op} {right}"
+        raise AstroidRequired(type(node).__name__)
+
+    @classmethod
+    def _operand_string(cls, op: str, child: ast.expr, is_left: bool) -> str:
+        # Same parenthesization rule as astroid's AsStringVisitor._should_wrap.
+        if isinstance(child, ast.BinOp) and type(child.op) in cls.BINOP_SYMBOLS:
+            child_precedence = cls.BINOP_PRECEDENCE[cls.BINOP_SYMBOLS[type(child.op)]]
+        elif isinstance(
+            child, (ast.Constant, ast.Name, ast.Attribute, ast.Call, ast.Tuple, ast.List)
+        ):
+            child_precedence = cls.ATOM_PRECEDENCE
+        else:
+            raise AstroidRequired(type(child).__name__)
+        precedence = cls.BINOP_PRECEDENCE[op]
+        text = cls.as_string(child)
+        if precedence > child_precedence or (
+            precedence == child_precedence and is_left != (op != "**")
+        ):
+            return f"({text})"
+        return text
@@ -0,0 +1,275 @@
+import argparse
+import bisect
+import json
+import os
+
+import numpy as np
+
+from pyan3_fs.call_graph_condensation import CondensedCallGraph
+from pyan3_fs.call_graph_creator import CallGraphCreator
+from pyan3_fs.compact_call_graph import CompactCallGraph
+
+
+class ReachabilityIndex:
+    """Persistent "does caller reach callee" index over the condensed call graph.
+
+    Every component of the condensed callee -> callers graph gets a sorted
+    list of disjoint component-id intervals that together cover all
+    components it reaches (interval labeling / compressed transitive
+    closure). Tarjan numbers each DFS subtree contiguously, so most of a
+    component's reach is a single tree interval and the lists stay short.
+    A query is one binary search in the callee's interval list.
+
+    Unlike CallGraphCreator, the traversal does not stop at handlers, so
+    helpers inside the handler modules are reachable from their endpoints.
+    The index is written as .npy files into <reference data>.reach/ and
+    loaded with mmap_mode="r"; node and endpoint lookups binary-search sorted
+    tables, so neither loading nor querying touches the edge list.
+    """
+
+    VERSION = 2
+    ARRAYS = [
+        "file_paths",
+        "class_names",
+        "function_names",
+        "has_function",
+        "component_of",
+        "interval_offsets",
+        "interval_low",
+        "interval_high",
+        "endpoint_modules",
+        "endpoint_operations",
+        "endpoint_handler_ids",
+    ]
+
+    def __init__(self, arrays: dict, meta: dict) -> None:
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.meta = meta
+        self._node_keys = _NodeKeys(
+            self.file_paths, self.class_names, self.function_names, self.has_function
+        )
+        self._endpoint_keys = _EndpointKeys(self.endpoint_modules, self.endpoint_operations)
+
+    @classmethod
+    def index_path(cls, reference_path: str) -> str:
+        return f"{reference_path.rstrip(os.sep)}.reach"
+
+    @classmethod
+    def build(cls, graph: CompactCallGraph) -> "ReachabilityIndex":
+        condensed_graph = CondensedCallGraph(
+            graph, memoize_handlers=False, stop_at_handlers=False
+        )
+        condensed_graph.condense_all()
+
+        # Successor components always have smaller ids, so their lists are ready.
+        offsets = [0]
+        lows = []
+        highs = []
+        for component_id, successors in enumerate(condensed_graph.successors):
+            intervals = [(condensed_graph.tree_low[component_id], component_id)]
+            for successor in successors:
+                start, end = offsets[successor], offsets[successor + 1]
+                intervals.extend(zip(lows[start:end], highs[start:end]))
+            merged = []
+            for low, high in sorted(intervals):
+                if merged and low <= merged[-1][1] + 1:
+                    if high > merged[-1][1]:
+                        merged[-1][1] = high
+                else:
+                    merged.append([low, high])
+            for low, high in merged:
+                lows.append(low)
+                highs.append(high)
+            offsets.append(len(lows))
+
+        # (module_name, operation_id) -> handler node ids, sorted for bisect.
+        endpoints = []
+        for node_id in np.flatnonzero(graph.is_handler).tolist():
+            file_path, _, function_name = graph.nodes[node_id]
+            if function_name is not None:
+                module_name = os.path.splitext(os.path.basename(file_path))[0]
+                endpoints.append((module_name, function_name, node_id))
+        endpoints.sort()
+
+        component_of = np.empty(len(graph), dtype=np.int32)
+        for node_id, component_id in condensed_graph.component_of.items():
+            component_of[node_id] = component_id
+        arrays = {
+            "file_paths": np.array([node[0] for node in graph.nodes], dtype=str),
+            "class_names": np.array([node[1] for node in graph.nodes], dtype=str),
+            "function_names": np.array([node[2] or "" for node in graph.nodes], dtype=str),
+            "has_function": np.array([node[2] is not None for node in graph.nodes], dtype=bool),
+            "component_of": component_of,
+            "interval_offsets": np.asarray(offsets, dtype=np.int64),
+            "interval_low": np.asarray(lows, dtype=np.int32),
+            "interval_high": np.asarray(highs, dtype=np.int32),
+            "endpoint_modules": np.array([endpoint[0] for endpoint in endpoints], dtype=str),
+            "endpoint_operations": np.array([endpoint[1] for endpoint in endpoints], dtype=str),
+            "endpoint_handler_ids": np.array(
+                [endpoint[2] for endpoint in endpoints], dtype=np.int32
+            ),
+        }
+        meta = {
+            "version": cls.VERSION,
+            "nodes": len(graph),
+            "edges": graph.edge_count,
+            "components": len(condensed_graph.components),
+            "intervals": len(lows),
+        }
+        return cls(arrays, meta)
+
+    def save(self, path: str, source_path: str | None = None) -> None:
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        if source_path is not None:
+            self.meta["source_mtime"] = _source_mtime(source_path)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "ReachabilityIndex":
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != cls.VERSION:
+            raise ValueError(f"Unsupported reachability index version in {path}")
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in cls.ARRAYS
+        }
+        return cls(arrays, meta)
+
+    def is_stale(self, source_path: str) -> bool:
+        return self.meta.get("source_mtime") != _source_mtime(source_path)
+
+    def node_id(self, node: tuple) -> int | None:
+        key = CompactCallGraph.sort_key(node)
+        position = bisect.bisect_left(self._node_keys, key)
+        if position < len(self._node_keys) and self._node_keys[position] == key:
+            return position
+        return None
+
+    def _require_node_id(self, node: tuple) -> int:
+        node_id = self.node_id(node)
+        if node_id is None:
+            raise KeyError(f"Unknown node: {node}")
+        return node_id
+
+    def _component_reaches(self, source: int, target: int) -> bool:
+        start = int(self.interval_offsets[source])
+        end = int(self.interval_offsets[source + 1])
+        position = int(np.searchsorted(self.interval_low[start:end], target, side="right")) - 1
+        return position >= 0 and int(self.interval_high[start + position]) >= target
+
+    def reaches(self, caller: tuple, callee: tuple) -> bool:
+        """Whether caller transitively calls callee (every node reaches itself)."""
+        callee_component = self.component_of[self._require_node_id(callee)]
+        caller_component = self.component_of[self._require_node_id(caller)]
+        return self._component_reaches(int(callee_component), int(caller_component))
+
+    def endpoint_handlers(self, module_name: str, operation_id: str) -> list[int]:
+        key = (module_name, operation_id)
+        start = bisect.bisect_left(self._endpoint_keys, key)
+        end = bisect.bisect_right(self._endpoint_keys, key, lo=start)
+        return self.endpoint_handler_ids[start:end].tolist()
+
+    def endpoint_reaches(self, module_name: str, operation_id: str, callee: tuple) -> bool:
+        """Whether the endpoint's handler function transitively calls callee."""
+        callee_component = int(self.component_of[self._require_node_id(callee)])
+        return any(
+            self._component_reaches(callee_component, int(self.component_of[handler_id]))
+            for handler_id in self.endpoint_handlers(module_name, operation_id)
+        )
+
+
+class _NodeKeys:
+    """Sequence view of the stored node table in CompactCallGraph.sort_key form."""
+
+    def __init__(self, file_paths, class_names, function_names, has_function) -> None:
+        self.file_paths = file_paths
+        self.class_names = class_names
+        self.function_names = function_names
+        self.has_function = has_function
+
+    def __len__(self) -> int:
+        return len(self.file_paths)
+
+    def __getitem__(self, i: int) -> tuple:
+        return (
+            str(self.file_paths[i]),
+            str(self.class_names[i]),
+            bool(self.has_function[i]),
+            str(self.function_names[i]),
+        )
+
+
+class _EndpointKeys:
+    """Sequence view of the stored endpoint table as (module_name, operation_id)."""
+
+    def __init__(self, modules, operations) -> None:
+        self.modules = modules
+        self.operations = operations
+
+    def __len__(self) -> int:
+        return len(self.modules)
+
+    def __getitem__(self, i: int) -> tuple:
+        return (str(self.modules[i]), str(self.operations[i]))
+
+
+def _source_mtime(path: str) -> float:
+    if os.path.isdir(path):
+        return max(
+            (entry.stat().st_mtime for entry in os.scandir(path)),
+            default=os.stat(path).st_mtime,
+        )
+    return os.stat(path).st_mtime
+
+
+def _parse_node(value: str) -> tuple:
+    # "file_path,class_name,function_name"; an empty function name means a class reference.
+    file_path, class_name, function_name = (value.split(",") + ["", ""])[:3]
+    return (file_path, class_name, function_name or None)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build or query the persistent reachability index of a call graph."
+    )
+    parser.add_argument("--reference-csv", default="clubjt_reference_result.csv")
+    parser.add_argument("--start-points-csv", default="clubjt_error_result.csv")
+    parser.add_argument("--fastapi-endpoints-csv", default="fastapi_endpoints.csv")
+    parser.add_argument("--build", action="store_true", help="(Re)build the index")
+    parser.add_argument("--caller", default=None, help="file_path,class_name,function_name")
+    parser.add_argument("--endpoint", default=None, help="module_name:operation_id")
+    parser.add_argument("--callee", default=None, help="file_path,class_name,function_name")
+    args = parser.parse_args()
+
+    path = ReachabilityIndex.index_path(args.reference_csv)
+    if args.build or not os.path.exists(os.path.join(path, "meta.json")):
+        creator = CallGraphCreator(
+            args.reference_csv, args.start_points_csv, None, None, args.fastapi_endpoints_csv
+        )
+        try:
+            creator.load_call_graph()
+        finally:
+            creator.conn.close()
+        index = ReachabilityIndex.build(creator.call_graph)
+        index.save(path, args.reference_csv)
+        print(f"Reachability index written to {path}: {json.dumps(index.meta)}")
+
+    if args.callee:
+        index = ReachabilityIndex.load(path)
+        if index.is_stale(args.reference_csv):
+            print(f"Warning: {path} is older than {args.reference_csv}; rebuild with --build")
+        callee = _parse_node(args.callee)
+        if args.endpoint:
+            module_name, operation_id = args.endpoint.split(":", 1)
+            print(index.endpoint_reaches(module_name, operation_id, callee))
+        elif args.caller:
+            print(index.reaches(_parse_node(args.caller), callee))
+
+
+if __name__ == "__main__":
+    main()
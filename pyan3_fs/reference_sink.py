@@ -0,0 +1,141 @@
+import csv
+import hashlib
+
+import duckdb
+import numpy as np
+
+REFERENCE_FIELDNAMES = [
+    "source_file_path",
+    "source_class_name",
+    "source_function_name",
+    "reference_file_path",
+    "reference_class_name",
+    "reference_function_name",
+]
+
+
+def insert_arrays(conn, table_name: str, arrays: list[np.ndarray]) -> None:
+    """列ごとの numpy 配列を 1 回の INSERT で table_name に取り込みます。
+
+    executemany は 1 行ずつ INSERT を実行するため、数万行で数十秒かかります。
+    文字列の列の空文字は、CSV を読み込んだときと同じく NULL として保存します。
+    """
+    batch = {f"column_{i}": array for i, array in enumerate(arrays)}
+    values = ", ".join(
+        f"nullif({name}, '')" if array.dtype.kind == "U" else name
+        for name, array in batch.items()
+    )
+    conn.register("insert_batch", batch)
+    try:
+        conn.execute(f"INSERT INTO {table_name} SELECT {values} FROM insert_batch")
+    finally:
+        conn.unregister("insert_batch")
+
+
+class CsvReferenceWriter:
+    """参照行を CSV に追記するライター。"""
+
+    def __init__(self, csv_file: str) -> None:
+        self.csv_file = csv_file
+        self.fp = open(csv_file, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.fp)
+        self.writer.writerow(REFERENCE_FIELDNAMES)
+
+    def write_batch(self, rows: list[tuple]) -> None:
+        self.writer.writerows(rows)
+        self.fp.flush()
+
+    def close(self) -> None:
+        self.fp.close()
+
+
+class DuckDBReferenceWriter:
+    """参照行を DuckDB の ref_table に挿入するライター。
+
+    CallGraphCreator が CSV を COPY したときと同じく、空文字は NULL として保存します。
+    """
+
+    def __init__(self, database: str, table_name: str = "ref_table") -> None:
+        self.database = database
+        self.table_name = table_name
+        self.conn = duckdb.connect(database)
+        self.conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+        self.conn.execute(
+            f"""
+            CREATE TABLE {table_name} (
+                called_file_path VARCHAR,
+                called_class_name VARCHAR,
+                called_function_name VARCHAR,
+                caller_file_path VARCHAR,
+                caller_class_name VARCHAR,
+                caller_function_name VARCHAR
+            )
+        """
+        )
+
+    def write_batch(self, rows: list[tuple]) -> None:
+        if not rows:
+            return
+        insert_arrays(
+            self.conn,
+            self.table_name,
+            [
+                np.array([value or "" for value in column], dtype=str)
+                for column in zip(*rows)
+            ],
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class ReferenceSink:
+    """見つかった参照を逐次重複排除し、バッチ単位で書き出すシンク。
+
+    重複判定には行全体ではなく 64bit のハッシュ値だけを保持するため、
+    出力済みの行をメモリに溜め込みません。
+    """
+
+    def __init__(self, writer, batch_size: int = 10000) -> None:
+        self.writer = writer
+        self.batch_size = batch_size
+        self.seen_keys: set[int] = set()
+        self.batch: list[tuple] = []
+        self.total_rows = 0
+        self.duplicate_rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @classmethod
+    def row_key(cls, row: tuple) -> int:
+        digest = hashlib.blake2b(
+            "\x1f".join(row).encode("utf-8"), digest_size=8
+        ).digest()
+        return int.from_bytes(digest, "little")
+
+    def add(self, row: tuple) -> bool:
+        key = self.row_key(row)
+        if key in self.seen_keys:
+            self.duplicate_rows += 1
+            return False
+        self.seen_keys.add(key)
+        self.batch.append(row)
+        self.total_rows += 1
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self) -> None:
+        if self.batch:
+            self.writer.write_batch(self.batch)
+            self.batch = []
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self.writer.close()
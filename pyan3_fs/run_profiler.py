@@ -0,0 +1,121 @@
+import heapq
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class RunProfiler:
+    """Collects per-phase and per-file timings for an analysis run.
+
+    The collected data is written as a JSON report so that slow phases,
+    files and nodes can be found without re-running under a profiler.
+    """
+
+    def __init__(self, name: str, top_n: int = 20) -> None:
+        self.name = name
+        self.top_n = top_n
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.phases: list[dict] = []
+        self.files: dict[str, dict] = {}
+        self.slow_nodes: list[tuple] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        wall_start = time.perf_counter()
+        cpu_start = self._cpu_time()
+        try:
+            yield
+        finally:
+            self.phases.append(
+                {
+                    "name": name,
+                    "wall_seconds": round(time.perf_counter() - wall_start, 6),
+                    "cpu_seconds": round(self._cpu_time() - cpu_start, 6),
+                }
+            )
+
+    @classmethod
+    def _cpu_time(cls) -> float:
+        # Includes finished worker processes so pooled phases are accounted for.
+        times = os.times()
+        return times.user + times.system + times.children_user + times.children_system
+
+    def record_file(self, file_path: str, **values: float) -> None:
+        stats = self.files.setdefault(file_path, {})
+        for key, value in values.items():
+            stats[key] = stats.get(key, 0) + value
+
+    def is_slow(self, elapsed: float) -> bool:
+        return len(self.slow_nodes) < self.top_n or elapsed > self.slow_nodes[0][0]
+
+    def record_node(self, elapsed: float, file_path: str, line: int | None, label: str) -> None:
+        entry = (elapsed, file_path, line or 0, label)
+        if len(self.slow_nodes) < self.top_n:
+            heapq.heappush(self.slow_nodes, entry)
+        elif elapsed > self.slow_nodes[0][0]:
+            heapq.heapreplace(self.slow_nodes, entry)
+
+    def export_partial(self) -> dict:
+        """Returns the per-file data collected so far, for merging into another profiler."""
+        return {"files": self.files, "slow_nodes": self.slow_nodes}
+
+    def merge_partial(self, partial: dict) -> None:
+        for file_path, stats in partial["files"].items():
+            self.record_file(file_path, **stats)
+        for entry in partial["slow_nodes"]:
+            self.record_node(*entry)
+
+    def reset_files(self) -> None:
+        self.files = {}
+        self.slow_nodes = []
+
+    @classmethod
+    def peak_rss_bytes(cls) -> dict:
+        if resource is None:
+            return {}
+        # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+        scale = 1 if sys.platform == "darwin" else 1024
+        return {
+            "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+        }
+
+    def to_dict(self) -> dict:
+        totals = {}
+        for stats in self.files.values():
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+
+        def file_cost(item: tuple) -> float:
+            stats = item[1]
+            return stats.get("parse_seconds", 0) + stats.get("analyze_seconds", 0)
+
+        slowest_files = sorted(self.files.items(), key=file_cost, reverse=True)
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "phases": self.phases,
+            "totals": {"files": len(self.files), **totals},
+            "slowest_files": [
+                {"file_path": file_path, **stats}
+                for file_path, stats in slowest_files[: self.top_n]
+            ],
+            "slowest_nodes": [
+                {"seconds": elapsed, "file_path": file_path, "line": line, "label": label}
+                for elapsed, file_path, line, label in sorted(self.slow_nodes, reverse=True)
+            ],
+            "peak_rss_bytes": self.peak_rss_bytes(),
+            "files": self.files,
+        }
+
+    def write_report(self, report_file: str) -> None:
+        with open(report_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,203 @@
+import argparse
+import os
+import random
+import textwrap
+
+
+class SyntheticProjectGenerator:
+    """Generates a FastAPI-style project shaped like clubjt_impl for benchmarking.
+
+    The project contains an error module, an inheritance chain of table
+    classes, service modules whose methods call into lower-numbered modules,
+    and user/operator handler modules whose endpoints call the services.
+    """
+
+    HANDLER_MODULES = ["user_handler", "operator_handler"]
+
+    def __init__(
+        self,
+        output_path: str,
+        target_module: str = "clubjt_impl",
+        module_count: int = 50,
+        call_fanout: int = 3,
+        inheritance_depth: int = 3,
+        handler_count: int = 20,
+        raise_density: float = 0.2,
+        methods_per_class: int = 4,
+        seed: int = 0,
+    ) -> None:
+        self.output_path = os.path.abspath(output_path)
+        self.target_module = target_module
+        self.module_count = module_count
+        self.call_fanout = call_fanout
+        self.inheritance_depth = max(1, inheritance_depth)
+        self.handler_count = handler_count
+        self.raise_density = raise_density
+        self.methods_per_class = methods_per_class
+        self.random = random.Random(seed)
+
+    @property
+    def handler_files(self) -> list[str]:
+        return [
+            f"{self.target_module}/api/{module}.py" for module in self.HANDLER_MODULES
+        ]
+
+    def generate(self) -> str:
+        package_path = os.path.join(self.output_path, self.target_module)
+        for sub_package in ("", "base", "service", "api"):
+            self._write(os.path.join(package_path, sub_package, "__init__.py"), "")
+
+        self._write(os.path.join(package_path, "errors.py"), self._errors_source())
+        for depth in range(self.inheritance_depth):
+            self._write(
+                os.path.join(package_path, "base", f"table_{depth}.py"),
+                self._base_source(depth),
+            )
+        for index in range(self.module_count):
+            self._write(
+                os.path.join(package_path, "service", f"module_{index}.py"),
+                self._service_source(index),
+            )
+        for module in self.HANDLER_MODULES:
+            self._write(
+                os.path.join(package_path, "api", f"{module}.py"),
+                self._handler_source(module),
+            )
+        return self.output_path
+
+    @classmethod
+    def _write(cls, path: str, source: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+
+    def _errors_source(self) -> str:
+        return textwrap.dedent(
+            """\
+            class ClubjtError(Exception):
+                def __init__(self, status_code, reason=None, message=None):
+                    super().__init__(reason)
+                    self.status_code = status_code
+                    self.reason = reason
+                    self.message = message
+
+
+            class ClubjtModuleError(ClubjtError):
+                def __init__(self, status_code, detail_code, reason=None, message=None):
+                    super().__init__(status_code, reason, message)
+                    self.detail_code = detail_code
+            """
+        )
+
+    def _raise_statement(self, location: str) -> str:
+        if self.random.random() < 0.5:
+            return f'raise ClubjtError(404, f"{location} not found: {{key}}")'
+        return f'raise ClubjtModuleError(500, "E{self.random.randrange(1000):03d}", "{location} failed")'
+
+    def _base_source(self, depth: int) -> str:
+        lines = ["from ..errors import ClubjtError, ClubjtModuleError"]
+        if depth == 0:
+            lines += ["", "", "class Table0:", "    table_name = 'table_0'", ""]
+        else:
+            lines += [
+                f"from .table_{depth - 1} import Table{depth - 1}",
+                "",
+                "",
+                f"class Table{depth}(Table{depth - 1}):",
+                f"    table_name = 'table_{depth}'",
+                "",
+            ]
+        for method in ("get", "put", "query"):
+            lines.append(f"    def {method}_{depth}(self, key):")
+            if self.random.random() < self.raise_density:
+                lines += ["        if key is None:", f"            {self._raise_statement(f'{method}_{depth}')}"]
+            if depth > 0:
+                lines.append(f"        return self.{method}_{depth - 1}(key)")
+            else:
+                lines.append("        return {'key': key, 'table': self.table_name}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def _service_source(self, index: int) -> str:
+        depth = self.random.randrange(self.inheritance_depth)
+        callees = self.random.sample(range(index), min(self.call_fanout, index))
+        lines = [
+            "from ..errors import ClubjtError, ClubjtModuleError",
+            f"from ..base.table_{depth} import Table{depth}",
+        ]
+        lines += [f"from .module_{callee} import Service{callee}" for callee in sorted(callees)]
+        lines += ["", "", f"class Service{index}(Table{depth}):"]
+        for method in range(self.methods_per_class):
+            lines.append(f"    def method_{method}(self, key):")
+            if self.random.random() < self.raise_density:
+                lines += ["        if not key:", f"            {self._raise_statement(f'Service{index}.method_{method}')}"]
+            lines.append(f"        result = [self.get_{depth}(key)]")
+            for callee in callees:
+                callee_method = self.random.randrange(self.methods_per_class)
+                lines.append(f"        result.append(Service{callee}().method_{callee_method}(key))")
+            lines += ["        return result", ""]
+        lines += [
+            "",
+            f"def build_service_{index}():",
+            f"    return Service{index}()",
+            "",
+            "",
+            # Calls that are only resolved through builtins.
+            f"def run_service_{index}(key):",
+            f"    service = build_service_{index}()",
+            '    getattr(service, "method_0")(key)',
+            f"    return type(service).method_{self.methods_per_class - 1}(service, key)",
+            "",
+        ]
+        return "\n".join(lines)
+
+    def _handler_source(self, module: str) -> str:
+        lines = ["from fastapi import APIRouter"]
+        endpoint_count = max(1, self.handler_count // len(self.HANDLER_MODULES))
+        targets = [
+            self.random.randrange(self.module_count) for _ in range(endpoint_count)
+        ]
+        lines += [
+            f"from {self.target_module}.service.module_{target} import Service{target}"
+            for target in sorted(set(targets))
+        ]
+        lines += ["", "api = APIRouter()", ""]
+        for endpoint, target in enumerate(targets):
+            method = self.random.choice(["get", "post", "put", "delete"])
+            lines += [
+                "",
+                f'@api.{method}("/{module}/resource_{endpoint}")',
+                f"def {module}_endpoint_{endpoint}(key):",
+                f"    return Service{target}().method_{self.random.randrange(self.methods_per_class)}(key)",
+                "",
+            ]
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic FastAPI-style project.")
+    parser.add_argument("output_path")
+    parser.add_argument("--target-module", default="clubjt_impl")
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--inheritance-depth", type=int, default=3)
+    parser.add_argument("--handlers", type=int, default=20)
+    parser.add_argument("--raise-density", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generator = SyntheticProjectGenerator(
+        args.output_path,
+        target_module=args.target_module,
+        module_count=args.modules,
+        call_fanout=args.fanout,
+        inheritance_depth=args.inheritance_depth,
+        handler_count=args.handlers,
+        raise_density=args.raise_density,
+        seed=args.seed,
+    )
+    print(f"Synthetic project written to {generator.generate()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import logging
+
+import pytest
+
+from pyan3_fs.call_graph_parser import CallGraphAnalyzer
+from pyan3_fs.clubjt_error_analyzer import ClubjtErrorAnalyzer
+from pyan3_fs.operator_parser import OperatorParser
+from pyan3_fs.synthetic_project import SyntheticProjectGenerator
+
+logging.getLogger("pyan3_fs").setLevel(logging.WARNING)
+
+
+@pytest.fixture(scope="session")
+def synthetic_project(tmp_path_factory):
+    """A small project from SyntheticProjectGenerator, shared by all tests."""
+    generator = SyntheticProjectGenerator(
+        str(tmp_path_factory.mktemp("synthetic")),
+        module_count=12,
+        handler_count=8,
+        raise_density=0.4,
+        seed=0,
+    )
+    generator.generate()
+    return generator
+
+
+@pytest.fixture(scope="session")
+def pipeline_artifacts(synthetic_project, tmp_path_factory):
+    """Error sites, FastAPI endpoints and references of synthetic_project."""
+    project = synthetic_project
+    output = tmp_path_factory.mktemp("artifacts")
+    artifacts = {
+        "start_points_csv": str(output / ClubjtErrorAnalyzer.OUTPUT_FILE),
+        "fastapi_endpoints_csv": str(output / "fastapi_endpoints.csv"),
+        "reference_csv": str(output / CallGraphAnalyzer.CSV_FILE),
+    }
+    error_analyzer = ClubjtErrorAnalyzer(project.output_path, project.target_module)
+    error_analyzer.OUTPUT_FILE = artifacts["start_points_csv"]
+    error_analyzer.execute()
+    operator_parser = OperatorParser(project.output_path, project.handler_files)
+    operator_parser.output_file = artifacts["fastapi_endpoints_csv"]
+    operator_parser.execute()
+    CallGraphAnalyzer(
+        project.output_path, project.target_module, artifacts["reference_csv"]
+    ).execute()
+    return artifacts
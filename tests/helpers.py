@@ -0,0 +1,6 @@
+import csv
+
+
+def read_rows(csv_path):
+    with open(csv_path, "r", encoding="utf-8") as f:
+        return list(csv.reader(f))
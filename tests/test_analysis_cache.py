@@ -0,0 +1,97 @@
+import os
+
+import astroid
+
+from pyan3_fs.call_graph_parser import CallGraphAnalyzer
+from pyan3_fs.clubjt_error_analyzer import ClubjtErrorAnalyzer
+from pyan3_fs.operator_parser import OperatorParser
+from pyan3_fs.synthetic_project import SyntheticProjectGenerator
+
+TARGET_MODULE = "cachepkg_impl"
+
+
+def _edit(project_path, relative_path, old, new):
+    path = os.path.join(project_path, TARGET_MODULE, relative_path)
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    assert old in source
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(source.replace(old, new, 1))
+
+
+def _run_analyzers(project, output_path, cache_dir=None):
+    # Trees of the edited files must not come from an earlier run in this process.
+    astroid.MANAGER.clear_cache()
+    os.makedirs(output_path, exist_ok=True)
+    error_analyzer = ClubjtErrorAnalyzer(
+        project.output_path, TARGET_MODULE, cache_dir=cache_dir
+    )
+    error_analyzer.OUTPUT_FILE = os.path.join(output_path, ClubjtErrorAnalyzer.OUTPUT_FILE)
+    error_analyzer.execute()
+    operator_parser = OperatorParser(
+        project.output_path, project.handler_files, cache_dir=cache_dir
+    )
+    operator_parser.output_file = os.path.join(output_path, "fastapi_endpoints.csv")
+    operator_parser.execute()
+    CallGraphAnalyzer(
+        project.output_path,
+        TARGET_MODULE,
+        os.path.join(output_path, CallGraphAnalyzer.CSV_FILE),
+        cache_dir=cache_dir,
+    ).execute()
+    outputs = {}
+    for name in sorted(os.listdir(output_path)):
+        with open(os.path.join(output_path, name), "rb") as f:
+            outputs[name] = f.read()
+    return outputs
+
+
+def test_cached_runs_follow_dependency_edits(tmp_path):
+    project = SyntheticProjectGenerator(
+        str(tmp_path / "project"),
+        target_module=TARGET_MODULE,
+        module_count=6,
+        handler_count=4,
+        raise_density=0.4,
+        seed=1,
+    )
+    project.generate()
+    # A raise of a class that only becomes a target error through a later edit.
+    _edit(
+        project.output_path,
+        "errors.py",
+        "class ClubjtModuleError",
+        "class LookupFailed(Exception):\n    pass\n\n\nclass ClubjtModuleError",
+    )
+    _edit(
+        project.output_path,
+        "service/module_0.py",
+        "import ClubjtError, ClubjtModuleError",
+        "import ClubjtError, ClubjtModuleError, LookupFailed",
+    )
+    with open(
+        os.path.join(project.output_path, TARGET_MODULE, "service", "module_0.py"),
+        "a",
+        encoding="utf-8",
+    ) as f:
+        f.write('\n\ndef lookup(key):\n    raise LookupFailed(404, f"{key} not found")\n')
+    cache_dir = str(tmp_path / "cache")
+    before = _run_analyzers(project, str(tmp_path / "before"), cache_dir)
+
+    # New error subclass, a method renamed under the subclasses that call it
+    # and a new endpoint; none of the dependent files change.
+    _edit(project.output_path, "errors.py", "LookupFailed(Exception)", "LookupFailed(ClubjtError)")
+    _edit(project.output_path, "base/table_0.py", "def query_0(", "def lookup_0(")
+    _edit(
+        project.output_path,
+        "api/user_handler.py",
+        "api = APIRouter()\n",
+        'api = APIRouter()\n\n\n@api.get("/health")\ndef health():\n    return "ok"\n',
+    )
+    cached = _run_analyzers(project, str(tmp_path / "cached"), cache_dir)
+    cold = _run_analyzers(project, str(tmp_path / "cold"))
+
+    assert cached == cold
+    for name in cold:
+        assert cold[name] != before[name], name
+    assert b"LookupFailed" in cold[ClubjtErrorAnalyzer.OUTPUT_FILE]
@@ -0,0 +1,33 @@
+import os
+import time
+
+import pytest
+
+from pyan3_fs import benchmark
+from pyan3_fs.benchmark import BenchmarkRunner
+
+
+def _killed_stage(stage, project_path, output_path, workers, queue):
+    os._exit(9)
+
+
+def _hanging_stage(stage, project_path, output_path, workers, queue):
+    time.sleep(60)
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    monkeypatch.setattr(BenchmarkRunner, "RESULT_POLL_SECONDS", 0.05)
+    return BenchmarkRunner([1], str(tmp_path), stage_timeout=0.5)
+
+
+def test_stage_that_dies_is_reported(runner, tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark, "_run_stage", _killed_stage)
+    with pytest.raises(RuntimeError, match="Stage operator_parser exited with code 9"):
+        runner._run_stage_process("operator_parser", str(tmp_path), str(tmp_path))
+
+
+def test_stage_that_hangs_is_stopped(runner, tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark, "_run_stage", _hanging_stage)
+    with pytest.raises(RuntimeError, match="Stage call_graph_parser did not finish"):
+        runner._run_stage_process("call_graph_parser", str(tmp_path), str(tmp_path))
@@ -0,0 +1,89 @@
+import pytest
+
+from pyan3_fs.call_graph_creator import CallGraphCreator
+from pyan3_fs.call_graph_parser import CallGraphAnalyzer
+from tests.helpers import read_rows
+
+
+def _mapping(artifacts, tmp_path, traversal, **kwargs):
+    tmp_path.mkdir(exist_ok=True)
+    mapping_csv = tmp_path / f"mapping_{traversal}.csv"
+    CallGraphCreator(
+        artifacts["reference_csv"],
+        artifacts["start_points_csv"],
+        str(tmp_path / f"call_graphs_{traversal}.txt"),
+        str(mapping_csv),
+        artifacts["fastapi_endpoints_csv"],
+        traversal=traversal,
+        **kwargs,
+    ).execute()
+    return read_rows(mapping_csv)
+
+
+@pytest.mark.parametrize("traversal", ["condensed", "bitset", "sql"])
+def test_traversals_match_path_enumeration(pipeline_artifacts, tmp_path, traversal):
+    baseline = _mapping(pipeline_artifacts, tmp_path, "paths")
+    assert len(baseline) > 1
+    assert _mapping(pipeline_artifacts, tmp_path, traversal) == baseline
+
+
+def test_parallel_call_graphs_match_serial(pipeline_artifacts, tmp_path):
+    serial = _mapping(pipeline_artifacts, tmp_path / "serial", "condensed")
+    parallel = _mapping(pipeline_artifacts, tmp_path / "parallel", "condensed", workers=2)
+    assert parallel == serial
+    assert (tmp_path / "parallel" / "call_graphs_condensed.txt").read_bytes() == (
+        tmp_path / "serial" / "call_graphs_condensed.txt"
+    ).read_bytes()
+
+
+@pytest.mark.parametrize("output_format", ["edges-duckdb", "edges-parquet"])
+def test_sql_traversal_reads_edge_stores(
+    synthetic_project, pipeline_artifacts, tmp_path, output_format
+):
+    project = synthetic_project
+    edge_store = str(tmp_path / "references.bin")
+    CallGraphAnalyzer(
+        project.output_path, project.target_module, edge_store, output_format=output_format
+    ).execute()
+
+    baseline = _mapping(pipeline_artifacts, tmp_path, "paths")
+    artifacts = {**pipeline_artifacts, "reference_csv": edge_store}
+    assert _mapping(artifacts, tmp_path, "sql") == baseline
+
+
+@pytest.mark.parametrize("output_format", ["edges-duckdb", "edges-parquet"])
+def test_call_graph_from_edge_store_ids_matches_csv(
+    synthetic_project, pipeline_artifacts, tmp_path, output_format
+):
+    project = synthetic_project
+    edge_store = str(tmp_path / "references.bin")
+    CallGraphAnalyzer(
+        project.output_path, project.target_module, edge_store, output_format=output_format
+    ).execute()
+    artifacts = {**pipeline_artifacts, "reference_csv": edge_store}
+
+    graphs = []
+    for reference_path in (pipeline_artifacts["reference_csv"], edge_store):
+        creator = CallGraphCreator(
+            reference_path,
+            artifacts["start_points_csv"],
+            None,
+            None,
+            artifacts["fastapi_endpoints_csv"],
+        )
+        try:
+            creator.load_call_graph()
+        finally:
+            creator.conn.close()
+        graphs.append(creator)
+    assert graphs[1].edge_tables is not None
+    assert graphs[1].call_graph.nodes == graphs[0].call_graph.nodes
+    assert graphs[1].call_graph.offsets.tolist() == graphs[0].call_graph.offsets.tolist()
+    assert graphs[1].call_graph.targets.tolist() == graphs[0].call_graph.targets.tolist()
+
+    assert _mapping(artifacts, tmp_path / "store", "condensed") == _mapping(
+        pipeline_artifacts, tmp_path / "csv", "condensed"
+    )
+    assert (tmp_path / "store" / "call_graphs_condensed.txt").read_bytes() == (
+        tmp_path / "csv" / "call_graphs_condensed.txt"
+    ).read_bytes()
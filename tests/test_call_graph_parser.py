@@ -0,0 +1,48 @@
+from pyan3_fs.call_graph_parser import CallGraphAnalyzer
+from tests.helpers import read_rows
+
+
+class _InferEverythingAnalyzer(CallGraphAnalyzer):
+    # Baseline path: every node is inferred, nothing is short-circuited.
+    def is_external_node(self, node):
+        return False
+
+
+def _references(analyzer_class, project, csv_file, **kwargs):
+    analyzer_class(project.output_path, project.target_module, str(csv_file), **kwargs).execute()
+    return read_rows(csv_file)
+
+
+def test_super_calls_into_project_classes_are_kept(synthetic_project, tmp_path):
+    rows = _references(CallGraphAnalyzer, synthetic_project, tmp_path / "references.csv")
+    assert [
+        "clubjt_impl/errors.py",
+        "ClubjtError",
+        "__init__",
+        "clubjt_impl/errors.py",
+        "ClubjtModuleError",
+        "__init__",
+    ] in rows
+
+
+def test_external_node_prefilter_matches_full_inference(synthetic_project, tmp_path):
+    assert _references(
+        CallGraphAnalyzer, synthetic_project, tmp_path / "prefiltered.csv"
+    ) == _references(_InferEverythingAnalyzer, synthetic_project, tmp_path / "full.csv")
+
+
+def test_import_prefilter_matches_full_scan(synthetic_project, tmp_path):
+    assert _references(
+        CallGraphAnalyzer, synthetic_project, tmp_path / "prefiltered.csv"
+    ) == _references(
+        CallGraphAnalyzer, synthetic_project, tmp_path / "full.csv", import_prefilter=False
+    )
+
+
+def test_workers_match_serial_run(synthetic_project, tmp_path):
+    serial = tmp_path / "serial.csv"
+    parallel = tmp_path / "parallel.csv"
+    _references(CallGraphAnalyzer, synthetic_project, serial)
+    _references(CallGraphAnalyzer, synthetic_project, parallel, workers=3)
+
+    assert parallel.read_bytes() == serial.read_bytes()
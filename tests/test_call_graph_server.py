@@ -0,0 +1,67 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from pyan3_fs.call_graph_server import CallGraphQueryService
+from tests.helpers import read_rows
+
+
+def _service(artifacts, **kwargs):
+    return CallGraphQueryService(
+        artifacts["reference_csv"],
+        artifacts["start_points_csv"],
+        artifacts["fastapi_endpoints_csv"],
+        **kwargs,
+    )
+
+
+def _start_point_params(artifacts):
+    header, *rows = read_rows(artifacts["start_points_csv"])
+    columns = [header.index(name) for name in ("file_path", "class_name", "function_name")]
+    params = []
+    for row in rows:
+        param = dict(zip(("file_path", "class_name", "function_name"), (row[i] for i in columns)))
+        if param not in params:
+            params.append(param)
+    return params
+
+
+def test_concurrent_queries_match_serial_queries(pipeline_artifacts):
+    params = _start_point_params(pipeline_artifacts)
+    assert params
+    service = _service(pipeline_artifacts)
+    graph = service.state["graph"]
+    assert len(service.state["condensed_graph"].component_of) == len(graph)
+
+    serial = [
+        _service(pipeline_artifacts).handle("endpoints-reaching", param) for param in params
+    ]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        concurrent = list(
+            executor.map(lambda param: service.handle("endpoints-reaching", param), params)
+        )
+    assert concurrent == serial
+    assert any(body["endpoints"] for _, body in serial)
+
+
+def test_failed_reload_keeps_the_previous_state(pipeline_artifacts, tmp_path):
+    artifacts = {}
+    for name, path in pipeline_artifacts.items():
+        artifacts[name] = str(tmp_path / os.path.basename(path))
+        shutil.copy(path, artifacts[name])
+    service = _service(artifacts, check_interval=0.0)
+    state = service.state
+    param = _start_point_params(artifacts)[0]
+    expected = service.handle("endpoints-reaching", param)
+
+    with open(artifacts["reference_csv"], "w", encoding="utf-8") as f:
+        f.write("broken\n1,2,3\n")
+    os.utime(artifacts["reference_csv"], (0, 0))
+    status, body = service.handle("endpoints-reaching", param)
+    assert status == 503
+    assert "error" in body
+    assert service.state is state
+
+    shutil.copy(pipeline_artifacts["reference_csv"], artifacts["reference_csv"])
+    assert service.handle("endpoints-reaching", param) == expected
+    assert service.state is not state
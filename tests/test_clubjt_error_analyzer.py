@@ -0,0 +1,85 @@
+import textwrap
+
+from pyan3_fs.clubjt_error_analyzer import ClubjtErrorAnalyzer
+from tests.helpers import read_rows
+
+ALIAS_PROJECT = {
+    "aliaserr_impl/__init__.py": "",
+    "aliaserr_impl/errors.py": """
+        class ClubjtError(Exception):
+            def __init__(self, status_code, reason=None, message=None):
+                super().__init__(reason)
+                self.status_code = status_code
+    """,
+    "aliaserr_impl/sub/__init__.py": """
+        from aliaserr_impl.errors import ClubjtError as BaseErr
+    """,
+    "aliaserr_impl/c.py": """
+        from aliaserr_impl.sub import BaseErr
+
+
+        def lookup(key):
+            if key is None:
+                raise BaseErr(404, "lookup failed")
+            return key
+    """,
+}
+
+
+def _write_project(root, files):
+    for relative_path, source in files.items():
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(textwrap.dedent(source).lstrip(), encoding="utf-8")
+
+
+def _analyze(project_path, target_module, output_csv, **kwargs):
+    analyzer = ClubjtErrorAnalyzer(str(project_path), target_module, **kwargs)
+    analyzer.OUTPUT_FILE = str(output_csv)
+    analyzer.execute()
+    return read_rows(output_csv)
+
+
+def test_fast_path_matches_reexported_aliases(tmp_path):
+    project = tmp_path / "project"
+    _write_project(project, ALIAS_PROJECT)
+
+    fast = _analyze(project, "aliaserr_impl", tmp_path / "fast.csv")
+    baseline = _analyze(project, "aliaserr_impl", tmp_path / "baseline.csv", fast_path=False)
+
+    assert fast == baseline
+    assert [row[:4] for row in fast[1:]] == [["aliaserr_impl/c.py", "", "lookup", "ClubjtError"]]
+
+
+def test_fast_path_matches_astroid_on_synthetic_project(synthetic_project, tmp_path):
+    project = synthetic_project
+    fast = _analyze(project.output_path, project.target_module, tmp_path / "fast.csv")
+    baseline = _analyze(
+        project.output_path, project.target_module, tmp_path / "baseline.csv", fast_path=False
+    )
+
+    assert len(fast) > 1
+    assert fast == baseline
+
+
+def test_hierarchy_matches_direct_names_on_synthetic_project(synthetic_project, tmp_path):
+    # The synthetic project raises the target errors by their own names only.
+    project = synthetic_project
+    with_hierarchy = _analyze(project.output_path, project.target_module, tmp_path / "on.csv")
+    without_hierarchy = _analyze(
+        project.output_path, project.target_module, tmp_path / "off.csv", use_hierarchy=False
+    )
+
+    assert len(with_hierarchy) > 1
+    assert with_hierarchy == without_hierarchy
+
+
+def test_workers_match_serial_run(synthetic_project, tmp_path):
+    project = synthetic_project
+    serial = tmp_path / "serial.csv"
+    parallel = tmp_path / "parallel.csv"
+    _analyze(project.output_path, project.target_module, serial)
+    _analyze(project.output_path, project.target_module, parallel, workers=2)
+
+    assert len(read_rows(serial)) > 1
+    assert parallel.read_bytes() == serial.read_bytes()
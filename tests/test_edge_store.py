@@ -0,0 +1,38 @@
+import duckdb
+import pytest
+
+from pyan3_fs.edge_store import EdgeStore, EdgeStoreWriter
+from pyan3_fs.reference_sink import ReferenceSink
+
+ROWS = [
+    (f"pkg/m{i % 7}.py", "" if i % 3 else f"C{i % 5}", f"f{i % 40}", f"pkg/n{i % 11}.py", "", "g")
+    for i in range(2500)
+]
+
+
+@pytest.mark.parametrize(
+    ("fmt", "file_name"), [("duckdb", "references.bin"), ("parquet", "references")]
+)
+def test_edge_store_round_trip(tmp_path, fmt, file_name):
+    path = str(tmp_path / file_name)
+    with ReferenceSink(EdgeStoreWriter(path, fmt), batch_size=1000) as sink:
+        for row in ROWS:
+            sink.add(row)
+
+    # The format comes from the file contents, not from the extension.
+    assert EdgeStore.detect_format(path) == fmt
+    conn = duckdb.connect(":memory:")
+    try:
+        EdgeStore.create_ref_table(conn, path)
+        stored = conn.execute("SELECT * FROM ref_table").fetchall()
+    finally:
+        conn.close()
+    assert sorted(tuple(value or "" for value in row) for row in stored) == sorted(
+        set(ROWS)
+    )
+
+
+def test_detect_format_of_csv(tmp_path):
+    path = tmp_path / "references.duckdb"
+    path.write_text("source_file_path,source_class_name\n", encoding="utf-8")
+    assert EdgeStore.detect_format(str(path)) == "csv"
@@ -0,0 +1,17 @@
+import os
+
+from pyan3_fs.extraction_engine import ExtractionEngine
+from tests.helpers import read_rows
+
+
+def test_single_pass_matches_separate_runs(
+    synthetic_project, pipeline_artifacts, tmp_path, monkeypatch
+):
+    project = synthetic_project
+    monkeypatch.chdir(tmp_path)
+    ExtractionEngine.with_all_extractors(
+        project.output_path, project.target_module, project.handler_files
+    ).execute()
+
+    for path in pipeline_artifacts.values():
+        assert read_rows(tmp_path / os.path.basename(path)) == read_rows(path)
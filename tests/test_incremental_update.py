@@ -0,0 +1,99 @@
+import csv
+import random
+import shutil
+
+import pytest
+
+from pyan3_fs.call_graph_creator import CallGraphCreator
+from pyan3_fs.incremental_update import IncrementalMappingUpdater
+from tests.helpers import read_rows
+
+
+def _write_rows(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(rows)
+    return str(path)
+
+
+def _bitset_run(reference_csv, start_points_csv, endpoints_csv, mapping_csv, matrix_file):
+    CallGraphCreator(
+        reference_csv,
+        start_points_csv,
+        None,
+        str(mapping_csv),
+        endpoints_csv,
+        traversal="bitset",
+        matrix_file=str(matrix_file),
+    ).execute()
+
+
+def _random_diff(artifacts, tmp_path, seed):
+    rng = random.Random(seed)
+    header, *references = read_rows(artifacts["reference_csv"])
+    start_header, *start_rows = read_rows(artifacts["start_points_csv"])
+    nodes = sorted({tuple(row[:3]) for row in references} | {tuple(row[3:]) for row in references})
+    handlers = [node for node in nodes if node[0].endswith("_handler.py") and node[2]]
+
+    removed = rng.sample(references, 5)
+    added = [list(rng.choice(nodes) + rng.choice(nodes)) for _ in range(3)]
+    # Let an endpoint reach an error site directly.
+    added.append(start_rows[rng.randrange(len(start_rows))][:3] + list(rng.choice(handlers)))
+    added = [row for row in added if row not in references]
+    patched = [row for row in references if row not in removed] + added
+
+    # One changed raise site and one new start point.
+    changed = rng.randrange(len(start_rows))
+    start_rows[changed] = start_rows[changed][:6] + ["changed reason"] + start_rows[changed][7:]
+    new_site = next(
+        node for node in rng.sample(nodes, len(nodes)) if not node[0].endswith("_handler.py")
+    )
+    start_rows.append(list(new_site) + ["ClubjtError", "404", "", "new site", ""])
+
+    return {
+        "added": _write_rows(tmp_path / "added.csv", [header] + added),
+        "removed": _write_rows(tmp_path / "removed.csv", [header] + removed),
+        "patched_reference": _write_rows(tmp_path / "patched.csv", [header] + patched),
+        "start_points": _write_rows(tmp_path / "start_points.csv", [start_header] + start_rows),
+    }
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_incremental_update_matches_full_recompute(pipeline_artifacts, tmp_path, seed):
+    artifacts = pipeline_artifacts
+    _bitset_run(
+        artifacts["reference_csv"],
+        artifacts["start_points_csv"],
+        artifacts["fastapi_endpoints_csv"],
+        tmp_path / "mapping.csv",
+        tmp_path / "matrix.npz",
+    )
+    diff = _random_diff(artifacts, tmp_path, seed)
+
+    report = IncrementalMappingUpdater(
+        artifacts["reference_csv"],
+        diff["start_points"],
+        artifacts["start_points_csv"],
+        artifacts["fastapi_endpoints_csv"],
+        str(tmp_path / "matrix.npz"),
+        str(tmp_path / "mapping.csv"),
+        added_edges_csv=diff["added"],
+        removed_edges_csv=diff["removed"],
+        output_matrix_file=str(tmp_path / "updated_matrix.npz"),
+        output_reference_csv=str(tmp_path / "updated_reference.csv"),
+    ).execute()
+    _bitset_run(
+        diff["patched_reference"],
+        diff["start_points"],
+        artifacts["fastapi_endpoints_csv"],
+        tmp_path / "full_mapping.csv",
+        tmp_path / "full_matrix.npz",
+    )
+
+    assert report["added_edges"] and report["removed_edges"]
+    assert report["mapping_rows_added"]
+    # The changed raise site and the new start point.
+    assert report["changed_raise_sites"] == 2
+    assert (tmp_path / "mapping.csv").read_bytes() == (tmp_path / "full_mapping.csv").read_bytes()
+    assert sorted(read_rows(tmp_path / "updated_reference.csv")[1:]) == sorted(
+        read_rows(diff["patched_reference"])[1:]
+    )
@@ -0,0 +1,76 @@
+import os
+
+import astroid
+from astroid.builder import AstroidBuilder
+
+from pyan3_fs.call_graph_parser import CallGraphAnalyzer
+from pyan3_fs.module_cache import ModuleCache
+
+
+def _project_modules(project_path):
+    return [
+        module
+        for module in astroid.MANAGER.astroid_cache.values()
+        if module.file and module.file.startswith(project_path)
+    ]
+
+
+def test_evicted_modules_leave_the_astroid_manager(tmp_path):
+    package = tmp_path / "cachepkg"
+    package.mkdir()
+    builder = AstroidBuilder(astroid.MANAGER)
+    cache = ModuleCache(max_modules=2)
+    for i in range(3):
+        path = package / f"m{i}.py"
+        path.write_text(f"def f{i}():\n    return {i}\n", encoding="utf-8")
+        cache.put(str(path), builder.file_build(str(path), f"cachepkg.m{i}"))
+
+    assert cache.evictions == 1
+    assert "cachepkg.m0" not in astroid.MANAGER.astroid_cache
+    assert {"cachepkg.m1", "cachepkg.m2"} <= set(astroid.MANAGER.astroid_cache)
+    cache.pop(str(package / "m1.py"))
+    assert "cachepkg.m1" not in astroid.MANAGER.astroid_cache
+
+
+def test_manager_modules_are_tracked_incrementally(tmp_path):
+    package = tmp_path / "trackpkg"
+    package.mkdir()
+    builder = AstroidBuilder(astroid.MANAGER)
+    cache = ModuleCache(max_modules=2)
+    prefix = str(package) + os.sep
+
+    def build(i, cached):
+        path = package / f"m{i}.py"
+        path.write_text(f"def f{i}():\n    return {i}\n", encoding="utf-8")
+        module = builder.file_build(str(path), f"trackpkg.m{i}")
+        if cached:
+            cache.put(str(path), module)
+
+    for i in range(6):
+        # Odd modules stand for imports that only inference loaded.
+        build(i, cached=i % 2 == 0)
+        over = cache.manager_over_limit(prefix)
+        modules = _project_modules(str(package))
+        assert set(cache.manager_sizes) == {module.name for module in modules}
+        assert over == (len(modules) > 2)
+    cache.clear()
+    assert cache.manager_over_limit(prefix)
+    assert len(cache.manager_sizes) == len(_project_modules(str(package)))
+
+
+def test_module_cap_bounds_the_astroid_manager(synthetic_project, tmp_path):
+    project = synthetic_project
+    CallGraphAnalyzer(
+        project.output_path, project.target_module, str(tmp_path / "unbounded.csv")
+    ).execute()
+    analyzer = CallGraphAnalyzer(
+        project.output_path,
+        project.target_module,
+        str(tmp_path / "bounded.csv"),
+        max_cached_modules=3,
+    )
+    analyzer.execute()
+
+    assert len(_project_modules(project.output_path)) <= 3
+    # Bounded runs process files in another order, but write them in file order.
+    assert (tmp_path / "bounded.csv").read_bytes() == (tmp_path / "unbounded.csv").read_bytes()
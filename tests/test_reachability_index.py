@@ -0,0 +1,66 @@
+from collections import deque
+
+from pyan3_fs.call_graph_creator import CallGraphCreator
+from pyan3_fs.compact_call_graph import CompactCallGraph
+from pyan3_fs.reachability_index import ReachabilityIndex
+from tests.helpers import read_rows
+
+
+def _call_graph(artifacts):
+    creator = CallGraphCreator(
+        artifacts["reference_csv"],
+        artifacts["start_points_csv"],
+        None,
+        None,
+        artifacts["fastapi_endpoints_csv"],
+    )
+    try:
+        creator.load_call_graph()
+    finally:
+        creator.conn.close()
+    return creator.call_graph
+
+
+def _callers_closure(graph, node_id):
+    reached = {node_id}
+    queue = deque([node_id])
+    while queue:
+        for caller_id in graph.caller_list(queue.popleft()):
+            if caller_id not in reached:
+                reached.add(caller_id)
+                queue.append(caller_id)
+    return reached
+
+
+def test_reaches_matches_bfs(pipeline_artifacts, tmp_path):
+    graph = _call_graph(pipeline_artifacts)
+    ReachabilityIndex.build(graph).save(str(tmp_path / "index"))
+    index = ReachabilityIndex.load(str(tmp_path / "index"))
+    endpoints = [
+        (row[0], row[3]) for row in read_rows(pipeline_artifacts["fastapi_endpoints_csv"])[1:]
+    ]
+    assert endpoints
+
+    for callee_id, callee in enumerate(graph.nodes):
+        reached = _callers_closure(graph, callee_id)
+        for caller_id, caller in enumerate(graph.nodes):
+            assert index.reaches(caller, callee) == (caller_id in reached)
+        for module_name, operation_id in endpoints:
+            handler_ids = index.endpoint_handlers(module_name, operation_id)
+            assert handler_ids
+            assert index.endpoint_reaches(module_name, operation_id, callee) == any(
+                handler_id in reached for handler_id in handler_ids
+            )
+
+
+def test_handler_module_helpers_are_reachable():
+    get_user = ("app/api/user_handler.py", "", "get_user")
+    load = ("app/api/user_handler.py", "", "_load")
+    run = ("app/service/module_0.py", "Service0", "run")
+    index = ReachabilityIndex.build(CompactCallGraph.from_edges([(load, get_user), (run, load)]))
+
+    assert index.reaches(get_user, load)
+    assert index.reaches(get_user, run)
+    assert not index.reaches(load, get_user)
+    assert index.endpoint_reaches("user_handler", "get_user", run)
+    assert index.endpoint_handlers("user_handler", "missing") == []
@@ -0,0 +1,37 @@
+import duckdb
+
+from pyan3_fs.reference_sink import (
+    CsvReferenceWriter,
+    DuckDBReferenceWriter,
+    ReferenceSink,
+)
+from tests.helpers import read_rows
+
+ROWS = [
+    (f"pkg/m{i % 7}.py", "" if i % 3 else f"C{i % 5}", f"f{i}", f"pkg/n{i % 11}.py", "", "g")
+    for i in range(2500)
+]
+
+
+def _write(writer, batch_size=1000):
+    with ReferenceSink(writer, batch_size=batch_size) as sink:
+        for row in ROWS + ROWS[:10]:
+            sink.add(row)
+    return sink
+
+
+def test_duckdb_writer_matches_csv_writer(tmp_path):
+    sink = _write(CsvReferenceWriter(str(tmp_path / "references.csv")))
+    assert (sink.total_rows, sink.duplicate_rows) == (len(ROWS), 10)
+
+    _write(DuckDBReferenceWriter(str(tmp_path / "references.duckdb")))
+    conn = duckdb.connect(str(tmp_path / "references.duckdb"))
+    try:
+        stored = conn.execute("SELECT * FROM ref_table").fetchall()
+    finally:
+        conn.close()
+    # Empty strings are stored as NULL, as when the CSV is loaded.
+    assert [tuple(value or "" for value in row) for row in stored] == [
+        tuple(row) for row in read_rows(tmp_path / "references.csv")[1:]
+    ]
+    assert any(value is None for row in stored for value in row)